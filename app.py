@@ -1,10 +1,23 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import joblib
 import matplotlib.pyplot as plt
 import seaborn as sns
-from src.data_preprocessing import preprocess_data
+from src.data_preprocessing import preprocess_to_array
+from src.ensemble import load_models, score_ensemble
+from src.model_host import load_served_models
+from src.batch_jobs import BatchJobManager, read_patients_file, DONE, FAILED
+from src.streaming_stats import compute_stats
+from src.calibration import load_operating_point, apply_operating_point
+from src.explanations import EXPLAINABLE_MODELS, get_explainer
+from src.feature_importance import importance_path, load_feature_importance
+from src.inference import MODEL_NAMES, model_path, input_dtype
+from src.compaction import COMPACT_MODELS
+from src.monitoring import load_monitor
+from src.audit_log import AuditLog
+from src.manifest import artifact_version, fingerprint
+import os
+import time
 import plotly.express as px
 
 # Configuration de la page
@@ -180,6 +193,87 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+@st.cache_resource
+def get_served_models():
+    """Modèles chargés une seule fois par processus
+
+    Si l'hôte de modèles est lancé (python -m src.model_host serve), les
+    tableaux des modèles sont lus en mémoire partagée au lieu d'être copiés
+    dans chaque processus Streamlit.
+    """
+    return load_served_models()
+
+@st.cache_resource
+def get_compact_models():
+    """Variantes compactes disponibles (python -m src.compaction), hors vote de l'ensemble"""
+    return load_models(list(COMPACT_MODELS))
+
+@st.cache_resource
+def get_operating_point(model_name):
+    """Calibration et seuil de décision choisis à l'entraînement (None si absents)"""
+    return load_operating_point(model_name)
+
+@st.cache_resource
+def get_audit_log():
+    """Journal d'audit partagé par toutes les sessions (écriture en arrière-plan)"""
+    return AuditLog()
+
+@st.cache_resource
+def get_model_versions():
+    """Version de chaque modèle servi, calculée une fois comme le chargement des modèles"""
+    versions = {name: artifact_version(model_path(name))
+                for name in [*MODEL_NAMES, *COMPACT_MODELS] if os.path.exists(model_path(name))}
+    versions['Ensemble'] = fingerprint(versions)[:12]
+    return versions
+
+@st.cache_resource
+def get_drift_monitor():
+    """Moniteur de dérive partagé par toutes les sessions (None sans référence)"""
+    return load_monitor()
+
+@st.cache_resource
+def get_batch_job_manager():
+    """Gestionnaire de travaux partagé par toutes les sessions (survit aux reruns)"""
+    return BatchJobManager(monitor=get_drift_monitor(), audit_log=get_audit_log())
+
+@st.fragment(run_every=1)
+def show_batch_job(job_id):
+    """Affiche la progression d'un travail par lot, rafraîchie chaque seconde"""
+    job = get_batch_job_manager().status(job_id)
+    if job is None:
+        st.info("Ce travail n'est plus disponible. Veuillez téléverser à nouveau le fichier.")
+        return
+    
+    st.progress(job['progress'], text=f"Travail {job_id} : {job['state']}")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Patients traités", f"{job['rows_done']} / {job['rows_total']}")
+    col2.metric("Débit", f"{job['throughput']:.0f} patients/s")
+    col3.metric("Lignes rejetées", job['rows_rejected'])
+    
+    if job['state'] == FAILED:
+        st.error(f"Le travail a échoué : {job['error']}")
+    elif job['state'] == DONE:
+        st.success("Analyse terminée.")
+        if job['rejections']:
+            st.warning("Certaines lignes n'ont pas été analysées : leur motif figure dans la colonne « motif de rejet ».")
+            st.dataframe(pd.Series(job['rejections'], name='Lignes').rename_axis('Motif de rejet'))
+        st.download_button(
+            "Télécharger les résultats",
+            job['result'].to_csv(index=False).encode('utf-8'),
+            file_name=f"predictions_{job_id}.csv",
+            mime="text/csv"
+        )
+
+@st.cache_data
+def load_importance(model_name, mtime):
+    """Importance calculée à l'entraînement, relue seulement si le fichier change"""
+    return load_feature_importance(model_name)
+
+@st.cache_data
+def load_stats(file_path, mtime):
+    """Statistiques calculées en une passe, recalculées seulement si le fichier change"""
+    return compute_stats(file_path)
+
 # Navigation
 page = st.sidebar.radio(
     "Navigation",
@@ -351,34 +445,79 @@ elif page == "Prédiction":
     
     st.markdown("</div>", unsafe_allow_html=True)
     
+    # Choix du modèle de prédiction
+    model_choice = st.selectbox(
+        "Modèle de prédiction",
+        ["Random Forest", "XGBoost", *get_compact_models(), "Ensemble (tous les modèles)"]
+    )
+    
     # Espace pour le bouton
     st.markdown("<br>", unsafe_allow_html=True)
     
     # Bouton de prédiction avec style
     if st.button("Obtenir la Prédiction", key="prediction_button"):
         with st.spinner("Analyse en cours..."):
+            ensemble_scores = None
+            decision_threshold = 0.5
+            explanation = None
+            explainer = None
             try:
-                # Chargement du modèle
-                model = joblib.load('models/random_forest_model.joblib')
-                
                 # Préparation des données
-                input_data = pd.DataFrame({
-                    'age': [age],
-                    'sex': [1 if sex == "Homme" else 0],
-                    'chest pain type': [chest_pain_mapping[chest_pain]],
-                    'resting bp s': [resting_bp],
-                    'cholesterol': [cholesterol],
-                    'fasting blood sugar': [1 if fasting_bs == "> 120 mg/dl" else 0],
-                    'resting ecg': [ecg_mapping[resting_ecg]],
-                    'max heart rate': [max_hr],
-                    'exercise angina': [1 if exercise_angina == "Oui" else 0],
-                    'oldpeak': [oldpeak],
-                    'ST slope': [st_slope_mapping[st_slope]]
-                })
+                patient = {
+                    'age': age,
+                    'sex': 1 if sex == "Homme" else 0,
+                    'chest pain type': chest_pain_mapping[chest_pain],
+                    'resting bp s': resting_bp,
+                    'cholesterol': cholesterol,
+                    'fasting blood sugar': 1 if fasting_bs == "> 120 mg/dl" else 0,
+                    'resting ecg': ecg_mapping[resting_ecg],
+                    'max heart rate': max_hr,
+                    'exercise angina': 1 if exercise_angina == "Oui" else 0,
+                    'oldpeak': oldpeak,
+                    'ST slope': st_slope_mapping[st_slope]
+                }
+                start = time.perf_counter()
+                input_data = pd.DataFrame([patient])
+                
+                # Suivi de la dérive des entrées (quelques microsecondes)
+                monitor = get_drift_monitor()
+                if monitor is not None:
+                    monitor.observe(patient)
                 
-                processed_data = preprocess_data(input_data, is_training=False)
-                prediction = model.predict(processed_data)[0]
-                probability = model.predict_proba(processed_data)[0][1]
+                if model_choice != "Ensemble (tous les modèles)":
+                    # Modèle en mode d'inférence float32
+                    served = get_compact_models() if model_choice in COMPACT_MODELS else get_served_models()
+                    model = served[model_choice]
+                    processed_data = preprocess_to_array(input_data, dtype=input_dtype(model_choice))
+                    prediction = model.predict(processed_data)[0]
+                    probability = model.predict_proba(processed_data)[0][1]
+                    # Probabilité calibrée et seuil choisi à l'entraînement
+                    operating_point = get_operating_point(model_choice)
+                    if operating_point is not None:
+                        calibrated, decision = apply_operating_point(operating_point, [probability])
+                        probability, prediction = calibrated[0], decision[0]
+                        decision_threshold = operating_point['threshold']
+                    latency_ms = (time.perf_counter() - start) * 1000
+                    # Contributions des variables, au même coût qu'une prédiction
+                    if model_choice in EXPLAINABLE_MODELS:
+                        explainer = get_explainer(model_choice, model=model)
+                        explanation = explainer.explain(processed_data)
+                else:
+                    # Tous les modèles avec un seul prétraitement, puis vote souple sur
+                    # les probabilités calibrées par le point de fonctionnement de chaque modèle
+                    served = get_served_models()
+                    ensemble_scores = score_ensemble(
+                        input_data, served,
+                        operating_points={name: get_operating_point(name) for name in served})
+                    prediction = ensemble_scores['predictions']['Ensemble'].iloc[0]
+                    probability = ensemble_scores['probabilities']['Ensemble'].iloc[0]
+                    decision_threshold = ensemble_scores['threshold']
+                    latency_ms = (time.perf_counter() - start) * 1000
+                
+                # Traçabilité : ajout au tampon du journal d'audit, écrit en arrière-plan
+                audit_model = "Ensemble" if ensemble_scores is not None else model_choice
+                get_audit_log().record(patient, audit_model, get_model_versions()[audit_model],
+                                       probability, prediction, latency_ms, threshold=decision_threshold)
             except Exception as e:
                 st.error(f"Une erreur est survenue : {str(e)}")
             
@@ -404,6 +543,43 @@ elif page == "Prédiction":
                     </div>
                 """, unsafe_allow_html=True)
             
+            st.caption(f"Seuil de décision : {decision_threshold*100:.1f}%")
+            
+            # Explication de la prédiction
+            if explanation is not None:
+                base_value, contributions = explanation
+                contributions = contributions.iloc[0]
+                contributions = contributions.reindex(contributions.abs().sort_values().index)
+                # Forêt : points de probabilité ; XGBoost : log-odds (valeurs de Shapley natives)
+                in_probability = explainer.unit == 'probabilité'
+                st.markdown("<h3 style='color: #ffffff; margin-top: 1.5rem;'>Pourquoi cette prédiction ?</h3>", unsafe_allow_html=True)
+                fig = px.bar(
+                    x=contributions.values * (100 if in_probability else 1),
+                    y=contributions.index,
+                    orientation='h',
+                    color=np.where(contributions.values > 0, "Augmente le risque", "Diminue le risque"),
+                    color_discrete_map={"Augmente le risque": "#dc3545", "Diminue le risque": "#28a745"},
+                    labels={'x': 'Contribution (points de probabilité)' if in_probability else 'Contribution (log-odds)',
+                            'y': '', 'color': ''}
+                )
+                st.plotly_chart(fig, use_container_width=True)
+                if in_probability:
+                    st.caption(f"Probabilité moyenne du modèle : {base_value*100:.1f}%. "
+                               "Les contributions s'ajoutent à cette valeur pour donner la probabilité avant calibration.")
+                else:
+                    st.caption(f"Score moyen du modèle : {base_value:.3f} log-odds. "
+                               "Les contributions s'ajoutent à ce score pour donner le score du patient avant calibration.")
+            
+            # Détail par modèle pour l'ensemble
+            if ensemble_scores is not None:
+                details = pd.DataFrame({
+                    'Probabilité (%)': ensemble_scores['probabilities'].iloc[0] * 100,
+                    'Prédiction': ensemble_scores['predictions'].iloc[0],
+                    'Temps (ms)': pd.Series(ensemble_scores['timings']) * 1000
+                }, index=ensemble_scores['predictions'].columns)
+                st.markdown("<h3 style='color: #ffffff; margin-top: 1.5rem;'>Détail par Modèle</h3>", unsafe_allow_html=True)
+                st.dataframe(details.style.format({'Probabilité (%)': '{:.2f}', 'Temps (ms)': '{:.2f}'}, na_rep='-'))
+            
             # Recommandations avec style
             st.markdown("<h3 style='color: #ffffff; margin-top: 1.5rem;'>Recommandations Personnalisées</h3>", unsafe_allow_html=True)
             
@@ -432,6 +608,27 @@ elif page == "Prédiction":
             
             st.markdown("</div>", unsafe_allow_html=True)
 
+    
+    # Prédiction par lot à partir d'un fichier
+    st.markdown("---")
+    st.markdown("<h3 style='color: #3498db; margin-bottom: 1rem;'>Prédiction par Lot</h3>", unsafe_allow_html=True)
+    uploaded_file = st.file_uploader(
+        "Fichier CSV de patients (mêmes colonnes que data/data.csv)",
+        type="csv"
+    )
+    if uploaded_file is not None and st.button("Analyser le fichier", key="batch_button"):
+        try:
+            job_id = get_batch_job_manager().submit(read_patients_file(uploaded_file))
+            st.session_state.batch_job_id = job_id
+            # Le job id dans l'URL permet de retrouver le travail après un rechargement
+            st.query_params['job'] = job_id
+        except Exception as e:
+            st.error(f"Impossible de lire le fichier : {str(e)}")
+    
+    job_id = st.session_state.get('batch_job_id', st.query_params.get('job'))
+    if job_id:
+        show_batch_job(job_id)
+
 elif page == "Visualisation des Données":
     st.header("Visualisation des Données")
     
@@ -442,12 +639,13 @@ elif page == "Visualisation des Données":
         # Sélection du type de visualisation
         viz_type = st.selectbox(
             "Type de Visualisation",
-            ["Matrice de Corrélation", "Distribution des Variables", "Importance des Caractéristiques"]
+            ["Matrice de Corrélation", "Distribution des Variables", "Importance des Caractéristiques",
+             "Surveillance de la Dérive"]
         )
         
         if viz_type == "Matrice de Corrélation":
             st.subheader("Matrice de Corrélation")
-            fig = px.imshow(df.corr(), 
+            fig = px.imshow(load_stats('data/data.csv', os.path.getmtime('data/data.csv')).corr(), 
                           title="Matrice de Corrélation entre les Variables",
                           color_continuous_scale='RdBu')
             st.plotly_chart(fig, use_container_width=True)
@@ -460,22 +658,57 @@ elif page == "Visualisation des Données":
                              title=f"Distribution de {selected_var} par Classe")
             st.plotly_chart(fig, use_container_width=True)
         
+        elif viz_type == "Surveillance de la Dérive":
+            st.subheader("Surveillance de la Dérive")
+            monitor = get_drift_monitor()
+            if monitor is None:
+                st.warning("Veuillez d'abord entraîner le modèle pour calculer la distribution de référence.")
+            elif monitor.n_observed == 0:
+                st.info("Aucune prédiction n'a encore été enregistrée.")
+            else:
+                # Comparaison des patients soumis aux données d'entraînement
+                report = monitor.report()
+                st.metric("Patients observés", monitor.n_observed)
+                st.dataframe(report.style.format({'PSI': '{:.3f}', 'KS': '{:.3f}'}))
+                selected_var = st.selectbox("Sélectionnez une Variable", monitor.columns)
+                histograms = monitor.histograms(selected_var).reset_index(names='Intervalle')
+                fig = px.bar(histograms.melt(id_vars='Intervalle', var_name='Population', value_name='Proportion'),
+                           x='Intervalle',
+                           y='Proportion',
+                           color='Population',
+                           barmode='group',
+                           title=f"Distribution de {selected_var} : production et entraînement")
+                st.plotly_chart(fig, use_container_width=True)
+        
         else:
             st.subheader("Importance des Caractéristiques")
-            try:
-                model = joblib.load('models/random_forest_model.joblib')
-                feature_importance = pd.DataFrame({
-                    'Feature': df.columns[:-1],
-                    'Importance': model.feature_importances_
-                }).sort_values('Importance', ascending=False)
+            available = [name for name in MODEL_NAMES if os.path.exists(importance_path(name))]
+            if not available:
+                st.warning("Veuillez d'abord entraîner le modèle pour voir l'importance des caractéristiques.")
+            else:
+                model_name = st.selectbox(
+                    "Modèle", available,
+                    index=available.index("Random Forest") if "Random Forest" in available else 0
+                )
+                importance = load_importance(model_name, os.path.getmtime(importance_path(model_name))).reset_index()
                 
-                fig = px.bar(feature_importance, 
-                           x='Feature', 
-                           y='Importance',
-                           title="Importance des Caractéristiques dans la Prédiction")
+                # Importance par permutation sur le jeu de test (baisse d'accuracy)
+                fig = px.bar(importance.sort_values('Permutation'),
+                           x='Permutation',
+                           y='Variable',
+                           error_x='Permutation (écart-type)',
+                           orientation='h',
+                           title="Baisse d'accuracy quand la variable est permutée (jeu de test)")
                 st.plotly_chart(fig, use_container_width=True)
-            except:
-                st.warning("Veuillez d'abord entraîner le modèle pour voir l'importance des caractéristiques.")
+                
+                # Importance par impureté (modèles à base d'arbres)
+                if 'Impureté' in importance.columns:
+                    fig = px.bar(importance.sort_values('Impureté'),
+                               x='Impureté',
+                               y='Variable',
+                               orientation='h',
+                               title="Importance par diminution d'impureté")
+                    st.plotly_chart(fig, use_container_width=True)
     
     except FileNotFoundError:
         st.error("Fichier de données non trouvé. Veuillez d'abord exécuter le script de prétraitement.")
@@ -489,6 +722,7 @@ else:  # À Propos
     ### Technologies Utilisées
     - Python
     - Scikit-learn
+    - XGBoost
     - Streamlit
     - Pandas
     - NumPy
@@ -500,6 +734,7 @@ else:  # À Propos
     - KNN
     - Arbre de Décision
     - Random Forest
+    - XGBoost
     - KMeans
     - PCA
     
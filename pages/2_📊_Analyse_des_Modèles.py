@@ -8,76 +8,214 @@ import plotly.figure_factory as ff
 import joblib
 from sklearn.metrics import confusion_matrix, roc_curve, auc
 import os
+import time
+from src.streaming_stats import compute_stats, compute_grouped_stats, grouped_describe
+from src.diagnostics import DIAGNOSTICS_PATH, load_diagnostics
+from src.boosting import COMPARISON_PATH
+from src.interaction_timing import InteractionTimings
+from src.evaluation_export import latest_evaluation_path, load_evaluation, evaluation_table
 
+page_start = time.perf_counter()
 st.set_page_config(page_title="Analyse des Données et des Modèles", page_icon="📊", layout="wide")
 
-# Chargement des données et des résultats
-try:
-    results_df = pd.read_csv('reports/model_results.csv')
-    df = pd.read_csv('data/data.csv')
+DATA_PATH = 'data/data.csv'
+RESULTS_PATH = 'reports/model_results.csv'
+
+@st.cache_data
+def load_dataset(file_path, mtime):
+    """Données brutes, relues seulement si le fichier change"""
+    return pd.read_csv(file_path)
+
+@st.cache_data
+def load_results(mtime):
+    """Résultats des modèles, relus seulement après un nouvel entraînement"""
+    return pd.read_csv(RESULTS_PATH)
+
+@st.cache_data
+def load_stats(file_path, mtime):
+    """Statistiques calculées en une passe, recalculées seulement si le fichier change"""
+    return compute_stats(file_path), compute_grouped_stats(file_path, by='target')
+
+@st.cache_data
+def load_correlations(file_path, mtime):
+    """Matrice de corrélation, calculée une fois par version du fichier"""
+    data_stats, _ = load_stats(file_path, mtime)
+    return data_stats.corr()
+
+@st.cache_data
+def variable_figures(file_path, mtime, selected_var):
+    """Box plot et histogramme d'une variable par classe, construits une fois par variable"""
+    df = load_dataset(file_path, mtime)
+    fig_box = px.box(df, x='target', y=selected_var, 
+                     title=f"Distribution de {selected_var} par classe",
+                     labels={'target': 'Maladie Cardiaque (0: Non, 1: Oui)', 
+                             'y': selected_var})
+    fig_hist = px.histogram(df, x=selected_var, color='target',
+                            title=f"Distribution de {selected_var} selon la présence de maladie",
+                            labels={'target': 'Maladie Cardiaque',
+                                    'count': 'Nombre de cas'},
+                            color_discrete_map={0: 'blue', 1: 'red'},
+                            barmode='overlay')
+    fig_hist.update_layout(showlegend=True)
+    return fig_box, fig_hist
+
+@st.cache_data
+def load_diagnostics_table(mtime):
+    """Diagnostics calculés à l'entraînement, relus seulement si le fichier change"""
+    return load_diagnostics()
+
+@st.cache_data
+def load_evaluation_run(path, mtime):
+    """Données d'évaluation d'une exécution de l'entraînement, lues une seule fois par fichier"""
+    return load_evaluation(path)
+
+@st.cache_data
+def has_evaluation(path, mtime, model_name):
+    """Indique si l'exécution contient l'évaluation du modèle"""
+    return model_name in set(load_evaluation_run(path, mtime)['Modèle'])
+
+@st.cache_data
+def evaluation_figures(path, mtime, model_name):
+    """Figures interactives et chiffres commentés d'un modèle, construits une fois par exécution"""
+    evaluation = load_evaluation_run(path, mtime)
+    table = lambda name: evaluation_table(evaluation, model_name, name)
+    metrics = table('métriques').set_index('Nom')['Valeur']
+    figures, facts = {}, {'metrics': metrics}
     
-    # Création d'onglets pour séparer l'analyse des données et l'analyse des modèles
-    tab1, tab2 = st.tabs(["📈 Analyse des Relations", "🎯 Performance des Modèles"])
+    confusion = table('confusion')
+    cm = confusion.pivot(index='Classe réelle', columns='Classe prédite', values='Effectif').astype(int)
+    figures['confusion'] = px.imshow(cm.to_numpy(), text_auto=True, color_continuous_scale='Blues',
+                                     x=['Sain', 'Malade'], y=['Sain', 'Malade'],
+                                     labels={'x': 'Prédictions', 'y': 'Valeurs Réelles', 'color': 'Effectif'})
+    (tn, fp), (fn, tp) = cm.to_numpy()
+    facts.update(tn=tn, fp=fp, fn=fn, tp=tp, prevalence=(fn + tp) / (tn + fp + fn + tp))
     
-    with tab1:
-        st.title("Analyse des Relations avec la Variable Cible")
-        
-        # Section 1: Distribution de la Variable Cible
-        st.header("1. Distribution de la Variable Cible")
-        col1, col2 = st.columns(2)
+    roc = table('roc')
+    if len(roc):
+        figures['roc'] = px.line(roc, x='Taux de faux positifs', y='Taux de vrais positifs',
+                                 title=f"AUC = {metrics['AUC']:.3f}")
+        figures['roc'].add_shape(type='line', x0=0, y0=0, x1=1, y1=1, line={'dash': 'dash', 'color': 'gray'})
         
-        with col1:
-            target_counts = df['target'].value_counts()
-            st.metric("Nombre de cas sans maladie", target_counts[0])
-            st.metric("Nombre de cas avec maladie", target_counts[1])
-        
-        with col2:
-            target_dist = df['target'].value_counts(normalize=True)
-            fig_target = px.pie(values=target_dist.values, 
-                              names=["Pas de maladie", "Maladie cardiaque"],
-                              title="Distribution des Classes")
-            st.plotly_chart(fig_target)
-        
-        # Section 2: Corrélations avec la Variable Cible
-        st.header("2. Corrélations avec la Variable Cible")
-        corr_matrix = df.corr()
-        target_corr = corr_matrix['target'].sort_values(ascending=False)
-        fig_corr = px.bar(x=target_corr.index, y=target_corr.values,
-                         title="Force de la Relation entre Chaque Variable et la Maladie Cardiaque",
-                         labels={'x': 'Variables', 'y': 'Coefficient de Corrélation'})
-        fig_corr.update_layout(showlegend=False)
-        st.plotly_chart(fig_corr, use_container_width=True)
+        pr = table('précision-rappel')
+        figures['pr'] = px.line(pr, x='Rappel', y='Précision')
+        figures['pr'].add_hline(y=facts['prevalence'], line_dash='dash', line_color='gray',
+                                annotation_text="Proportion de malades")
+        high_recall = pr[pr['Rappel'] >= 0.9]
+        facts['precision_at_recall'] = high_recall['Précision'].max() if len(high_recall) else np.nan
+    
+    learning = table('apprentissage')
+    long_learning = pd.concat([
+        pd.DataFrame({'Taille': learning['Taille'], 'Score': learning[f'Score {split}'],
+                      'Écart': learning[f'Écart {split}'], 'Série': split})
+        for split in ['entraînement', 'validation']
+    ])
+    figures['learning'] = px.line(long_learning, x='Taille', y='Score', color='Série', error_y='Écart',
+                                  markers=True, labels={'Taille': "Taille de l'ensemble d'entraînement"})
+    facts['learning'] = learning.iloc[[0, -1]].reset_index(drop=True)
+    
+    importance = table('importance').sort_values('Valeur')
+    figures['importance'] = px.bar(importance, x='Valeur', y='Nom', error_x='Écart', orientation='h',
+                                   labels={'Valeur': "Baisse d'accuracy (permutation)", 'Nom': 'Variable'})
+    facts['top_features'] = importance['Nom'].iloc[::-1].head(3).astype(str).tolist()
+    return figures, facts
+
+def show_evaluation(path, model_name):
+    """Métriques, courbes et commentaires d'un modèle, tous lus dans l'export de l'entraînement"""
+    figures, facts = evaluation_figures(path, os.path.getmtime(path), model_name)
+    metrics = facts['metrics']
+    
+    # Métriques principales
+    st.subheader("Métriques de Performance")
+    columns = st.columns(4)
+    for column, metric in zip(columns, ['Accuracy', 'Precision', 'Recall', 'AUC']):
+        if not np.isnan(metrics.get(metric, np.nan)):
+            column.metric(metric, f"{metrics[metric]:.3f}")
+    st.markdown(f"""
+**Interprétation des métriques** :
+- Le modèle prédit correctement {metrics['Accuracy']:.1%} des cas (accuracy).
+- Parmi les cas prédits comme "maladie", {metrics['Precision']:.1%} sont réellement malades (précision).
+- Il détecte {metrics['Recall']:.1%} des vrais cas de maladie (recall).
+""")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("Matrice de Confusion")
+        st.plotly_chart(figures['confusion'], use_container_width=True)
+        st.markdown(f"""
+**Interprétation** :
+- {facts['tn']} vrais négatifs (prédits sains, réellement sains)
+- {facts['tp']} vrais positifs (prédits malades, réellement malades)
+- {facts['fp']} faux positifs (prédits malades, mais réellement sains)
+- {facts['fn']} faux négatifs (prédits sains, mais réellement malades), soit {facts['fn'] / (facts['fn'] + facts['tp']):.1%} des malades
+""")
         
-        # Interprétation spécifique
-        st.subheader("Interprétation spécifique des corrélations avec la variable cible")
-        st.markdown("""
-- La variable la plus corrélée avec la maladie est `ST slope`, suivie de `chest pain type`, `exercise angina` et `oldpeak`.
-- Les autres variables (`sex`, `age`, `fasting blood sugar`, etc.) ont une corrélation beaucoup plus faible avec la maladie.
-- Cela signifie que les variables liées à l'électrocardiogramme et à la douleur thoracique sont les plus informatives pour prédire la maladie cardiaque dans cette base.
-- Les variables comme le cholestérol ou la fréquence cardiaque maximale, bien que médicalement pertinentes, n'apportent pas ici une forte capacité de discrimination dans ce jeu de données.
+        if 'roc' in figures:
+            st.subheader("Courbe ROC")
+            st.plotly_chart(figures['roc'], use_container_width=True)
+            st.markdown(f"""
+**Interprétation** :
+- L'aire sous la courbe vaut {metrics['AUC']:.3f} (0.5 pour un tirage au hasard, 1 pour une séparation parfaite).
+""")
+    
+    with col2:
+        if 'pr' in figures:
+            st.subheader("Courbe Précision-Rappel")
+            st.plotly_chart(figures['pr'], use_container_width=True)
+            if not np.isnan(facts['precision_at_recall']):
+                st.markdown(f"""
+**Interprétation** :
+- Pour détecter au moins 90 % des malades, la meilleure précision atteinte est de {facts['precision_at_recall']:.1%}.
+- Un classement au hasard aurait une précision égale à la proportion de malades ({facts['prevalence']:.1%}).
 """)
         
-        # Section 3: Analyse Détaillée des Relations
-        st.header("3. Analyse Détaillée des Relations")
+        st.subheader("Courbe d'Apprentissage")
+        st.plotly_chart(figures['learning'], use_container_width=True)
+        first, last = facts['learning'].iloc[0], facts['learning'].iloc[1]
+        st.markdown(f"""
+**Interprétation** :
+- Avec {last['Taille']:.0f} exemples, le score d'entraînement est de {last['Score entraînement']:.3f} et le score de validation de {last['Score validation']:.3f} (écart {last['Score entraînement'] - last['Score validation']:.3f}).
+- Le score de validation varie de {last['Score validation'] - first['Score validation']:+.3f} entre {first['Taille']:.0f} et {last['Taille']:.0f} exemples d'entraînement.
+""")
+    
+    # Importance des variables (permutation sur le jeu de test)
+    st.header("Importance des Caractéristiques")
+    st.plotly_chart(figures['importance'], use_container_width=True)
+    st.markdown(f"""
+**Interprétation** :
+- Les variables dont la permutation dégrade le plus l'accuracy sont {', '.join(f'`{name}`' for name in facts['top_features'])}.
+""")
+
+# Temps serveur de chaque interaction de la session
+timings = st.session_state.setdefault('interaction_timings', InteractionTimings())
+
+def show_server_time(section):
+    """Affiche le temps serveur de la dernière exécution d'une section"""
+    st.caption(f"⏱️ Temps serveur : {timings.last(section):.1f} ms")
+
+@st.fragment
+def show_variable_analysis():
+    """Relation d'une variable avec la cible : seul ce bloc est réexécuté quand la variable change"""
+    with timings.measure("Analyse · Variable"):
+        mtime = os.path.getmtime(DATA_PATH)
+        df = load_dataset(DATA_PATH, mtime)
+        _, class_stats = load_stats(DATA_PATH, mtime)
         
         # Sélection de variable
         numeric_cols = df.select_dtypes(include=['float64', 'int64']).columns
         selected_var = st.selectbox("Sélectionnez une variable à analyser", 
                                   [col for col in numeric_cols if col != 'target'])
         
+        fig_box, fig_hist = variable_figures(DATA_PATH, mtime, selected_var)
         col1, col2 = st.columns(2)
         
         with col1:
             # Box plot
-            fig_box = px.box(df, x='target', y=selected_var, 
-                           title=f"Distribution de {selected_var} par classe",
-                           labels={'target': 'Maladie Cardiaque (0: Non, 1: Oui)', 
-                                 'y': selected_var})
             st.plotly_chart(fig_box)
             
             # Statistiques descriptives
             st.subheader("Statistiques Descriptives")
-            stats_df = df.groupby('target')[selected_var].describe()
+            stats_df = grouped_describe(class_stats, selected_var)
             stats_df.index = ['Sans Maladie', 'Avec Maladie']
             st.dataframe(stats_df)
             
@@ -96,13 +234,6 @@ try:
         
         with col2:
             # Histogramme
-            fig_hist = px.histogram(df, x=selected_var, color='target',
-                                  title=f"Distribution de {selected_var} selon la présence de maladie",
-                                  labels={'target': 'Maladie Cardiaque',
-                                        'count': 'Nombre de cas'},
-                                  color_discrete_map={0: 'blue', 1: 'red'},
-                                  barmode='overlay')
-            fig_hist.update_layout(showlegend=True)
             st.plotly_chart(fig_hist)
             
             # Test statistique
@@ -110,135 +241,168 @@ try:
             group1 = df[df['target'] == 1][selected_var]
             stat, p_value = np.mean(group0), np.mean(group1)
             st.metric("Différence des moyennes", f"{stat - p_value:.2f}")
-    
-    with tab2:
-        st.title("Analyse des Performances des Modèles")
-        
-        # Section 1: Vue d'ensemble des performances
-        st.header("1. Comparaison Globale des Modèles")
+    show_server_time("Analyse · Variable")
+
+@st.fragment
+def show_model_comparison():
+    """Comparaison globale des modèles sur les métriques choisies"""
+    with timings.measure("Analyse · Comparaison"):
+        results_df = load_results(os.path.getmtime(RESULTS_PATH))
         metrics = st.multiselect(
             "Sélectionnez les métriques à comparer",
-            ['Accuracy', 'Precision', 'Recall'],
+            [metric for metric in ['Accuracy', 'Precision', 'Recall', 'F1-Score', 'AUC'] if metric in results_df],
             default=['Accuracy']
         )
         
         if metrics:
-            fig = px.bar(results_df, 
-                        x='Modèle', 
-                        y=metrics,
+            # Barres d'erreur : intervalles de confiance à 95 % (bootstrap sur le jeu de test)
+            long_df = results_df.melt(id_vars='Modèle', value_vars=metrics, var_name='Métrique', value_name='Score')
+            has_intervals = all(f'{metric} IC bas' in results_df for metric in metrics)
+            if has_intervals:
+                indexed = results_df.set_index('Modèle')
+                low = [indexed.loc[model, f'{metric} IC bas'] for model, metric in zip(long_df['Modèle'], long_df['Métrique'])]
+                high = [indexed.loc[model, f'{metric} IC haut'] for model, metric in zip(long_df['Modèle'], long_df['Métrique'])]
+                long_df['Erreur haute'] = np.array(high) - long_df['Score']
+                long_df['Erreur basse'] = long_df['Score'] - np.array(low)
+            fig = px.bar(long_df,
+                        x='Modèle',
+                        y='Score',
+                        color='Métrique',
                         barmode='group',
+                        error_y='Erreur haute' if has_intervals else None,
+                        error_y_minus='Erreur basse' if has_intervals else None,
                         title="Comparaison des Performances des Modèles")
             st.plotly_chart(fig, use_container_width=True)
-        
-        # Section 2: Analyse détaillée par modèle
-        st.header("2. Analyse Détaillée par Modèle")
+            
+            if 'Écart au meilleur IC bas' in results_df:
+                st.caption("Barres d'erreur : intervalle de confiance à 95 % (bootstrap). "
+                           "Un modèle dont l'écart d'accuracy au meilleur contient 0 n'en est pas distinguable.")
+                gaps = results_df.set_index('Modèle')[['Accuracy', 'Écart au meilleur IC bas', 'Écart au meilleur IC haut']]
+                st.dataframe(gaps.style.format('{:.3f}'))
+    show_server_time("Analyse · Comparaison")
+
+@st.fragment
+def show_model_details():
+    """Analyse détaillée d'un modèle : seul ce bloc est réexécuté quand le modèle change"""
+    with timings.measure("Analyse · Détail du modèle"):
+        results_df = load_results(os.path.getmtime(RESULTS_PATH))
         model_choice = st.selectbox(
             "Sélectionnez un modèle à analyser",
             results_df['Modèle'].tolist()
         )
         
         if model_choice:
-            model_name = model_choice.lower().replace(" ", "_")
-            
-            # Métriques principales
-            st.subheader("Métriques de Performance")
-            model_metrics = results_df[results_df['Modèle'] == model_choice].iloc[0]
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.metric("Accuracy", f"{model_metrics['Accuracy']:.3f}")
-                st.metric("Precision", f"{model_metrics['Precision']:.3f}")
-            
-            with col2:
-                st.metric("Recall", f"{model_metrics['Recall']:.3f}")
-            
-            # Interprétation des métriques pour la régression logistique
-            if model_choice == "Régression Logistique":
-                st.markdown("""
-**Interprétation des métriques** :
-- Le modèle prédit correctement 87 % des cas (accuracy).
-- Parmi les cas prédits comme "maladie", 86,8 % sont réellement malades (précision).
-- Il détecte 90,1 % des vrais cas de maladie (recall).
-""")
-            
-            # Interprétation des métriques pour la random forest
-            if model_choice == "Random Forest":
-                st.markdown("""
-**Interprétation des métriques** :
-- Le modèle prédit correctement 95 % des cas (accuracy), ce qui est excellent.
-- Parmi les cas prédits comme "maladie", 94,1 % sont réellement malades (précision).
-- Il détecte 96,9 % des vrais cas de maladie (recall).
-""")
-            
-            # Visualisations
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                confusion_matrix_path = f'confusion_matrix_{model_name}.png'
-                if os.path.exists(confusion_matrix_path):
-                    st.subheader("Matrice de Confusion")
-                    st.image(confusion_matrix_path)
-                    # Interprétation matrice de confusion
-                    if model_choice == "Random Forest":
-                        st.markdown("""
-**Interprétation** :
-- 99 vrais négatifs (prédits sains, réellement sains)
-- 127 vrais positifs (prédits malades, réellement malades)
-- 8 faux positifs (prédits malades, mais réellement sains)
-- 4 faux négatifs (prédits sains, mais réellement malades)
-- Le modèle fait très peu d'erreurs, surtout sur les cas de maladie (seulement 4 faux négatifs).
-""")
-                
-                roc_curve_path = f'roc_curve_{model_name}.png'
-                if os.path.exists(roc_curve_path):
-                    st.subheader("Courbe ROC")
-                    st.image(roc_curve_path)
-                    # Interprétation courbe ROC
-                    if model_choice == "Random Forest":
-                        st.markdown("""
-**Interprétation** :
-- L'aire sous la courbe (AUC = 0.97) est excellente.
-- Le modèle distingue très bien les malades des non malades.
-""")
-            
-            with col2:
-                pr_curve_path = f'precision_recall_{model_name}.png'
-                if os.path.exists(pr_curve_path):
-                    st.subheader("Courbe Précision-Rappel")
-                    st.image(pr_curve_path)
-                    # Interprétation courbe précision-rappel
-                    if model_choice == "Random Forest":
-                        st.markdown("""
-**Interprétation** :
-- La courbe reste très élevée, ce qui montre que le modèle garde une excellente précision même quand il cherche à détecter un maximum de malades.
-- Le modèle est performant pour minimiser à la fois les faux positifs et les faux négatifs.
-""")
-                
-                learning_curve_path = f'learning_curve_{model_name}.png'
-                if os.path.exists(learning_curve_path):
-                    st.subheader("Courbe d'Apprentissage")
-                    st.image(learning_curve_path)
-                    # Interprétation courbe d'apprentissage
-                    if model_choice == "Random Forest":
-                        st.markdown("""
-**Interprétation** :
-- Les scores d'entraînement et de validation sont très proches, ce qui montre que le modèle n'est pas en sur-apprentissage.
-- Le score de validation augmente avec la taille de l'échantillon, ce qui indique que le modèle bénéficie de plus de données.
-""")
+            evaluation_path = latest_evaluation_path()
+            if evaluation_path is not None and has_evaluation(evaluation_path, os.path.getmtime(evaluation_path), model_choice):
+                show_evaluation(evaluation_path, model_choice)
+            else:
+                st.info("Les données d'évaluation de ce modèle n'ont pas encore été exportées : "
+                        "relancez l'entraînement (python -m src.model_training).")
             
-            # Importance des caractéristiques pour les modèles appropriés
-            if model_choice in ['Arbre de Décision', 'Random Forest']:
-                feature_importance_path = f'feature_importance_{model_name}.png'
-                if os.path.exists(feature_importance_path):
-                    st.header("Importance des Caractéristiques")
-                    st.image(feature_importance_path)
-                    # Interprétation importance des caractéristiques
-                    if model_choice == "Random Forest":
-                        st.markdown("""
-**Interprétation** :
-- Les variables les plus importantes pour la prédiction sont `ST slope`, `oldpeak`, `max heart rate`, `chest pain type`, et `cholesterol`.
-- Cela confirme l'importance des variables liées à l'électrocardiogramme et à la douleur thoracique dans la prédiction de la maladie cardiaque.
+            # Robustesse : sensibilité aux variables et performances par sous-groupe
+            if os.path.exists(DIAGNOSTICS_PATH):
+                diagnostics = load_diagnostics_table(os.path.getmtime(DIAGNOSTICS_PATH))
+                model_diagnostics = diagnostics[diagnostics['Modèle'] == model_choice]
+                if len(model_diagnostics):
+                    st.header("Robustesse du Modèle")
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        st.subheader("Sensibilité aux Variables")
+                        sensitivity = model_diagnostics[model_diagnostics['Analyse'] == 'Permutation']
+                        fig = px.bar(sensitivity.sort_values('Prédictions modifiées'),
+                                     x='Prédictions modifiées',
+                                     y='Groupe',
+                                     orientation='h',
+                                     hover_data=['Baisse d\'accuracy', 'Écart de probabilité'],
+                                     labels={'Groupe': 'Variable permutée'},
+                                     title="Part des prédictions modifiées quand la variable est permutée")
+                        st.plotly_chart(fig, use_container_width=True)
+                    
+                    with col2:
+                        st.subheader("Performances par Sous-groupe")
+                        subgroups = model_diagnostics[model_diagnostics['Analyse'] == 'Sous-groupe']
+                        st.dataframe(
+                            subgroups[['Groupe', 'Effectif', 'Accuracy', 'Rappel', 'Taux de positifs prédits']]
+                            .set_index('Groupe')
+                            .style.format({'Accuracy': '{:.3f}', 'Rappel': '{:.3f}', 'Taux de positifs prédits': '{:.3f}'})
+                        )
+    show_server_time("Analyse · Détail du modèle")
+
+# Chargement des données et des résultats
+try:
+    # Les résultats sont lus par les fragments ; leur absence est signalée dès le premier affichage
+    load_results(os.path.getmtime(RESULTS_PATH))
+    mtime = os.path.getmtime(DATA_PATH)
+    df = load_dataset(DATA_PATH, mtime)
+    data_stats, class_stats = load_stats(DATA_PATH, mtime)
+    
+    # Création d'onglets pour séparer l'analyse des données et l'analyse des modèles
+    tab1, tab2 = st.tabs(["📈 Analyse des Relations", "🎯 Performance des Modèles"])
+    
+    with tab1:
+        st.title("Analyse des Relations avec la Variable Cible")
+        
+        # Section 1: Distribution de la Variable Cible
+        st.header("1. Distribution de la Variable Cible")
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            target_counts = df['target'].value_counts()
+            st.metric("Nombre de cas sans maladie", target_counts[0])
+            st.metric("Nombre de cas avec maladie", target_counts[1])
+        
+        with col2:
+            target_dist = df['target'].value_counts(normalize=True)
+            fig_target = px.pie(values=target_dist.values, 
+                              names=["Pas de maladie", "Maladie cardiaque"],
+                              title="Distribution des Classes")
+            st.plotly_chart(fig_target)
+        
+        # Section 2: Corrélations avec la Variable Cible
+        st.header("2. Corrélations avec la Variable Cible")
+        corr_matrix = load_correlations(DATA_PATH, mtime)
+        target_corr = corr_matrix['target'].sort_values(ascending=False)
+        fig_corr = px.bar(x=target_corr.index, y=target_corr.values,
+                         title="Force de la Relation entre Chaque Variable et la Maladie Cardiaque",
+                         labels={'x': 'Variables', 'y': 'Coefficient de Corrélation'})
+        fig_corr.update_layout(showlegend=False)
+        st.plotly_chart(fig_corr, use_container_width=True)
+        
+        # Interprétation spécifique
+        st.subheader("Interprétation spécifique des corrélations avec la variable cible")
+        st.markdown("""
+- La variable la plus corrélée avec la maladie est `ST slope`, suivie de `chest pain type`, `exercise angina` et `oldpeak`.
+- Les autres variables (`sex`, `age`, `fasting blood sugar`, etc.) ont une corrélation beaucoup plus faible avec la maladie.
+- Cela signifie que les variables liées à l'électrocardiogramme et à la douleur thoracique sont les plus informatives pour prédire la maladie cardiaque dans cette base.
+- Les variables comme le cholestérol ou la fréquence cardiaque maximale, bien que médicalement pertinentes, n'apportent pas ici une forte capacité de discrimination dans ce jeu de données.
 """)
+        
+        # Section 3: Analyse Détaillée des Relations
+        st.header("3. Analyse Détaillée des Relations")
+        show_variable_analysis()
+    
+    with tab2:
+        st.title("Analyse des Performances des Modèles")
+        
+        # Section 1: Vue d'ensemble des performances
+        st.header("1. Comparaison Globale des Modèles")
+        show_model_comparison()
+        
+        # Coût du boosting par rapport à la forêt aléatoire
+        if os.path.exists(COMPARISON_PATH):
+            st.subheader("XGBoost contre Random Forest")
+            comparison = pd.read_csv(COMPARISON_PATH).set_index('Modèle')
+            st.dataframe(comparison.style.format('{:.3f}'))
+        
+        # Section 2: Analyse détaillée par modèle
+        st.header("2. Analyse Détaillée par Modèle")
+        show_model_details()
 
 except FileNotFoundError:
-    st.error("Les fichiers nécessaires ne sont pas disponibles. Veuillez d'abord exécuter l'entraînement des modèles.") 
\ No newline at end of file
+    st.error("Les fichiers nécessaires ne sont pas disponibles. Veuillez d'abord exécuter l'entraînement des modèles.")
+
+# Temps serveur des interactions de la session (page complète et fragments)
+timings.record("Analyse · page complète", time.perf_counter() - page_start)
+with st.sidebar.expander("⏱️ Temps serveur des interactions"):
+    st.dataframe(timings.summary().style.format({'Médiane (ms)': '{:.1f}', 'Dernière (ms)': '{:.1f}'}))
@@ -6,14 +6,148 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import seaborn as sns
 import matplotlib.pyplot as plt
+import os
+import time
+from src.streaming_stats import compute_stats, compute_grouped_stats, grouped_describe
+from src.interaction_timing import InteractionTimings
 
+page_start = time.perf_counter()
 st.set_page_config(page_title="Exploration des Données", page_icon="📊")
 
+DATA_PATH = 'data/data.csv'
+
+@st.cache_data
+def load_dataset(file_path, mtime):
+    """Données brutes, relues seulement si le fichier change"""
+    return pd.read_csv(file_path)
+
+@st.cache_data
+def load_stats(file_path, mtime):
+    """Statistiques calculées en une passe, recalculées seulement si le fichier change"""
+    return compute_stats(file_path), compute_grouped_stats(file_path, by='target')
+
+@st.cache_data
+def load_correlations(file_path, mtime):
+    """Matrice de corrélation, calculée une fois par version du fichier"""
+    data_stats, _ = load_stats(file_path, mtime)
+    return data_stats.corr()
+
+@st.cache_data
+def distribution_figure(file_path, mtime, variable, plot_type):
+    """Graphique de distribution d'une variable, construit une fois par combinaison de widgets"""
+    df = load_dataset(file_path, mtime)
+    if plot_type == "Histogramme":
+        return px.histogram(df, x=variable, color='target',
+                            title=f"Distribution de {variable} par Classe",
+                            marginal="box",
+                            nbins=50)
+    if plot_type == "Box Plot":
+        return px.box(df, x='target', y=variable,
+                      title=f"Box Plot de {variable} par Classe")
+    return px.violin(df, x='target', y=variable,
+                     title=f"Violin Plot de {variable} par Classe")
+
+@st.cache_data
+def scatter_figure(file_path, mtime, x_var, y_var):
+    """Nuage de points de deux variables et leur corrélation"""
+    df = load_dataset(file_path, mtime)
+    fig = px.scatter(df, x=x_var, y=y_var, color='target',
+                     title=f"Relation entre {x_var} et {y_var}",
+                     opacity=0.6)
+    return fig, df[x_var].corr(df[y_var])
+
+# Temps serveur de chaque interaction de la session
+timings = st.session_state.setdefault('interaction_timings', InteractionTimings())
+
+def show_server_time(section):
+    """Affiche le temps serveur de la dernière exécution d'une section"""
+    st.caption(f"⏱️ Temps serveur : {timings.last(section):.1f} ms")
+
+@st.fragment
+def show_distribution():
+    """Distribution d'une variable : seul ce bloc est réexécuté quand ses widgets changent"""
+    with timings.measure("Exploration · Distribution"):
+        mtime = os.path.getmtime(DATA_PATH)
+        df = load_dataset(DATA_PATH, mtime)
+        _, class_stats = load_stats(DATA_PATH, mtime)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            variable = st.selectbox(
+                "Sélectionnez une variable",
+                df.select_dtypes(include=['float64', 'int64']).columns
+            )
+        with col2:
+            plot_type = st.selectbox(
+                "Type de graphique",
+                ["Histogramme", "Box Plot", "Violin Plot"]
+            )
+        
+        fig = distribution_figure(DATA_PATH, mtime, variable, plot_type)
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Ajout des statistiques descriptives pour la variable sélectionnée
+        st.subheader(f"Statistiques pour {variable}")
+        st.dataframe(grouped_describe(class_stats, variable))
+        
+        # Interprétation spécifique de la variable sélectionnée
+        st.subheader("Interprétation spécifique de la variable sélectionnée")
+        if variable == "sex":
+            st.markdown("""
+- La majorité des individus sont des hommes (1), mais la maladie touche les deux sexes.
+- La proportion de cas de maladie semble similaire dans les deux groupes, mais il faudrait regarder les pourcentages pour conclure.
+""")
+        elif variable == "age":
+            st.markdown("""
+- La distribution de l'âge est similaire pour les deux classes.
+- Il n'y a pas de tranche d'âge où la maladie est nettement plus fréquente.
+""")
+        else:
+            st.markdown("""
+- Cette variable ne présente pas de différence flagrante entre les classes, mais peut contribuer à la prédiction en combinaison avec d'autres variables.
+""")
+    show_server_time("Exploration · Distribution")
+
+@st.fragment
+def show_bivariate():
+    """Analyse bivariée : seul ce bloc est réexécuté quand les variables changent"""
+    with timings.measure("Exploration · Bivariée"):
+        mtime = os.path.getmtime(DATA_PATH)
+        df = load_dataset(DATA_PATH, mtime)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            x_var = st.selectbox(
+                "Variable X",
+                df.select_dtypes(include=['float64', 'int64']).columns
+            )
+        with col2:
+            y_var = st.selectbox(
+                "Variable Y",
+                df.select_dtypes(include=['float64', 'int64']).columns
+            )
+        
+        fig, correlation = scatter_figure(DATA_PATH, mtime, x_var, y_var)
+        st.plotly_chart(fig, use_container_width=True)
+        
+        # Affichage de la corrélation
+        st.write(f"Corrélation entre {x_var} et {y_var} : {correlation:.3f}")
+        
+        # Interprétation spécifique de l'analyse bivariée
+        st.subheader("Interprétation spécifique de l'analyse bivariée")
+        st.markdown(f"""
+- Le nuage de points montre une grande dispersion, sans tendance linéaire claire.
+- Les deux classes sont mélangées, ce qui indique que la combinaison de {x_var} et {y_var} ne suffit pas à séparer les classes.
+""")
+    show_server_time("Exploration · Bivariée")
+
 st.title("Exploration et Analyse des Données")
 
 try:
-    # Chargement des données
-    df = pd.read_csv('data/data.csv')
+    # Chargement des données (mis en cache jusqu'à la modification du fichier)
+    mtime = os.path.getmtime(DATA_PATH)
+    df = load_dataset(DATA_PATH, mtime)
+    data_stats, class_stats = load_stats(DATA_PATH, mtime)
     
     # Affichage des informations générales
     st.sidebar.header("Informations sur la Base de Données")
@@ -34,7 +168,7 @@ try:
         st.dataframe(df.head())
         st.write(f"Nombre total d'observations : {len(df)}")
         st.write("Statistiques descriptives :")
-        st.dataframe(df.describe())
+        st.dataframe(data_stats.describe())
         
         # Ajout d'un histogramme de la distribution des classes
         st.subheader("Distribution des Classes")
@@ -51,7 +185,7 @@ La distribution des classes est équilibrée, ce qui est favorable pour l'appren
     
     elif viz_type == "Matrice de Corrélation":
         st.header("Matrice de Corrélation")
-        corr = df.corr()
+        corr = load_correlations(DATA_PATH, mtime)
         fig = px.imshow(corr, 
                        title="Matrice de Corrélation entre les Variables",
                        color_continuous_scale='RdBu',
@@ -69,84 +203,11 @@ La distribution des classes est équilibrée, ce qui est favorable pour l'appren
     
     elif viz_type == "Distribution des Variables":
         st.header("Distribution des Variables")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            variable = st.selectbox(
-                "Sélectionnez une variable",
-                df.select_dtypes(include=['float64', 'int64']).columns
-            )
-        with col2:
-            plot_type = st.selectbox(
-                "Type de graphique",
-                ["Histogramme", "Box Plot", "Violin Plot"]
-            )
-        
-        if plot_type == "Histogramme":
-            fig = px.histogram(df, x=variable, color='target',
-                             title=f"Distribution de {variable} par Classe",
-                             marginal="box",
-                             nbins=50)
-        elif plot_type == "Box Plot":
-            fig = px.box(df, x='target', y=variable,
-                        title=f"Box Plot de {variable} par Classe")
-        else:
-            fig = px.violin(df, x='target', y=variable,
-                          title=f"Violin Plot de {variable} par Classe")
-        
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Ajout des statistiques descriptives pour la variable sélectionnée
-        st.subheader(f"Statistiques pour {variable}")
-        st.dataframe(df.groupby('target')[variable].describe())
-        
-        # Interprétation spécifique de la variable sélectionnée
-        st.subheader("Interprétation spécifique de la variable sélectionnée")
-        if variable == "sex":
-            st.markdown("""
-- La majorité des individus sont des hommes (1), mais la maladie touche les deux sexes.
-- La proportion de cas de maladie semble similaire dans les deux groupes, mais il faudrait regarder les pourcentages pour conclure.
-""")
-        elif variable == "age":
-            st.markdown("""
-- La distribution de l'âge est similaire pour les deux classes.
-- Il n'y a pas de tranche d'âge où la maladie est nettement plus fréquente.
-""")
-        else:
-            st.markdown("""
-- Cette variable ne présente pas de différence flagrante entre les classes, mais peut contribuer à la prédiction en combinaison avec d'autres variables.
-""")
+        show_distribution()
     
     elif viz_type == "Analyse Bivariée":
         st.header("Analyse Bivariée")
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            x_var = st.selectbox(
-                "Variable X",
-                df.select_dtypes(include=['float64', 'int64']).columns
-            )
-        with col2:
-            y_var = st.selectbox(
-                "Variable Y",
-                df.select_dtypes(include=['float64', 'int64']).columns
-            )
-        
-        fig = px.scatter(df, x=x_var, y=y_var, color='target',
-                        title=f"Relation entre {x_var} et {y_var}",
-                        opacity=0.6)
-        st.plotly_chart(fig, use_container_width=True)
-        
-        # Calcul et affichage de la corrélation
-        correlation = df[x_var].corr(df[y_var])
-        st.write(f"Corrélation entre {x_var} et {y_var} : {correlation:.3f}")
-        
-        # Interprétation spécifique de l'analyse bivariée
-        st.subheader("Interprétation spécifique de l'analyse bivariée")
-        st.markdown(f"""
-- Le nuage de points montre une grande dispersion, sans tendance linéaire claire.
-- Les deux classes sont mélangées, ce qui indique que la combinaison de {x_var} et {y_var} ne suffit pas à séparer les classes.
-""")
+        show_bivariate()
     
     else:  # Analyse PCA
         st.header("Analyse en Composantes Principales")
@@ -194,4 +255,9 @@ La distribution des classes est équilibrée, ce qui est favorable pour l'appren
             st.warning("Veuillez d'abord exécuter l'analyse PCA pour voir les résultats.")
 
 except FileNotFoundError:
-    st.error("Veuillez d'abord exécuter le script de prétraitement pour voir les visualisations.") 
\ No newline at end of file
+    st.error("Veuillez d'abord exécuter le script de prétraitement pour voir les visualisations.")
+
+# Temps serveur des interactions de la session (page complète et fragments)
+timings.record("Exploration · page complète", time.perf_counter() - page_start)
+with st.sidebar.expander("⏱️ Temps serveur des interactions"):
+    st.dataframe(timings.summary().style.format({'Médiane (ms)': '{:.1f}', 'Dernière (ms)': '{:.1f}'}))
@@ -0,0 +1,266 @@
+import os
+import glob
+import json
+import time
+import atexit
+import threading
+from collections import deque
+import numpy as np
+import pandas as pd
+from src.batch_jobs import INPUT_COLUMNS
+
+# Segments du journal d'audit (un fichier binaire par processus et par rotation)
+AUDIT_DIR = 'reports/audit'
+
+# En-tête des segments : signature, taille de la description JSON, description
+MAGIC = b'AUDITLG1'
+
+# Une prédiction = un enregistrement de taille fixe (~110 octets)
+RECORD_DTYPE = np.dtype(
+    [('timestamp', '<f8')]
+    + [(col, '<f4') for col in INPUT_COLUMNS]
+    + [('model', 'S32'), ('model_version', 'S12'), ('source', 'S8'),
+       ('probability', '<f4'), ('threshold', '<f4'), ('prediction', 'i1'), ('latency_ms', '<f4')]
+)
+
+def _encode_field(field, value, encoding='ascii'):
+    """Encode un champ texte de RECORD_DTYPE, sans le tronquer silencieusement"""
+    encoded = value.encode(encoding)
+    if len(encoded) > RECORD_DTYPE[field].itemsize:
+        raise ValueError(f"Champ {field} trop long pour le journal d'audit "
+                         f"({len(encoded)} > {RECORD_DTYPE[field].itemsize} octets) : {value!r}")
+    return encoded
+
+def _segment_header(dtype=RECORD_DTYPE):
+    description = json.dumps(dtype.descr).encode('utf-8')
+    return MAGIC + np.uint32(len(description)).tobytes() + description
+
+class AuditLog:
+    """Journal d'audit des prédictions, en ajout seul, écrit en arrière-plan
+
+    record() ne fait qu'ajouter un tuple dans un tampon borné en mémoire
+    (collections.deque) : aucune écriture disque dans le traitement de la
+    requête. record_batch() y ajoute un tableau structuré entier ; la borne
+    capacity porte sur le nombre d'enregistrements, pas d'éléments du tampon.
+    Un thread d'écriture vide le tampon par lots, toutes les flush_interval
+    secondes ou dès que batch_size enregistrements attendent, et les ajoute
+    au segment courant sous forme de tableau NumPy structuré.
+    Un nouveau segment est ouvert quand le courant dépasse segment_bytes. Si
+    le tampon déborde (disque bloqué), les éléments les plus anciens (une
+    prédiction ou un lot entier) sont perdus et leurs enregistrements comptés
+    dans dropped. Un nom de modèle, une version ou une source plus longs que
+    leur champ lèvent ValueError au lieu d'être tronqués.
+    """
+
+    def __init__(self, directory=AUDIT_DIR, capacity=100_000, batch_size=1000,
+                 flush_interval=1.0, segment_bytes=16 << 20):
+        self.directory = directory
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+        self.dropped = 0
+        self.written = 0
+
+        self._buffer = deque()
+        self._buffered = 0
+        self._buffer_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._segment = None
+        self._segment_size = 0
+
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._flush_loop, name='audit-log', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, patient, model, model_version, probability, prediction, latency_ms,
+               threshold=0.5, source='app'):
+        """Ajoute une prédiction au tampon (non bloquant)"""
+        buffered = self._append((
+            time.time(), *[patient[col] for col in INPUT_COLUMNS],
+            _encode_field('model', model, 'utf-8'), _encode_field('model_version', model_version),
+            _encode_field('source', source),
+            probability, threshold, prediction, latency_ms
+        ), 1)
+        if buffered >= self.batch_size:
+            self._wakeup.set()
+
+    def record_batch(self, df, model, model_version, probabilities, predictions, latency_ms,
+                     threshold=0.5, source='batch'):
+        """Ajoute un lot de prédictions, déjà sous forme de tableau structuré"""
+        records = np.empty(len(df), dtype=RECORD_DTYPE)
+        records['timestamp'] = time.time()
+        for col in INPUT_COLUMNS:
+            records[col] = df[col].to_numpy()
+        records['model'] = _encode_field('model', model, 'utf-8')
+        records['model_version'] = _encode_field('model_version', model_version)
+        records['source'] = _encode_field('source', source)
+        records['probability'] = probabilities
+        records['threshold'] = threshold
+        records['prediction'] = predictions
+        records['latency_ms'] = latency_ms
+        self._append(records, len(records))
+        self._wakeup.set()
+
+    def _append(self, item, n_records):
+        """Ajoute un élément au tampon, puis oublie les plus anciens
+
+        Le tampon garde au plus capacity enregistrements.
+        """
+        with self._buffer_lock:
+            self._buffer.append(item)
+            self._buffered += n_records
+            while self._buffered > self.capacity:
+                evicted = self._buffer.popleft()
+                n_evicted = len(evicted) if isinstance(evicted, np.ndarray) else 1
+                self._buffered -= n_evicted
+                self.dropped += n_evicted
+            return self._buffered
+
+    def _drain(self):
+        """Vide le tampon en un seul tableau structuré"""
+        with self._buffer_lock:
+            items, self._buffer, self._buffered = self._buffer, deque(), 0
+        rows, arrays = [], []
+        for item in items:
+            if isinstance(item, np.ndarray):
+                if rows:
+                    arrays.append(np.array(rows, dtype=RECORD_DTYPE))
+                    rows = []
+                arrays.append(item)
+            else:
+                rows.append(item)
+        if rows:
+            arrays.append(np.array(rows, dtype=RECORD_DTYPE))
+        return np.concatenate(arrays) if arrays else None
+
+    def flush(self):
+        """Écrit les enregistrements en attente dans le segment courant"""
+        with self._write_lock:
+            records = self._drain()
+            if records is None:
+                return 0
+            if self._segment is None or self._segment_size >= self.segment_bytes:
+                self._rotate()
+            data = records.tobytes()
+            self._segment.write(data)
+            self._segment.flush()
+            self._segment_size += len(data)
+            self.written += len(records)
+            return len(records)
+
+    def _rotate(self):
+        if self._segment is not None:
+            self._segment.close()
+        name = f'audit_{time.time_ns() // 1_000_000}_{os.getpid()}.bin'
+        self._segment = open(os.path.join(self.directory, name), 'ab')
+        header = _segment_header()
+        self._segment.write(header)
+        self._segment_size = len(header)
+
+    def _flush_loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except OSError:
+                # Les enregistrements restent perdus, le service continue
+                pass
+
+    def close(self):
+        """Arrête le thread d'écriture après un dernier vidage du tampon"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+        with self._write_lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+def read_segment(path):
+    """Enregistrements d'un segment, projetés en mémoire sans copie"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} n'est pas un segment du journal d'audit")
+        description_size = int(np.frombuffer(f.read(4), dtype=np.uint32)[0])
+        description = json.loads(f.read(description_size))
+    dtype = np.dtype([tuple(field) for field in description])
+    offset = len(MAGIC) + 4 + description_size
+    n_records = (os.path.getsize(path) - offset) // dtype.itemsize
+    if n_records == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(n_records,))
+
+def read_audit_log(directory=AUDIT_DIR, start=None, end=None, columns=None):
+    """Lit le journal d'audit entre deux instants (timestamps Unix) en DataFrame
+
+    Les segments entièrement hors de l'intervalle sont écartés en lisant
+    seulement leur premier et leur dernier enregistrement.
+    """
+    selected = []
+    for path in sorted(glob.glob(os.path.join(directory, 'audit_*.bin'))):
+        records = read_segment(path)
+        if len(records) == 0:
+            continue
+        timestamps = records['timestamp']
+        if (start is not None and timestamps[-1] < start) or (end is not None and timestamps[0] >= end):
+            continue
+        mask = np.ones(len(records), dtype=bool)
+        if start is not None:
+            mask &= timestamps >= start
+        if end is not None:
+            mask &= timestamps < end
+        fields = columns or list(records.dtype.names)
+        selected.append(pd.DataFrame({field: np.asarray(records[field][mask]) for field in fields}))
+
+    if not selected:
+        return pd.DataFrame(columns=columns or list(RECORD_DTYPE.names))
+    df = pd.concat(selected, ignore_index=True).sort_values('timestamp', ignore_index=True)
+    for field in ('model', 'model_version', 'source'):
+        if field in df.columns:
+            df[field] = df[field].str.decode('utf-8')
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='s')
+    return df
+
+def summarize_audit_log(directory=AUDIT_DIR, start=None, end=None):
+    """Prédictions, taux de positifs et latence par jour, modèle et version"""
+    df = read_audit_log(directory, start, end,
+                        columns=['timestamp', 'model', 'model_version', 'prediction', 'latency_ms'])
+    if df.empty:
+        return df
+    return df.groupby([df['timestamp'].dt.date.rename('Jour'), 'model', 'model_version']).agg(
+        Prédictions=('prediction', 'size'),
+        **{'Taux de positifs': ('prediction', 'mean'),
+           'Latence médiane (ms)': ('latency_ms', 'median'),
+           'Latence p95 (ms)': ('latency_ms', lambda x: x.quantile(0.95))}
+    )
+
+if __name__ == "__main__":
+    import tempfile
+
+    df = pd.read_csv('data/data.csv')[INPUT_COLUMNS]
+    patients = df.sample(100_000, replace=True, random_state=42).to_dict('records')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        audit_log = AuditLog(tmp_dir, segment_bytes=4 << 20)
+        start = time.perf_counter()
+        for patient in patients:
+            audit_log.record(patient, 'Random Forest', '0' * 12, 0.5, 1, 10.0)
+        per_record = (time.perf_counter() - start) / len(patients)
+        audit_log.close()
+        print(f"record : {per_record * 1e6:.2f} µs par prédiction, {audit_log.written} écrites, "
+              f"{audit_log.dropped} perdues")
+
+        segments = glob.glob(os.path.join(tmp_dir, 'audit_*.bin'))
+        size = sum(os.path.getsize(path) for path in segments)
+        start = time.perf_counter()
+        log = read_audit_log(tmp_dir)
+        print(f"{len(segments)} segments, {size / 2**20:.1f} Mo, lecture de {len(log)} "
+              f"enregistrements en {time.perf_counter() - start:.3f} s")
+        print(summarize_audit_log(tmp_dir))
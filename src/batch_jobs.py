@@ -0,0 +1,157 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from src.data_preprocessing import preprocess_data
+from src.inference import model_path, load_model, predict_scores
+from src.manifest import artifact_version
+from src.calibration import load_operating_point, apply_operating_point
+from src.validation import INPUT_SCHEMA, validate, reason_labels, rejection_summary, as_numeric
+
+# Colonnes attendues dans un fichier de patients
+INPUT_COLUMNS = ['age', 'sex', 'chest pain type', 'resting bp s', 'cholesterol',
+                 'fasting blood sugar', 'resting ecg', 'max heart rate',
+                 'exercise angina', 'oldpeak', 'ST slope']
+
+# États possibles d'un travail
+PENDING, RUNNING, DONE, FAILED = 'en attente', 'en cours', 'terminé', 'échec'
+
+def score_chunk(chunk, model, operating_point=None):
+    """Prétraite un bloc de patients valides et retourne (prédictions, probabilités)
+
+    Les probabilités sont calibrées et les prédictions suivent le seuil
+    choisi à l'entraînement quand un point de fonctionnement est fourni.
+    """
+    y_pred, y_prob = predict_scores(model, preprocess_data(chunk, is_training=False))
+    if operating_point is not None and y_prob is not None:
+        y_prob, y_pred = apply_operating_point(operating_point, y_prob)
+    return y_pred, y_prob
+
+class BatchJobManager:
+    """Exécute des prédictions par lot en arrière-plan
+
+    Les fichiers sont traités par blocs dans un pool de threads, hors de
+    l'exécution du script Streamlit. Chaque travail est identifié par un job id
+    qui permet de retrouver sa progression et son résultat après un rerun.
+    """
+
+    def __init__(self, max_workers=2, max_jobs=20, monitor=None, audit_log=None):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        # Moniteur de dérive et journal d'audit optionnels, mis à jour bloc par bloc
+        self.monitor = monitor
+        self.audit_log = audit_log
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_jobs = max_jobs
+
+    def submit(self, df, model_name='Random Forest', chunk_size=5000):
+        """Soumet un DataFrame de patients et retourne l'identifiant du travail"""
+        missing = [col for col in INPUT_COLUMNS if col not in df.columns]
+        if missing:
+            raise ValueError(f"Colonnes manquantes dans le fichier : {', '.join(missing)}")
+
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._jobs[job_id] = {
+                'state': PENDING,
+                'model': model_name,
+                'rows_total': len(df),
+                'rows_done': 0,
+                'rows_rejected': 0,
+                'rejections': {},
+                'submitted': time.time(),
+                'started': None,
+                'finished': None,
+                'error': None,
+                'result': None
+            }
+            self._evict()
+        self._executor.submit(self._run, job_id, df, model_name, chunk_size)
+        return job_id
+
+    def status(self, job_id):
+        """Retourne une copie de l'état du travail (None s'il est inconnu)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job = dict(job)
+
+        # Progression et débit (lignes par seconde)
+        job['progress'] = job['rows_done'] / job['rows_total'] if job['rows_total'] else 1.0
+        if job['started'] is not None:
+            elapsed = (job['finished'] or time.time()) - job['started']
+            job['throughput'] = job['rows_done'] / elapsed if elapsed > 0 else 0.0
+        else:
+            job['throughput'] = 0.0
+        return job
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _evict(self):
+        """Oublie les travaux terminés les plus anciens au-delà de max_jobs"""
+        finished = [job_id for job_id, job in self._jobs.items() if job['state'] in (DONE, FAILED)]
+        while len(self._jobs) > self.max_jobs and finished:
+            del self._jobs[finished.pop(0)]
+
+    def _run(self, job_id, df, model_name, chunk_size):
+        self._update(job_id, state=RUNNING, started=time.time())
+        try:
+            model = load_model(model_name)
+            operating_point = load_operating_point(model_name)
+            threshold = operating_point['threshold'] if operating_point is not None else 0.5
+            version = artifact_version(model_path(model_name)) if self.audit_log is not None else None
+            predictions = np.zeros(len(df), dtype=int)
+            probabilities = np.full(len(df), np.nan)
+            codes = np.empty(len(df), dtype=np.int16)
+            rows_rejected = 0
+
+            for start in range(0, len(df), chunk_size):
+                chunk = df.iloc[start:start + chunk_size][INPUT_COLUMNS]
+                # Les lignes invalides ne sont pas scorées : elles gardent leur motif de rejet
+                chunk_codes = validate(chunk, INPUT_SCHEMA)
+                codes[start:start + len(chunk_codes)] = chunk_codes
+                valid = chunk_codes == 0
+                rows = np.flatnonzero(valid) + start
+                rows_rejected += len(chunk_codes) - len(rows)
+                self._update(job_id, rows_rejected=rows_rejected)
+                if not len(rows):
+                    self._update(job_id, rows_done=start + len(chunk_codes))
+                    continue
+                if len(rows) < len(chunk):
+                    chunk = chunk[valid]
+                chunk = as_numeric(chunk)
+                if self.monitor is not None:
+                    self.monitor.observe_batch(chunk)
+                chunk_start = time.perf_counter()
+                y_pred, y_prob = score_chunk(chunk, model, operating_point)
+                if self.audit_log is not None:
+                    # Latence par patient : temps du bloc réparti sur ses lignes
+                    latency_ms = (time.perf_counter() - chunk_start) * 1000 / len(chunk)
+                    self.audit_log.record_batch(chunk, model_name, version,
+                                                y_prob if y_prob is not None else np.nan,
+                                                y_pred, latency_ms, threshold=threshold)
+                predictions[rows] = y_pred
+                probabilities[rows] = y_prob if y_prob is not None else np.nan
+                self._update(job_id, rows_done=start + len(chunk_codes))
+
+            rejected = codes != 0
+            result = df.copy()
+            result['prediction'] = pd.arrays.IntegerArray(predictions, rejected)
+            result['probabilite'] = probabilities
+            result['motif de rejet'] = reason_labels(INPUT_SCHEMA)[codes]
+            self._update(job_id, state=DONE, finished=time.time(), result=result,
+                         rejections=rejection_summary(codes, INPUT_SCHEMA).to_dict())
+        except Exception as e:
+            self._update(job_id, state=FAILED, finished=time.time(), error=str(e))
+
+def read_patients_file(file):
+    """Lit un fichier CSV de patients (chemin ou fichier téléversé)"""
+    df = pd.read_csv(file)
+    # La colonne cible éventuelle n'est pas utilisée pour la prédiction
+    return df.drop(columns='target', errors='ignore')
@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.model_selection import train_test_split
+
+# Rapport comparatif boosting / forêt aléatoire
+COMPARISON_PATH = 'reports/boosting_vs_forest.csv'
+
+class BoostedClassifier(BaseEstimator, ClassifierMixin):
+    """Gradient boosting XGBoost (histogrammes) avec arrêt anticipé intégré
+
+    fit() met de côté validation_fraction des données d'entraînement
+    (stratifiée) pour arrêter l'ajout d'arbres quand la log-loss de validation
+    ne s'améliore plus pendant early_stopping_rounds itérations. L'estimateur
+    s'utilise donc comme les autres modèles sklearn (validation croisée,
+    courbes d'apprentissage, calibration) sans jeu de validation explicite.
+
+    Le modèle est sauvegardé au format natif XGBoost (UBJSON), qui conserve le
+    nombre d'arbres retenu. La prédiction passe par Booster.inplace_predict,
+    sans construction de DMatrix.
+    """
+
+    def __init__(self, n_estimators=1000, learning_rate=0.05, max_depth=4, subsample=0.8,
+                 colsample_bytree=0.8, max_bin=256, early_stopping_rounds=50,
+                 validation_fraction=0.1, n_jobs=-1, random_state=None):
+        self.n_estimators = n_estimators
+        self.learning_rate = learning_rate
+        self.max_depth = max_depth
+        self.subsample = subsample
+        self.colsample_bytree = colsample_bytree
+        self.max_bin = max_bin
+        self.early_stopping_rounds = early_stopping_rounds
+        self.validation_fraction = validation_fraction
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+
+    def fit(self, X, y):
+        if hasattr(X, 'columns'):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.classes_ = np.unique(y)
+        self.n_features_in_ = X.shape[1]
+
+        X_fit, X_val, y_fit, y_val = train_test_split(
+            X, y, test_size=self.validation_fraction, stratify=y, random_state=self.random_state)
+        model = xgb.XGBClassifier(
+            tree_method='hist', n_estimators=self.n_estimators, learning_rate=self.learning_rate,
+            max_depth=self.max_depth, subsample=self.subsample, colsample_bytree=self.colsample_bytree,
+            max_bin=self.max_bin, early_stopping_rounds=self.early_stopping_rounds,
+            eval_metric='logloss', n_jobs=self.n_jobs, random_state=self.random_state)
+        model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+
+        self.booster_ = model.get_booster()
+        self.best_iteration_ = model.best_iteration
+        self.booster_.set_attr(classes=json.dumps(self.classes_.tolist()))
+        return self
+
+    def decision_function(self, X):
+        """Score en log-odds (somme des feuilles des arbres retenus)"""
+        return self.booster_.inplace_predict(np.asarray(X, dtype=np.float32), predict_type='margin',
+                                             iteration_range=(0, self.best_iteration_ + 1))
+
+    def predict_proba(self, X):
+        prob = self.booster_.inplace_predict(np.asarray(X, dtype=np.float32),
+                                             iteration_range=(0, self.best_iteration_ + 1))
+        return np.column_stack([1 - prob, prob])
+
+    def predict(self, X):
+        return self.classes_[(self.predict_proba(X)[:, 1] > 0.5).astype(int)]
+
+    def contributions(self, X):
+        """Valeurs de Shapley exactes (TreeSHAP natif XGBoost), en log-odds
+
+        Retourne la valeur de base et les contributions par colonne.
+        """
+        dmatrix = xgb.DMatrix(np.asarray(X, dtype=np.float32), feature_names=self.booster_.feature_names)
+        values = self.booster_.predict(dmatrix, pred_contribs=True,
+                                       iteration_range=(0, self.best_iteration_ + 1))
+        return values[0, -1], values[:, :-1]
+
+    def save_model(self, path):
+        """Sauvegarde au format natif (arbres, nombre d'arbres retenu, classes, noms des colonnes)"""
+        self.booster_.save_model(path)
+
+    @classmethod
+    def load_model(cls, path):
+        booster = xgb.Booster()
+        booster.load_model(path)
+        model = cls()
+        model.booster_ = booster
+        attributes = booster.attributes()
+        model.best_iteration_ = int(attributes['best_iteration'])
+        model.classes_ = np.array(json.loads(attributes['classes']))
+        model.n_features_in_ = booster.num_features()
+        if booster.feature_names is not None:
+            model.feature_names_in_ = np.asarray(booster.feature_names, dtype=object)
+        return model
+
+def measure_latency(model, X, n_single=200):
+    """Latence d'un lot complet et latence médiane pour un patient, en millisecondes"""
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    start = time.perf_counter()
+    model.predict_proba(X)
+    batch_ms = (time.perf_counter() - start) * 1000
+
+    single = []
+    for i in range(min(n_single, len(X))):
+        start = time.perf_counter()
+        model.predict_proba(X[i:i + 1])
+        single.append((time.perf_counter() - start) * 1000)
+    return batch_ms, float(np.median(single))
+
+def compare_boosting_forest(rows, X_test, y_test, model_names=('Random Forest', 'XGBoost')):
+    """Rapport côte à côte : temps d'entraînement, latence, taille du modèle et qualité"""
+    from src.inference import model_path, load_model
+
+    results = []
+    for name in model_names:
+        row = next(row for row in rows if row['Modèle'] == name)
+        model = load_model(name, dtype=np.float32)
+        batch_ms, single_ms = measure_latency(model, X_test)
+        results.append({
+            'Modèle': name,
+            'Temps d\'entraînement (s)': row['Temps d\'entraînement (s)'],
+            f'Latence lot de {len(X_test)} (ms)': batch_ms,
+            'Latence 1 patient (ms)': single_ms,
+            'Taille du modèle (Mo)': os.path.getsize(model_path(name)) / 2**20,
+            'Accuracy': row['Accuracy'],
+            'AUC': row['AUC']
+        })
+    comparison = pd.DataFrame(results)
+    comparison.to_csv(COMPARISON_PATH, index=False)
+    return comparison
+
+if __name__ == "__main__":
+    if os.path.exists(COMPARISON_PATH):
+        print(pd.read_csv(COMPARISON_PATH).round(4).to_string(index=False))
+    else:
+        print("Rapport absent : lancer python -m src.model_training")
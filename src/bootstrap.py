@@ -0,0 +1,143 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from src.inference import MODEL_NAMES, model_slug
+
+# Prédictions de chaque modèle sur le jeu de test, écrites à l'entraînement
+PREDICTIONS_DIR = 'reports/predictions'
+
+# Paramètres du bootstrap
+BOOTSTRAP_PARAMS = {'n_replicates': 2000, 'confidence': 0.95, 'block_size': 250, 'random_state': 42}
+
+# Métriques dont l'intervalle de confiance est estimé
+BOOTSTRAP_METRICS = ['Accuracy', 'Precision', 'Recall', 'F1-Score', 'AUC']
+
+def predictions_path(name):
+    """Chemin des prédictions de test d'un modèle"""
+    return f'{PREDICTIONS_DIR}/{model_slug(name)}.npz'
+
+def save_test_predictions(name, y_true, y_pred, y_prob=None):
+    """Sauvegarde les prédictions de test, réutilisées par le bootstrap"""
+    os.makedirs(PREDICTIONS_DIR, exist_ok=True)
+    arrays = {'y_true': np.asarray(y_true), 'y_pred': np.asarray(y_pred)}
+    if y_prob is not None:
+        arrays['y_prob'] = np.asarray(y_prob)
+    np.savez(predictions_path(name), **arrays)
+
+def load_test_predictions(name):
+    """Prédictions de test d'un modèle : (y_true, y_pred, y_prob ou None)"""
+    with np.load(predictions_path(name)) as data:
+        return data['y_true'], data['y_pred'], data['y_prob'] if 'y_prob' in data.files else None
+
+def weighted_metrics(weights, y_true, y_pred, y_score=None):
+    """Métriques de chaque réplique bootstrap (une ligne de poids par réplique)
+
+    Les effectifs de la matrice de confusion sont des produits matrice-vecteur.
+    Pour l'AUC, les scores sont triés une seule fois : les poids sont sommés
+    par score distinct, puis cumulés pour obtenir les vrais et faux positifs
+    de toutes les répliques à tous les seuils.
+    """
+    positive = y_true == 1
+    predicted = y_pred == 1
+    tp = weights @ (positive & predicted)
+    fp = weights @ (~positive & predicted)
+    fn = weights @ (positive & ~predicted)
+    total = weights.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        metrics = {
+            'Accuracy': (total - fp - fn) / total,
+            'Precision': np.where(tp + fp > 0, tp / (tp + fp), 0.0),
+            'Recall': np.where(tp + fn > 0, tp / (tp + fn), 0.0),
+            'F1-Score': np.where(tp > 0, 2 * tp / (2 * tp + fp + fn), 0.0)
+        }
+        if y_score is not None:
+            order = np.argsort(y_score, kind='mergesort')[::-1]
+            sorted_score = y_score[order]
+            starts = np.r_[0, np.flatnonzero(np.diff(sorted_score)) + 1]
+            w = weights[:, order]
+            tps = np.cumsum(np.add.reduceat(w * positive[order], starts, axis=1), axis=1)
+            fps = np.cumsum(np.add.reduceat(w * ~positive[order], starts, axis=1), axis=1)
+            tps = np.hstack([np.zeros((len(w), 1)), tps])
+            fps = np.hstack([np.zeros((len(w), 1)), fps])
+            area = np.sum(np.diff(fps, axis=1) * (tps[:, 1:] + tps[:, :-1]) / 2, axis=1)
+            metrics['AUC'] = area / (tps[:, -1] * fps[:, -1])
+    return metrics
+
+def _bootstrap_block(predictions, n_samples, n_replicates, seed):
+    """Un bloc de répliques : mêmes poids de Poisson pour tous les modèles (comparaison appariée)"""
+    rng = np.random.default_rng(seed)
+    weights = rng.poisson(1.0, size=(n_replicates, n_samples)).astype(np.float64)
+    return {name: weighted_metrics(weights, *arrays) for name, arrays in predictions.items()}
+
+def bootstrap_metrics(predictions, n_replicates=2000, block_size=250, random_state=42, max_workers=None):
+    """Répliques bootstrap des métriques de chaque modèle
+
+    predictions : {modèle: (y_true, y_pred, y_prob ou None)} sur le même jeu
+    de test. Chaque réplique pondère les patients par des poids de Poisson(1)
+    (bootstrap de Poisson), sans refaire de prédiction. Les répliques sont
+    calculées par blocs de block_size dans un pool de threads (NumPy libère
+    le GIL), chaque bloc avec sa propre graine.
+
+    Retourne {modèle: {métrique: tableau des répliques}}.
+    """
+    n_samples = len(next(iter(predictions.values()))[0])
+    sizes = [min(block_size, n_replicates - start) for start in range(0, n_replicates, block_size)]
+    seeds = np.random.SeedSequence(random_state).generate_state(len(sizes))
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        blocks = list(executor.map(lambda task: _bootstrap_block(predictions, n_samples, *task),
+                                   zip(sizes, (int(seed) for seed in seeds))))
+    return {
+        name: {metric: np.concatenate([block[name][metric] for block in blocks])
+               for metric in blocks[0][name]}
+        for name in predictions
+    }
+
+def confidence_intervals(replicates, confidence=0.95):
+    """Intervalles percentiles de chaque métrique, et écart d'accuracy au meilleur modèle
+
+    Les répliques de tous les modèles utilisent les mêmes poids : la
+    différence d'accuracy avec le meilleur modèle est calculée réplique par
+    réplique. Un intervalle qui contient 0 signifie que l'écart n'est pas
+    distinguable du hasard du jeu de test.
+    """
+    alpha = (1 - confidence) / 2
+    best = max(replicates, key=lambda name: np.nanmean(replicates[name]['Accuracy']))
+    rows = []
+    for name, metrics in replicates.items():
+        row = {'Modèle': name}
+        for metric in BOOTSTRAP_METRICS:
+            if metric in metrics:
+                low, high = np.nanquantile(metrics[metric], [alpha, 1 - alpha])
+                row[f'{metric} IC bas'], row[f'{metric} IC haut'] = low, high
+        difference = metrics['Accuracy'] - replicates[best]['Accuracy']
+        row['Écart au meilleur IC bas'], row['Écart au meilleur IC haut'] = np.nanquantile(
+            difference, [alpha, 1 - alpha])
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+def uncertainty_node(*model_rows):
+    """Nœud du pipeline : intervalles de confiance à partir des prédictions de test sauvegardées"""
+    print("\nIntervalles de confiance (bootstrap)")
+    names = [row['Modèle'] for row in model_rows]
+    predictions = {name: load_test_predictions(name) for name in names}
+    params = {key: value for key, value in BOOTSTRAP_PARAMS.items() if key != 'confidence'}
+    start = time.perf_counter()
+    replicates = bootstrap_metrics(predictions, **params)
+    intervals = confidence_intervals(replicates, BOOTSTRAP_PARAMS['confidence'])
+    print(f"{BOOTSTRAP_PARAMS['n_replicates']} répliques pour {len(names)} modèles "
+          f"en {time.perf_counter() - start:.2f} s")
+    return intervals
+
+if __name__ == "__main__":
+    names = [name for name in MODEL_NAMES if os.path.exists(predictions_path(name))]
+    if not names:
+        print("Prédictions absentes : lancer python -m src.model_training")
+    else:
+        predictions = {name: load_test_predictions(name) for name in names}
+        for n_replicates in (1000, 10_000):
+            start = time.perf_counter()
+            replicates = bootstrap_metrics(predictions, n_replicates=n_replicates)
+            print(f"{n_replicates} répliques : {time.perf_counter() - start:.2f} s")
+        print(confidence_intervals(replicates).round(4).to_string(index=False))
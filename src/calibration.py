@@ -0,0 +1,169 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.isotonic import IsotonicRegression
+from sklearn.model_selection import StratifiedKFold, cross_val_predict
+from sklearn.neighbors import KNeighborsClassifier
+from src.boosting import BoostedClassifier
+from src.inference import model_slug
+from src.metrics import threshold_counts
+
+# Paramètres par défaut : coûts égaux des faux positifs et des faux négatifs
+CALIBRATION_PARAMS = {
+    'cv': 5,
+    'strategy': 'cost',
+    'cost_fp': 1.0,
+    'cost_fn': 1.0,
+    'target_recall': 0.9
+}
+
+# Modèles dont n_jobs parallélise réellement l'ajustement ou la prédiction
+# (ailleurs, n_jobs est ignoré ou déprécié, comme pour LogisticRegression)
+PARALLEL_ESTIMATORS = (BoostedClassifier, RandomForestClassifier, KNeighborsClassifier)
+
+def operating_point_path(name):
+    """Chemin du point de fonctionnement sauvegardé avec le modèle"""
+    return f'models/{model_slug(name)}_operating_point.json'
+
+def sweep_thresholds(y_true, y_score, cost_fp=1.0, cost_fn=1.0):
+    """Matrice de confusion, précision, rappel et coût à tous les seuils"""
+    thresholds, tps, fps = threshold_counts(y_true, y_score)
+    positives = tps[-1]
+    negatives = fps[-1]
+    fns = positives - tps
+    predicted = tps + fps
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, tps / predicted, 1.0)
+    return pd.DataFrame({
+        'threshold': thresholds,
+        'tp': tps,
+        'fp': fps,
+        'fn': fns,
+        'tn': negatives - fps,
+        'precision': precision,
+        'recall': tps / positives if positives else np.zeros(len(tps)),
+        'cost': cost_fp * fps + cost_fn * fns
+    })
+
+def choose_threshold(sweep, strategy='cost', target_recall=0.9):
+    """Choisit le seuil : coût minimal, ou plus haut seuil atteignant le rappel visé
+
+    Les seuils qui prédisent toujours la même classe (aucun positif ou que des
+    positifs) sont écartés. S'il ne reste aucun seuil, le balayage complet est
+    utilisé et le point retenu est dégénéré.
+    """
+    predicted = sweep['tp'] + sweep['fp']
+    informative = sweep[(predicted > 0) & (predicted < predicted.iloc[-1])]
+    if len(informative):
+        sweep = informative
+    if strategy == 'cost':
+        row = sweep.loc[sweep['cost'].idxmin()]
+    elif strategy == 'recall':
+        reached = sweep[sweep['recall'] >= target_recall]
+        row = reached.iloc[0] if len(reached) else sweep.iloc[-1]
+    else:
+        raise ValueError(f"Stratégie de seuil inconnue : {strategy}")
+    return row
+
+def single_threaded(model):
+    """Copie non ajustée du modèle limitée à un thread, pour les validations croisées parallèles
+
+    Les boucles de validation croisée lancées avec n_jobs=-1 occupent déjà
+    tous les cœurs : un modèle lui-même parallèle (XGBoost, n_jobs=-1)
+    lancerait autant de threads dans chacun de leurs processus.
+    """
+    model = clone(model)
+    if isinstance(model, PARALLEL_ESTIMATORS):
+        model.set_params(n_jobs=1)
+    return model
+
+def fit_operating_point(model, X_train, y_train, params=None):
+    """Calibre les probabilités et choisit le seuil de décision d'un modèle
+
+    Les probabilités hors échantillon (validation croisée sur l'ensemble
+    d'entraînement) servent à ajuster une régression isotonique. Le seuil est
+    choisi sur des probabilités calibrées hors pli : chaque pli est calibré par
+    une régression ajustée sur les autres plis, pour que la précision et le
+    rappel annoncés ne soient pas optimistes. Le jeu de test n'est pas utilisé.
+    Un point qui prédit toujours la même classe est marqué 'degenerate'.
+    """
+    params = {**CALIBRATION_PARAMS, **(params or {})}
+    y_train = np.asarray(y_train)
+    folds = list(StratifiedKFold(params['cv']).split(X_train, y_train))
+    oof_prob = cross_val_predict(single_threaded(model), X_train, y_train, cv=folds,
+                                 method='predict_proba', n_jobs=-1)[:, 1]
+
+    held_out = np.empty_like(oof_prob)
+    for train_idx, test_idx in folds:
+        fold_calibrator = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds='clip')
+        fold_calibrator.fit(oof_prob[train_idx], y_train[train_idx])
+        held_out[test_idx] = fold_calibrator.predict(oof_prob[test_idx])
+
+    calibrator = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds='clip')
+    calibrator.fit(oof_prob, y_train)
+
+    sweep = sweep_thresholds(y_train, held_out, params['cost_fp'], params['cost_fn'])
+    row = choose_threshold(sweep, params['strategy'], params['target_recall'])
+    predicted = row['tp'] + row['fp']
+    return {
+        'calibration': {
+            'x': calibrator.X_thresholds_.tolist(),
+            'y': calibrator.y_thresholds_.tolist()
+        },
+        'threshold': float(row['threshold']),
+        'params': params,
+        'precision': float(row['precision']),
+        'recall': float(row['recall']),
+        'degenerate': bool(predicted == 0 or predicted == len(y_train))
+    }
+
+def save_operating_point(name, operating_point):
+    """Sauvegarde le point de fonctionnement à côté du modèle"""
+    with open(operating_point_path(name), 'w', encoding='utf-8') as f:
+        json.dump(operating_point, f, indent=2)
+
+def load_operating_point(name):
+    """Point de fonctionnement d'un modèle (None s'il n'a pas été calibré)"""
+    path = operating_point_path(name)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        operating_point = json.load(f)
+    # Conversion unique en tableaux pour que l'application soit une simple interpolation
+    operating_point['calibration'] = {
+        key: np.asarray(values) for key, values in operating_point['calibration'].items()
+    }
+    return operating_point
+
+def apply_operating_point(operating_point, y_prob):
+    """Probabilités calibrées et décisions au seuil choisi"""
+    calibration = operating_point['calibration']
+    calibrated = np.interp(y_prob, calibration['x'], calibration['y'])
+    return calibrated, (calibrated >= operating_point['threshold']).astype(int)
+
+def calibrate_model(name, model, X_train, y_train, params=None):
+    """Ajuste et sauvegarde le point de fonctionnement d'un modèle"""
+    print(f"\nCalibration du modèle: {name}")
+    operating_point = fit_operating_point(model, X_train, y_train, params)
+    save_operating_point(name, operating_point)
+    print(f"Seuil retenu : {operating_point['threshold']:.3f} "
+          f"(précision {operating_point['precision']:.3f}, rappel {operating_point['recall']:.3f})")
+    if operating_point['degenerate']:
+        print("Attention : aucun seuil ne sépare les classes, le modèle prédit toujours la même classe")
+    return operating_point
+
+if __name__ == "__main__":
+    from src.inference import MODEL_NAMES
+
+    for name in MODEL_NAMES:
+        operating_point = load_operating_point(name)
+        if operating_point is None:
+            print(f"{name} : non calibré")
+        else:
+            print(f"{name} : seuil {operating_point['threshold']:.3f}, "
+                  f"précision {operating_point['precision']:.3f}, rappel {operating_point['recall']:.3f} "
+                  f"(validation croisée, stratégie {operating_point['params']['strategy']})"
+                  + (" - dégénéré" if operating_point.get('degenerate') else ""))
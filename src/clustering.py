@@ -0,0 +1,130 @@
+import time
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, ClassifierMixin
+from sklearn.cluster import KMeans, MiniBatchKMeans
+
+class ClusterClassifier(BaseEstimator, ClassifierMixin):
+    """KMeans utilisé comme classifieur
+
+    Chaque cluster reçoit la classe majoritaire de ses points d'entraînement
+    (correspondance cluster -> classe apprise et sauvegardée avec le modèle).
+    La probabilité d'un patient est la proportion de malades dans son
+    cluster. Au-delà de mini_batch_threshold lignes (ou avec
+    mini_batch=True), l'ajustement utilise MiniBatchKMeans, arrêté après
+    max_no_improvement mini-lots sans amélioration de l'inertie lissée.
+
+    Après l'ajustement, seuls les centroïdes et les correspondances sont
+    gardés : la prédiction est un calcul du centroïde le plus proche,
+    vectorisé par blocs de batch_size lignes.
+    """
+
+    def __init__(self, n_clusters=2, mini_batch='auto', mini_batch_threshold=100_000,
+                 batch_size=4096, max_no_improvement=3, n_init='auto', random_state=None):
+        self.n_clusters = n_clusters
+        self.mini_batch = mini_batch
+        self.mini_batch_threshold = mini_batch_threshold
+        self.batch_size = batch_size
+        self.max_no_improvement = max_no_improvement
+        self.n_init = n_init
+        self.random_state = random_state
+
+    def _clusterer(self, n_samples):
+        use_mini_batch = (n_samples > self.mini_batch_threshold if self.mini_batch == 'auto'
+                          else self.mini_batch)
+        if use_mini_batch:
+            # Les labels sont recalculés ici, inutile que MiniBatchKMeans les calcule
+            return MiniBatchKMeans(n_clusters=self.n_clusters, batch_size=self.batch_size,
+                                   max_no_improvement=self.max_no_improvement, compute_labels=False,
+                                   n_init=self.n_init, random_state=self.random_state)
+        return KMeans(n_clusters=self.n_clusters, n_init=self.n_init, random_state=self.random_state)
+
+    def fit(self, X, y):
+        if hasattr(X, 'columns'):
+            self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        self.classes_, y_index = np.unique(y, return_inverse=True)
+        self.n_features_in_ = X.shape[1]
+
+        clusterer = self._clusterer(len(X)).fit(X)
+        self.cluster_centers_ = clusterer.cluster_centers_
+        self.n_iter_ = clusterer.n_iter_
+        labels = self.transform_labels(X)
+        self.inertia_ = float(np.sum((X - self.cluster_centers_[labels]) ** 2))
+
+        # Effectifs de chaque classe dans chaque cluster
+        n_classes = len(self.classes_)
+        counts = np.bincount(labels * n_classes + y_index,
+                             minlength=self.n_clusters * n_classes).reshape(self.n_clusters, n_classes)
+        counts = counts.astype(np.float64)
+        # Cluster vide : répartition des classes sur tout l'ensemble d'entraînement
+        empty = counts.sum(axis=1) == 0
+        counts[empty] = np.bincount(y_index, minlength=len(self.classes_))
+        self.cluster_proba_ = counts / counts.sum(axis=1, keepdims=True)
+        self.cluster_classes_ = self.classes_[np.argmax(counts, axis=1)]
+        return self
+
+    def transform_labels(self, X):
+        """Cluster le plus proche de chaque patient"""
+        centers = self.cluster_centers_
+        X = np.asarray(X, dtype=centers.dtype)
+        # ||x - c||² = ||x||² - 2 x.c + ||c||² : le premier terme ne change pas l'argmin
+        center_norms = np.einsum('ij,ij->i', centers, centers)
+        labels = np.empty(len(X), dtype=np.intp)
+        for start in range(0, len(X), self.batch_size):
+            batch = X[start:start + self.batch_size]
+            labels[start:start + len(batch)] = np.argmin(center_norms - 2 * batch @ centers.T, axis=1)
+        return labels
+
+    def predict(self, X):
+        return self.cluster_classes_[self.transform_labels(X)]
+
+    def predict_proba(self, X):
+        return self.cluster_proba_[self.transform_labels(X)]
+
+def benchmark_clustering(n_rows=(10_000, 200_000, 1_000_000), n_clusters=2, random_state=42):
+    """Compare le temps d'ajustement et de prédiction : KMeans (Lloyd) contre ClusterClassifier
+
+    Les jeux de données sont tirés (avec remise) du jeu d'entraînement prétraité.
+    """
+    from src.data_preprocessing import load_data, preprocess_to_array
+
+    df = load_data('data/data.csv')
+    X_all = preprocess_to_array(df.drop(columns='target'), dtype=np.float64)
+    y_all = df['target'].to_numpy()
+    rng = np.random.default_rng(random_state)
+
+    results = []
+    for n in n_rows:
+        idx = rng.integers(0, len(X_all), n)
+        X, y = X_all[idx], y_all[idx]
+
+        start = time.perf_counter()
+        kmeans = KMeans(n_clusters=n_clusters, random_state=random_state).fit(X)
+        lloyd_fit = time.perf_counter() - start
+        start = time.perf_counter()
+        kmeans.predict(X)
+        lloyd_predict = time.perf_counter() - start
+
+        model = ClusterClassifier(n_clusters=n_clusters, mini_batch=True, random_state=random_state)
+        start = time.perf_counter()
+        model.fit(X, y)
+        mini_batch_fit = time.perf_counter() - start
+        start = time.perf_counter()
+        model.predict(X)
+        vectorized_predict = time.perf_counter() - start
+
+        results.append({
+            'Lignes': n,
+            'Ajustement Lloyd (s)': lloyd_fit,
+            'Ajustement mini-batch (s)': mini_batch_fit,
+            'Prédiction KMeans (s)': lloyd_predict,
+            'Prédiction vectorisée (s)': vectorized_predict,
+            'Inertie relative': model.inertia_ / kmeans.inertia_,
+            'Accuracy': np.mean(model.predict(X) == y)
+        })
+    return pd.DataFrame(results)
+
+if __name__ == "__main__":
+    print(benchmark_clustering().round(4).to_string(index=False))
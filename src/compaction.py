@@ -0,0 +1,203 @@
+import io
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.base import BaseEstimator, ClassifierMixin, clone
+from sklearn.metrics import accuracy_score, roc_auc_score
+from sklearn.neighbors import KNeighborsClassifier
+from src.data_preprocessing import load_data, preprocess_to_array
+from src.inference import model_path, load_model, save_model
+from src.calibration import CALIBRATION_PARAMS, operating_point_path, calibrate_model
+from src.manifest import DATA_PATH, stamp_artifacts
+from src.model_host import FlatTreeEnsemble, CompactTreeEnsemble, feature_grid
+from src.validation import TRAINING_SCHEMA, split_valid
+
+# Variantes compactes servables -> modèle d'origine
+COMPACT_MODELS = {'Random Forest compact': 'Random Forest', 'KNN compact': 'KNN'}
+
+# Paramètres par défaut des variantes compactes : à une profondeur de 12, la
+# forêt compacte est plus lente que l'origine sur un lot (parcours en NumPy)
+COMPACTION_PARAMS = {
+    'Random Forest': {'max_depth': 8, 'value_decimals': 2},
+    'KNN': {'fraction': 0.25, 'random_state': 42}
+}
+
+# Comparaison des variantes avec les modèles d'origine
+COMPACTION_REPORT = 'reports/compaction.csv'
+
+def compact_knn(model, fraction=0.25, random_state=42):
+    """KNN réajusté sur un sous-échantillon stratifié de ses points d'entraînement (prototypes)
+
+    Les paramètres du modèle (k, métrique, pondération) sont conservés. La
+    recherche est exhaustive (algorithm='brute') : sans arbre de recherche, les
+    prototypes en float32 sont la seule copie stockée.
+    """
+    X = np.asarray(model._fit_X, dtype=np.float32)
+    y = model.classes_[model._y]
+    rng = np.random.default_rng(random_state)
+    keep = np.sort(np.concatenate([
+        rng.choice(members, max(model.n_neighbors, round(len(members) * fraction)), replace=False)
+        for members in (np.flatnonzero(y == label) for label in model.classes_)
+    ]))
+    compact = KNeighborsClassifier(**{**model.get_params(), 'algorithm': 'brute'}).fit(X[keep], y[keep])
+    if hasattr(model, 'feature_names_in_'):
+        compact.feature_names_in_ = model.feature_names_in_
+    return compact
+
+def load_grid_and_split():
+    """Grille des entrées et division train/test, identiques à celles de l'entraînement
+
+    Retourne (grille, X_train, X_test, y_train, y_test).
+    """
+    from sklearn.model_selection import train_test_split
+    from src.model_training import SPLIT_PARAMS
+
+    df, _, _ = split_valid(load_data(DATA_PATH), TRAINING_SCHEMA)
+    X = preprocess_to_array(df.drop(columns='target'), dtype=np.float32)
+    return (feature_grid(X), *train_test_split(X, df['target'].to_numpy(), **SPLIT_PARAMS))
+
+def compact_model(name, model, grid, params=None):
+    """Variante compacte (nom dans COMPACT_MODELS) d'un modèle d'origine ajusté"""
+    source = COMPACT_MODELS[name]
+    params = {**COMPACTION_PARAMS[source], **(params or {})}
+    if source == 'KNN':
+        return compact_knn(model, **params)
+    return CompactTreeEnsemble(FlatTreeEnsemble(model), grid, **params)
+
+def build_compact(name, grid, params=None):
+    """Variante compacte du modèle d'origine sauvegardé dans models/"""
+    return compact_model(name, load_model(COMPACT_MODELS[name], dtype=np.float32), grid, params)
+
+class CompactVariant(BaseEstimator, ClassifierMixin):
+    """Variante compacte vue comme un estimateur sklearn
+
+    fit ajuste le modèle d'origine (non ajusté) puis le compacte : la validation
+    croisée de calibrate_model évalue ainsi la variante elle-même.
+    """
+
+    def __init__(self, name, source, grid, params=None):
+        self.name = name
+        self.source = source
+        self.grid = grid
+        self.params = params
+
+    def fit(self, X, y):
+        self.compact_ = compact_model(self.name, clone(self.source).fit(X, y), self.grid, self.params)
+        self.classes_ = self.compact_.classes_
+        return self
+
+    def predict_proba(self, X):
+        return self.compact_.predict_proba(X)
+
+    def predict(self, X):
+        return self.compact_.predict(X)
+
+def serialized_size(model):
+    """Taille du modèle sérialisé avec joblib (octets)"""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.tell()
+
+def evaluate_variant(model, X_test, y_test, reference=None, n_single=200):
+    """Taille, latence (un patient et lot de test) et qualité sur la division de test"""
+    single_times = []
+    for row in X_test[:n_single]:
+        start = time.perf_counter()
+        model.predict_proba(row[None, :])
+        single_times.append(time.perf_counter() - start)
+    start = time.perf_counter()
+    prob = model.predict_proba(X_test)[:, 1]
+    batch_time = time.perf_counter() - start
+    pred = (prob >= 0.5).astype(int)
+
+    row = {
+        'Taille (Ko)': serialized_size(model) / 1024,
+        'Latence 1 patient (ms)': np.median(single_times) * 1000,
+        'Latence lot (ms)': batch_time * 1000,
+        'Exactitude': accuracy_score(y_test, pred),
+        'AUC': roc_auc_score(y_test, prob)
+    }
+    if reference is not None:
+        row['Δ latence lot (ms)'] = row['Latence lot (ms)'] - reference['Latence lot (ms)']
+        row['Δ exactitude'] = row['Exactitude'] - reference['Exactitude']
+        row['Δ AUC'] = row['AUC'] - reference['AUC']
+        row['Accord'] = np.mean(pred == reference['pred'])
+        row['Écart max des probabilités'] = np.abs(prob - reference['prob']).max()
+    return row, pred, prob
+
+def compare_variants(variants, grid, X_test, y_test):
+    """Compare des réglages de compaction à leur modèle d'origine
+
+    variants : liste de (nom compact, paramètres). Retourne un DataFrame.
+    """
+    results, references = [], {}
+    for name, params in variants:
+        source = COMPACT_MODELS[name]
+        if source not in references:
+            row, pred, prob = evaluate_variant(load_model(source, dtype=np.float32), X_test, y_test)
+            references[source] = {**row, 'pred': pred, 'prob': prob}
+            results.append({'Modèle': source, 'Variante': 'origine', **row})
+        params = {**COMPACTION_PARAMS[source], **params}
+        row, _, _ = evaluate_variant(build_compact(name, grid, params), X_test, y_test, references[source])
+        variant = ', '.join(f'{key}={value}' for key, value in params.items() if key != 'random_state')
+        results.append({'Modèle': name, 'Variante': variant, **row})
+    return pd.DataFrame(results)
+
+def save_compact(name, model, grid, X_train, y_train):
+    """Sauvegarde une variante compacte et calibre son propre point de fonctionnement
+
+    La variante ne prédit pas comme son origine : sa calibration et son seuil
+    sont ajustés par validation croisée sur l'ensemble d'entraînement, chaque
+    pli ajustant puis compactant le modèle d'origine.
+    """
+    from src.model_training import get_models
+
+    source = COMPACT_MODELS[name]
+    save_model(name, model)
+    variant = CompactVariant(name, get_models()[source], grid, COMPACTION_PARAMS[source])
+    calibrate_model(name, variant, X_train, y_train)
+    artifacts = [model_path(name), operating_point_path(name)]
+    stamp_artifacts(artifacts, inputs=(model_path(source), DATA_PATH),
+                    params={**COMPACTION_PARAMS[source], 'calibration': CALIBRATION_PARAMS})
+    return artifacts
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Variantes compactes des modèles pour le service")
+    parser.add_argument('--max-depth', type=int, default=COMPACTION_PARAMS['Random Forest']['max_depth'],
+                        help="profondeur maximale des arbres de la forêt compacte")
+    parser.add_argument('--decimals', type=int, default=COMPACTION_PARAMS['Random Forest']['value_decimals'],
+                        help="décimales conservées pour les probabilités des nœuds")
+    parser.add_argument('--knn-fraction', type=float, default=COMPACTION_PARAMS['KNN']['fraction'],
+                        help="part des points d'entraînement gardés comme prototypes KNN")
+    parser.add_argument('--no-save', action='store_true', help="compare les réglages sans écrire les variantes")
+    args = parser.parse_args()
+
+    COMPACTION_PARAMS['Random Forest'].update(max_depth=args.max_depth, value_decimals=args.decimals)
+    COMPACTION_PARAMS['KNN'].update(fraction=args.knn_fraction)
+
+    grid, X_train, X_test, y_train, y_test = load_grid_and_split()
+    variants = [
+        ('Random Forest compact', {'max_depth': None, 'value_decimals': 6}),
+        ('Random Forest compact', {'max_depth': 20}),
+        ('Random Forest compact', {'max_depth': 12}),
+        ('Random Forest compact', {}),
+        ('Random Forest compact', {'max_depth': 6}),
+        ('KNN compact', {'fraction': 0.5}),
+        ('KNN compact', {}),
+        ('KNN compact', {'fraction': 0.1})
+    ]
+    results = compare_variants(variants, grid, X_test, y_test)
+    results.to_csv(COMPACTION_REPORT, index=False)
+    print(results.round(4).to_string(index=False))
+    print(f"Rapport : {COMPACTION_REPORT}")
+    slower = results[results['Δ latence lot (ms)'] > 0]
+    if len(slower):
+        print("Variantes plus lentes que leur origine sur un lot : "
+              + ', '.join(f"{row['Modèle']} ({row['Variante']})" for _, row in slower.iterrows()))
+
+    if not args.no_save:
+        for name in COMPACT_MODELS:
+            for path in save_compact(name, build_compact(name, grid), grid, X_train, y_train):
+                print(f"Écrit : {path}")
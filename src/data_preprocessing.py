@@ -1,10 +1,21 @@
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.decomposition import PCA
 import matplotlib.pyplot as plt
 import seaborn as sns
+from src.manifest import DATA_PATH, is_stale, stamp_artifacts
+from src.streaming_stats import StreamingStats
+
+# Catégories possibles pour chaque variable catégorielle
+CATEGORIES = {
+    'chest pain type': [1, 2, 3, 4],
+    'resting ecg': [0, 1, 2],
+    'ST slope': [1, 2, 3]
+}
+
+# Variables numériques normalisées
+NUMERIC_COLS = ['age', 'resting bp s', 'cholesterol', 'max heart rate', 'oldpeak']
 
 def load_data(file_path):
     """Charge les données depuis le fichier CSV"""
@@ -33,15 +44,8 @@ def preprocess_data(df, is_training=False):
     # Copie du dataframe pour éviter les modifications sur l'original
     df_processed = df.copy()
     
-    # Définition des catégories possibles pour chaque variable catégorielle
-    categories = {
-        'chest pain type': [1, 2, 3, 4],
-        'resting ecg': [0, 1, 2],
-        'ST slope': [1, 2, 3]
-    }
-    
     # Création des variables dummy avec toutes les catégories possibles
-    for col, cats in categories.items():
+    for col, cats in CATEGORIES.items():
         # Création d'un DataFrame temporaire avec les colonnes dummy
         dummy_df = pd.get_dummies(df_processed[col], prefix=col)
         
@@ -62,20 +66,13 @@ def preprocess_data(df, is_training=False):
         df_processed.drop(col, axis=1, inplace=True)
     
     # Normalisation des variables numériques
-    numeric_cols = ['age', 'resting bp s', 'cholesterol', 'max heart rate', 'oldpeak']
+    numeric_cols = NUMERIC_COLS
     
     if is_training:
-        # En phase d'entraînement, on ajuste le scaler et on le sauvegarde
-        scaler = StandardScaler()
-        df_processed[numeric_cols] = scaler.fit_transform(df_processed[numeric_cols])
-        # Sauvegarder les paramètres du scaler
-        pd.DataFrame(
-            {
-                'mean': scaler.mean_,
-                'scale': scaler.scale_
-            },
-            index=numeric_cols
-        ).to_csv('reports/scaler_params.csv')
+        # En phase d'entraînement, on calcule les paramètres du scaler et on les sauvegarde
+        scaler_params = StreamingStats(numeric_cols).update(df_processed).scaler_params()
+        scaler_params.to_csv('reports/scaler_params.csv')
+        df_processed[numeric_cols] = (df_processed[numeric_cols] - scaler_params['mean']) / scaler_params['scale']
     else:
         # En phase de prédiction, on utilise les paramètres sauvegardés
         scaler_params = pd.read_csv('reports/scaler_params.csv', index_col=0)
@@ -89,6 +86,50 @@ def preprocess_data(df, is_training=False):
     
     return df_processed
 
+def load_preprocessing_params():
+    """Charge les paramètres du scaler et l'ordre des colonnes sauvegardés à l'entraînement"""
+    scaler_params = pd.read_csv('reports/scaler_params.csv', index_col=0)
+    expected_columns = pd.read_csv('reports/feature_columns.csv')['0'].tolist()
+    return scaler_params, expected_columns
+
+def preprocess_to_array(df, dtype=np.float32, params=None):
+    """Prétraite les données directement en tableau NumPy C-contigu (mode inférence)
+
+    Produit les mêmes colonnes que preprocess_data(is_training=False), dans le
+    même ordre, mais écrit chaque colonne dans un tableau pré-alloué au lieu de
+    construire des DataFrames intermédiaires.
+    """
+    scaler_params, expected_columns = params if params is not None else load_preprocessing_params()
+    
+    # Colonnes dummy attendues -> (variable d'origine, catégorie)
+    dummy_columns = {
+        f"{col}_{cat}": (col, cat)
+        for col, cats in CATEGORIES.items()
+        for cat in cats
+    }
+    
+    X = np.zeros((len(df), len(expected_columns)), dtype=dtype, order='C')
+    for j, col in enumerate(expected_columns):
+        if col in dummy_columns:
+            source, cat = dummy_columns[col]
+            X[:, j] = df[source].to_numpy() == cat
+        elif col in NUMERIC_COLS:
+            mean = scaler_params.loc[col, 'mean']
+            scale = scaler_params.loc[col, 'scale']
+            X[:, j] = (df[col].to_numpy(dtype=np.float64) - mean) / scale
+        elif col in df.columns:
+            X[:, j] = df[col].to_numpy()
+    
+    return X
+
+def raw_feature_groups(columns):
+    """Indices des colonnes encodées, regroupés par variable clinique d'origine"""
+    groups = {}
+    for j, col in enumerate(columns):
+        source = next((cat_col for cat_col in CATEGORIES if col.startswith(f"{cat_col}_")), col)
+        groups.setdefault(source, []).append(j)
+    return groups
+
 def apply_pca(X, n_components=None):
     """Applique l'analyse en composantes principales"""
     if n_components is None:
@@ -121,10 +162,15 @@ def split_data(df, target_col='target', test_size=0.2, random_state=42):
 
 if __name__ == "__main__":
     # Chargement des données
-    df = load_data('Base de donnée ML.csv')
+    df = load_data(DATA_PATH)
     
-    # Visualisation des données
-    visualize_data(df)
+    # Visualisation des données (seulement si les données ont changé)
+    figures = ['correlation_matrix.png'] + [f'distribution_{col}.png' for col in NUMERIC_COLS]
+    if any(is_stale(figure) for figure in figures):
+        visualize_data(df)
+        stamp_artifacts(figures)
+    else:
+        print("Figures à jour pour cette version des données.")
     
     # Prétraitement avec is_training=True pour l'entraînement initial
     df_processed = preprocess_data(df, is_training=True)
@@ -132,11 +178,16 @@ if __name__ == "__main__":
     # Division des données
     X_train, X_test, y_train, y_test = split_data(df_processed)
     
-    # Application de PCA
-    X_train_pca, pca = apply_pca(X_train)
-    X_test_pca = pca.transform(X_test)
-    
     print("Forme des données d'entraînement:", X_train.shape)
     print("Forme des données de test:", X_test.shape)
-    print("Forme des données PCA d'entraînement:", X_train_pca.shape)
-    print("Forme des données PCA de test:", X_test_pca.shape) 
\ No newline at end of file
+    
+    # Application de PCA (seulement si les données ont changé)
+    if is_stale('pca_variance.png'):
+        X_train_pca, pca = apply_pca(X_train)
+        X_test_pca = pca.transform(X_test)
+        stamp_artifacts(['pca_variance.png'])
+        
+        print("Forme des données PCA d'entraînement:", X_train_pca.shape)
+        print("Forme des données PCA de test:", X_test_pca.shape)
+    else:
+        print("Analyse PCA à jour pour cette version des données.")
\ No newline at end of file
@@ -0,0 +1,137 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from src.data_preprocessing import raw_feature_groups
+from src.ensemble import load_models
+from src.inference import MODEL_NAMES, predict_scores
+
+# Table des diagnostics lue par la page d'analyse des modèles
+DIAGNOSTICS_PATH = 'reports/diagnostics.csv'
+
+# Paramètres des diagnostics
+DIAGNOSTICS_PARAMS = {'n_repeats': 5, 'random_state': 42}
+
+# Tranches d'âge des sous-groupes
+AGE_BANDS = [0, 40, 50, 60, np.inf]
+AGE_LABELS = ['< 40 ans', '40-49 ans', '50-59 ans', '60 ans et plus']
+
+# État de chaque processus : modèles, jeu de test et prédictions de référence
+_worker_state = {}
+
+def _init_worker(model_names, X, y, baselines):
+    """Charge les modèles une seule fois par processus"""
+    _worker_state['models'] = load_models(model_names)
+    _worker_state['X'] = X
+    _worker_state['y'] = y
+    _worker_state['baselines'] = baselines
+
+def _sensitivity_task(name, variable, indices, seed, n_repeats):
+    """Permute une variable et compare aux prédictions de référence du modèle"""
+    model = _worker_state['models'][name]
+    X, y = _worker_state['X'], _worker_state['y']
+    base_pred, base_prob = _worker_state['baselines'][name]
+    rng = np.random.default_rng(seed)
+
+    changed, prob_shift, accuracy = [], [], []
+    X_permuted = X.copy()
+    for _ in range(n_repeats):
+        X_permuted[:, indices] = X[np.ix_(rng.permutation(len(X)), indices)]
+        y_pred, y_prob = predict_scores(model, X_permuted)
+        changed.append(np.mean(y_pred != base_pred))
+        accuracy.append(np.mean(y_pred == y))
+        if y_prob is not None:
+            prob_shift.append(np.mean(np.abs(y_prob - base_prob)))
+
+    return {
+        'Modèle': name,
+        'Analyse': 'Permutation',
+        'Groupe': variable,
+        'Effectif': len(X),
+        'Accuracy': np.mean(accuracy),
+        'Baisse d\'accuracy': np.mean(base_pred == y) - np.mean(accuracy),
+        'Prédictions modifiées': np.mean(changed),
+        'Écart de probabilité': np.mean(prob_shift) if prob_shift else np.nan
+    }
+
+def subgroup_metrics(name, y, y_pred, subgroups):
+    """Accuracy, rappel et taux de positifs par sous-groupe, à partir des prédictions de référence"""
+    rows = []
+    for label, mask in subgroups.items():
+        positives = y[mask] == 1
+        rows.append({
+            'Modèle': name,
+            'Analyse': 'Sous-groupe',
+            'Groupe': label,
+            'Effectif': int(mask.sum()),
+            'Accuracy': np.mean(y_pred[mask] == y[mask]) if mask.any() else np.nan,
+            'Rappel': np.mean(y_pred[mask][positives] == 1) if positives.any() else np.nan,
+            'Taux de positifs prédits': np.mean(y_pred[mask] == 1) if mask.any() else np.nan
+        })
+    return rows
+
+def define_subgroups(df_raw):
+    """Masques des sous-groupes (sexe, tranche d'âge) sur les données brutes"""
+    subgroups = {
+        'Homme': (df_raw['sex'] == 1).to_numpy(),
+        'Femme': (df_raw['sex'] == 0).to_numpy()
+    }
+    age_band = pd.cut(df_raw['age'], AGE_BANDS, right=False, labels=AGE_LABELS)
+    for label in AGE_LABELS:
+        subgroups[label] = (age_band == label).to_numpy()
+    return subgroups
+
+def run_diagnostics(X_test, y_test, df_raw, model_names=None, n_repeats=5, random_state=42,
+                    max_workers=None):
+    """Sensibilité aux variables et performances par sous-groupe de chaque modèle
+
+    Les prédictions de référence sont calculées une fois par modèle. Elles
+    servent aux métriques par sous-groupe et de point de comparaison pour les
+    permutations. Chaque couple (modèle, variable) est évalué dans un pool de
+    processus, où les modèles sont chargés une seule fois par processus.
+    """
+    models = load_models(model_names)
+    X = np.ascontiguousarray(X_test, dtype=np.float32)
+    y = np.asarray(y_test)
+    baselines = {name: predict_scores(model, X) for name, model in models.items()}
+    groups = raw_feature_groups(list(X_test.columns))
+
+    rows = []
+    subgroups = define_subgroups(df_raw)
+    for name, (y_pred, _) in baselines.items():
+        rows.extend(subgroup_metrics(name, y, y_pred, subgroups))
+
+    seeds = np.random.SeedSequence(random_state).generate_state(len(models) * len(groups))
+    tasks = [(name, variable, indices) for name in models for variable, indices in groups.items()]
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                             initargs=(list(models), X, y, baselines)) as executor:
+        futures = [executor.submit(_sensitivity_task, name, variable, indices, int(seed), n_repeats)
+                   for (name, variable, indices), seed in zip(tasks, seeds)]
+        rows.extend(future.result() for future in futures)
+
+    return pd.DataFrame(rows)
+
+def diagnostics_node(df, split, *model_rows):
+    """Nœud du pipeline : diagnostics de tous les modèles sur le jeu de test"""
+    print("\nDiagnostics des modèles")
+    X_train, X_test, y_train, y_test = split
+    diagnostics = run_diagnostics(X_test, y_test, df.loc[X_test.index], **DIAGNOSTICS_PARAMS)
+    diagnostics.to_csv(DIAGNOSTICS_PATH, index=False)
+    return diagnostics
+
+def load_diagnostics(path=DIAGNOSTICS_PATH):
+    """Table des diagnostics (None si elle n'a pas été calculée)"""
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path)
+
+if __name__ == "__main__":
+    diagnostics = load_diagnostics()
+    if diagnostics is None:
+        print("Diagnostics absents : lancer python -m src.model_training")
+    else:
+        for name in MODEL_NAMES:
+            model_diagnostics = diagnostics[diagnostics['Modèle'] == name]
+            if len(model_diagnostics):
+                print(f"\n{name}")
+                print(model_diagnostics.drop(columns='Modèle').round(4).to_string(index=False))
@@ -0,0 +1,101 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from src.parallel_preprocessing import preprocess_rows
+from src.inference import MODEL_NAMES, model_path, load_model, predict_scores, input_dtype
+from src.calibration import load_operating_point, apply_operating_point
+
+def load_models(model_names=None, dtype=np.float32):
+    """Charge tous les modèles disponibles dans models/"""
+    if model_names is None:
+        model_names = MODEL_NAMES
+    return {
+        name: load_model(name, dtype=dtype)
+        for name in model_names
+        if os.path.exists(model_path(name))
+    }
+
+def _score_model(name, model, X):
+    """Prédit avec un modèle et mesure le temps d'inférence"""
+    start = time.perf_counter()
+    y_pred, y_prob = predict_scores(model, X)
+    return name, y_pred, y_prob, time.perf_counter() - start
+
+def score_ensemble(df, models, max_workers=None, operating_points=None):
+    """Évalue chaque patient avec tous les modèles et avec un vote souple
+
+    Le prétraitement est fait une seule fois par type d'entrée (dans un pool de
+    processus pour les gros lots) et le tableau obtenu est partagé par les
+    modèles. Les prédictions sklearn libèrent le GIL dans leur code C, elles
+    sont donc exécutées en parallèle dans un pool de threads.
+
+    Chaque probabilité est calibrée et chaque décision prise au seuil du point
+    de fonctionnement de son modèle (chargés depuis models/ si operating_points
+    n'est pas fourni), comme pour un modèle seul. Le vote moyenne les
+    probabilités calibrées et les compare à la moyenne des seuils des votants.
+    Les modèles dont le point de fonctionnement est dégénéré (toujours la même
+    classe prédite) ne votent pas, sauf s'il ne reste aucun autre votant.
+
+    Retourne un dictionnaire avec :
+    - 'probabilities' : DataFrame (une colonne par modèle + 'Ensemble')
+    - 'predictions' : DataFrame des classes prédites (même colonnes)
+    - 'threshold' : seuil de décision de l'ensemble
+    - 'timings' : temps d'inférence par modèle et du prétraitement, en secondes
+    """
+    if not models:
+        raise ValueError("Aucun modèle disponible pour l'ensemble : lancez d'abord l'entraînement "
+                         "(python -m src.model_training)")
+
+    if operating_points is None:
+        operating_points = {name: load_operating_point(name) for name in models}
+
+    start = time.perf_counter()
+    # Un tableau par type d'entrée (float64 pour les modèles de FLOAT64_MODELS)
+    arrays = {dtype: preprocess_rows(df, dtype=dtype) for dtype in {input_dtype(name) for name in models}}
+    timings = {'Prétraitement': time.perf_counter() - start}
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(models)) as executor:
+        futures = [executor.submit(_score_model, name, model, arrays[input_dtype(name)])
+                   for name, model in models.items()]
+        outputs = [future.result() for future in futures]
+
+    probabilities = pd.DataFrame(index=df.index)
+    predictions = pd.DataFrame(index=df.index)
+    thresholds = {}
+    for name, y_pred, y_prob, elapsed in outputs:
+        timings[name] = elapsed
+        operating_point = operating_points.get(name)
+        if operating_point is not None and y_prob is not None:
+            y_prob, y_pred = apply_operating_point(operating_point, y_prob)
+        predictions[name] = y_pred
+        # Les modèles sans probabilité ne participent pas au vote souple
+        if y_prob is not None:
+            probabilities[name] = y_prob
+            thresholds[name] = operating_point['threshold'] if operating_point is not None else 0.5
+
+    # Vote souple : moyenne des probabilités calibrées des modèles probabilistes
+    voters = [name for name in thresholds
+              if not (operating_points.get(name) or {}).get('degenerate')] or list(thresholds)
+    threshold = float(np.mean([thresholds[name] for name in voters]))
+    probabilities['Ensemble'] = probabilities[voters].mean(axis=1)
+    predictions['Ensemble'] = (probabilities['Ensemble'] >= threshold).astype(int)
+
+    return {
+        'probabilities': probabilities,
+        'predictions': predictions,
+        'threshold': threshold,
+        'timings': timings
+    }
+
+if __name__ == "__main__":
+    from src.data_preprocessing import load_data
+
+    df = load_data('data/data.csv').drop(columns='target')
+    models = load_models()
+    scores = score_ensemble(df, models)
+    print(scores['probabilities'].describe())
+    print("\nTemps par étape (s):")
+    for name, elapsed in scores['timings'].items():
+        print(f"  {name}: {elapsed:.4f}")
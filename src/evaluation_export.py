@@ -0,0 +1,156 @@
+import os
+import glob
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+# Un fichier Parquet par exécution de l'entraînement
+EVALUATION_DIR = 'reports/evaluation'
+
+# Nombre d'exécutions gardées : les plus anciennes sont supprimées à chaque export
+EVALUATION_KEEP = 20
+
+# Nombre maximal de points gardés par courbe ROC ou précision-rappel
+CURVE_POINTS = 200
+
+# Métriques scalaires reprises de la ligne de résultats de chaque modèle
+EXPORTED_METRICS = ['Accuracy', 'Precision', 'Recall', 'F1-Score', 'AUC', 'CV Mean', 'CV Std',
+                    'Temps d\'entraînement (s)']
+
+# Colonnes du fichier : chaque tableau n'utilise que les siennes (les autres sont vides)
+COLUMNS = {
+    'Modèle': 'category',
+    'Tableau': 'category',
+    'Nom': 'category',
+    'Valeur': 'float32',
+    'Écart': 'float32',
+    'Impureté': 'float32',
+    'Classe réelle': 'Int8',
+    'Classe prédite': 'Int8',
+    'Effectif': 'Int64',
+    'Taux de faux positifs': 'float32',
+    'Taux de vrais positifs': 'float32',
+    'Rappel': 'float32',
+    'Précision': 'float32',
+    'Taille': 'Int64',
+    'Score entraînement': 'float32',
+    'Écart entraînement': 'float32',
+    'Score validation': 'float32',
+    'Écart validation': 'float32'
+}
+
+def downsample_curve(*arrays, n_points=CURVE_POINTS):
+    """Garde au plus n_points points d'une courbe, régulièrement espacés, extrémités comprises"""
+    n = len(arrays[0])
+    if n <= n_points:
+        return arrays
+    keep = np.unique(np.linspace(0, n - 1, n_points).round().astype(int))
+    return tuple(np.asarray(array)[keep] for array in arrays)
+
+def model_evaluation_table(name, row, metrics, learning):
+    """Tableaux d'évaluation d'un modèle (format long)
+
+    Regroupe les métriques scalaires de la ligne de résultats, les effectifs de
+    la matrice de confusion, les courbes ROC et précision-rappel sous-échantillonnées
+    et la courbe d'apprentissage.
+    """
+    cm = np.asarray(metrics['confusion_matrix'])
+    tables = [
+        pd.DataFrame({'Tableau': 'métriques',
+                      'Nom': [metric for metric in EXPORTED_METRICS if metric in row],
+                      'Valeur': [row[metric] for metric in EXPORTED_METRICS if metric in row]}),
+        pd.DataFrame({'Tableau': 'confusion',
+                      'Classe réelle': np.repeat([0, 1], 2),
+                      'Classe prédite': np.tile([0, 1], 2),
+                      'Effectif': cm.ravel()}),
+        learning.assign(Tableau='apprentissage')
+    ]
+    if 'roc' in metrics:
+        fpr, tpr, _ = metrics['roc']
+        fpr, tpr = downsample_curve(fpr, tpr)
+        tables.append(pd.DataFrame({'Tableau': 'roc', 'Taux de faux positifs': fpr, 'Taux de vrais positifs': tpr}))
+        precision, recall, _ = metrics['pr']
+        precision, recall = downsample_curve(precision, recall)
+        tables.append(pd.DataFrame({'Tableau': 'précision-rappel', 'Rappel': recall, 'Précision': precision}))
+    return pd.concat(tables, ignore_index=True).assign(Modèle=name)
+
+def importance_table(name, importance):
+    """Importance des variables d'un modèle (format long)"""
+    table = pd.DataFrame({
+        'Modèle': name,
+        'Tableau': 'importance',
+        'Nom': importance.index,
+        'Valeur': importance['Permutation'].to_numpy(),
+        'Écart': importance['Permutation (écart-type)'].to_numpy()
+    })
+    if 'Impureté' in importance:
+        table['Impureté'] = importance['Impureté'].to_numpy()
+    return table
+
+def evaluation_paths(run_dir=EVALUATION_DIR):
+    """Fichiers des exécutions exportées, du plus ancien au plus récent"""
+    return sorted(glob.glob(os.path.join(run_dir, 'evaluation_*.parquet')))
+
+def prune_evaluation_runs(run_dir=EVALUATION_DIR, keep=EVALUATION_KEEP):
+    """Supprime les exécutions au-delà des keep plus récentes, retourne les fichiers supprimés"""
+    removed = evaluation_paths(run_dir)[:-keep] if keep > 0 else []
+    for path in removed:
+        os.remove(path)
+    return removed
+
+def save_evaluation_run(tables, run_dir=EVALUATION_DIR, keep=EVALUATION_KEEP):
+    """Écrit les tableaux d'une exécution dans un seul fichier Parquet horodaté
+
+    Les tableaux sont empilés : les colonnes inutilisées d'un tableau sont
+    vides, ce qui ne coûte presque rien en stockage colonne. Seules les keep
+    dernières exécutions sont gardées.
+    """
+    evaluation = pd.concat(tables, ignore_index=True).reindex(columns=list(COLUMNS)).astype(COLUMNS)
+    os.makedirs(run_dir, exist_ok=True)
+    run_id = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    path = os.path.join(run_dir, f'evaluation_{run_id}.parquet')
+    tmp_path = f'{path}.tmp'
+    evaluation.to_parquet(tmp_path, index=False, compression='zstd')
+    os.replace(tmp_path, path)
+    prune_evaluation_runs(run_dir, keep)
+    return path
+
+def evaluation_node(*outputs):
+    """Nœud du pipeline : exporte l'évaluation de tous les modèles
+
+    Les dépendances alternent, pour chaque modèle, sa ligne de résultats et
+    son importance des variables.
+    """
+    tables = []
+    for row, importance in zip(outputs[::2], outputs[1::2]):
+        tables += [row['Évaluation'], importance_table(row['Modèle'], importance)]
+    path = save_evaluation_run(tables)
+    print(f"\nÉvaluation exportée : {path} ({os.path.getsize(path) / 1024:.1f} Ko)")
+    return path
+
+def latest_evaluation_path(run_dir=EVALUATION_DIR):
+    """Fichier de la dernière exécution (None s'il n'y en a pas)"""
+    paths = evaluation_paths(run_dir)
+    return paths[-1] if paths else None
+
+def load_evaluation(path=None):
+    """Tableaux d'évaluation d'une exécution (la dernière par défaut, None si absente)"""
+    path = path or latest_evaluation_path()
+    if path is None:
+        return None
+    return pd.read_parquet(path)
+
+def evaluation_table(evaluation, model_name, table):
+    """Un tableau d'un modèle, réduit à ses propres colonnes"""
+    rows = evaluation[(evaluation['Modèle'] == model_name) & (evaluation['Tableau'] == table)]
+    return rows.dropna(axis=1, how='all').drop(columns=['Modèle', 'Tableau']).reset_index(drop=True)
+
+if __name__ == "__main__":
+    for path in evaluation_paths():
+        print(f"{path} : {os.path.getsize(path) / 1024:.1f} Ko")
+    evaluation = load_evaluation()
+    if evaluation is None:
+        print("Aucune évaluation exportée : lancez python -m src.model_training")
+    else:
+        counts = evaluation.groupby(['Modèle', 'Tableau'], observed=True).size().unstack(fill_value=0)
+        print(counts.to_string())
@@ -0,0 +1,157 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from src.data_preprocessing import (load_data, preprocess_to_array, load_preprocessing_params,
+                                    raw_feature_groups)
+from src.inference import model_path, load_model
+from src.manifest import DATA_PATH, artifact_version
+from src.model_host import FlatTreeEnsemble
+
+# Modèles pour lesquels une explication est disponible
+EXPLAINABLE_MODELS = ['Régression Logistique', 'Arbre de Décision', 'Random Forest', 'XGBoost',
+                      'Random Forest compact']
+
+def tree_path_contributions(flat, X, class_index=1):
+    """Contributions des variables le long des chemins de décision (méthode de Saabas)
+
+    Chaque nœud traversé attribue à sa variable de coupure la variation de la
+    probabilité entre le nœud et l'enfant choisi. Pour chaque patient, la
+    probabilité moyenne des racines plus la somme des contributions donne
+    exactement la probabilité prédite. Le parcours est celui de
+    FlatTreeEnsemble.apply : le coût est celui d'une prédiction.
+    """
+    X = flat.encode(X)
+    n_samples, n_features = X.shape
+    n_trees = len(flat.roots)
+    value = flat.value[:, class_index]
+    node = np.tile(flat.roots, n_samples)
+    sample = np.repeat(np.arange(n_samples), n_trees)
+
+    contributions = np.zeros(n_samples * n_features)
+    active = np.flatnonzero(flat.children_left[node] != -1)
+    while len(active):
+        current = node[active]
+        feature = flat.feature[current]
+        go_left = X[sample[active], feature] <= flat.threshold[current]
+        child = np.where(go_left, flat.children_left[current], flat.children_right[current])
+        contributions += np.bincount(sample[active] * n_features + feature,
+                                     weights=value[child] - value[current],
+                                     minlength=n_samples * n_features)
+        node[active] = child
+        active = active[flat.children_left[child] != -1]
+
+    base_value = value[flat.roots].mean()
+    return base_value, contributions.reshape(n_samples, n_features) / n_trees
+
+def linear_contributions(model, X, background_mean):
+    """Contributions exactes d'un modèle linéaire : coefficient × écart à la moyenne (en log-odds)"""
+    coef = model.coef_[0]
+    base_value = model.intercept_[0] + coef @ background_mean
+    return base_value, (np.asarray(X, dtype=np.float64) - background_mean) * coef
+
+class ModelExplainer:
+    """Explications locales d'un modèle, préparées une seule fois par version du modèle
+
+    Les arbres sont aplatis (FlatTreeEnsemble) et la régression logistique
+    garde la moyenne des variables encodées sur le jeu de données. XGBoost
+    fournit ses valeurs de Shapley exactes en log-odds (TreeSHAP natif). Avec
+    exact=True, les modèles à base d'arbres utilisent shap.TreeExplainer
+    (valeurs de Shapley exactes, beaucoup plus lentes sur des arbres profonds).
+    """
+
+    def __init__(self, name, model, exact=False):
+        self.name = name
+        self.version = artifact_version(model_path(name))
+        _, self.columns = load_preprocessing_params()
+        self.groups = raw_feature_groups(self.columns)
+
+        # Matrice d'agrégation : colonnes encodées -> variables cliniques
+        self.aggregation = np.zeros((len(self.columns), len(self.groups)))
+        for k, indices in enumerate(self.groups.values()):
+            self.aggregation[indices, k] = 1.0
+
+        if hasattr(model, 'coef_'):
+            self.unit = 'log-odds'
+            df = load_data(DATA_PATH).drop(columns='target')
+            self.background_mean = preprocess_to_array(df, dtype=np.float64).mean(axis=0)
+            self.model = model
+        elif hasattr(model, 'contributions'):
+            self.unit = 'log-odds'
+            self.model = model
+        elif exact:
+            import shap
+            self.unit = 'probabilité'
+            self.model = shap.TreeExplainer(model)
+        else:
+            self.unit = 'probabilité'
+            self.model = model if isinstance(model, FlatTreeEnsemble) else FlatTreeEnsemble(model)
+
+    def explain_encoded(self, X):
+        """Valeur de base et contributions par colonne encodée (n_patients, n_colonnes)"""
+        if isinstance(self.model, FlatTreeEnsemble):
+            return tree_path_contributions(self.model, X)
+        if hasattr(self.model, 'contributions'):
+            return self.model.contributions(X)
+        if self.unit == 'log-odds':
+            return linear_contributions(self.model, X, self.background_mean)
+        values = self.model.shap_values(np.asarray(X, dtype=np.float32))
+        return self.model.expected_value[1], values[..., 1]
+
+    def explain(self, X):
+        """Valeur de base et contributions regroupées par variable clinique (DataFrame)"""
+        base_value, contributions = self.explain_encoded(X)
+        return base_value, pd.DataFrame(contributions @ self.aggregation, columns=list(self.groups))
+
+# Explicateurs déjà préparés : {(modèle, exact): ((taille, date du fichier), explicateur)}
+_explainers = {}
+
+def get_explainer(name, exact=False, model=None):
+    """Explicateur d'un modèle, reconstruit seulement si le fichier du modèle a changé
+
+    Avec model, l'explicateur s'appuie sur l'objet déjà servi (par exemple la
+    forêt aplatie de l'hôte en mémoire partagée) au lieu d'en charger une
+    seconde copie depuis models/.
+    """
+    if name not in EXPLAINABLE_MODELS:
+        raise ValueError(f"Pas d'explication disponible pour le modèle {name}")
+    stat = os.stat(model_path(name))
+    key = (stat.st_size, stat.st_mtime_ns, id(model))
+    cached = _explainers.get((name, exact))
+    if cached is None or cached[0] != key:
+        if model is None:
+            model = load_model(name, dtype=np.float32)
+        explainer = ModelExplainer(name, model, exact=exact)
+        _explainers[(name, exact)] = cached = (key, explainer)
+    return cached[1]
+
+def explain(df, name='Random Forest', exact=False):
+    """Explique les prédictions d'un DataFrame de patients (colonnes brutes)"""
+    return get_explainer(name, exact).explain(preprocess_to_array(df, dtype=np.float32))
+
+if __name__ == "__main__":
+    df = load_data(DATA_PATH).drop(columns='target').head(1000)
+    X = preprocess_to_array(df, dtype=np.float32)
+
+    for name in EXPLAINABLE_MODELS:
+        if not os.path.exists(model_path(name)):
+            continue
+        explainer = get_explainer(name)
+        model = load_model(name, dtype=np.float32)
+
+        start = time.perf_counter()
+        base_value, contributions = explainer.explain(X)
+        explain_time = time.perf_counter() - start
+        start = time.perf_counter()
+        if explainer.unit == 'log-odds':
+            output = model.decision_function(X)
+        else:
+            output = model.predict_proba(X)[:, 1]
+        predict_time = time.perf_counter() - start
+
+        # Précision locale : base + somme des contributions = sortie du modèle
+        error = np.abs(base_value + contributions.sum(axis=1) - output).max()
+        print(f"{name} (version {explainer.version}, {explainer.unit}) : "
+              f"explication {explain_time * 1000:.1f} ms, prédiction {predict_time * 1000:.1f} ms "
+              f"pour {len(X)} patients, écart max {error:.2e}")
+        print(contributions.abs().mean().sort_values(ascending=False).round(4).to_string())
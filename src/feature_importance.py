@@ -0,0 +1,79 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from src.data_preprocessing import raw_feature_groups
+from src.inference import MODEL_NAMES, model_slug, model_path, load_model
+
+# Paramètres de l'importance par permutation
+PERMUTATION_PARAMS = {'n_repeats': 5, 'random_state': 42}
+
+def importance_path(name):
+    """Chemin de l'importance des variables sauvegardée avec le modèle"""
+    return f'models/{model_slug(name)}_importance.csv'
+
+def impurity_importance(model, groups):
+    """Importance par diminution d'impureté, sommée par variable clinique"""
+    importance = model.feature_importances_
+    return pd.Series([importance[indices].sum() for indices in groups.values()], index=list(groups))
+
+def grouped_permutation_importance(model, X, y, groups, n_repeats=5, random_state=42, max_workers=None):
+    """Baisse d'accuracy quand une variable clinique est permutée sur un jeu de validation
+
+    Les colonnes encodées d'une même variable (dummies) sont permutées
+    ensemble, avec la même permutation des lignes. Les prédictions de référence
+    sont calculées une seule fois. Chaque couple (variable, répétition) est
+    évalué dans un pool de threads (les prédictions sklearn libèrent le GIL).
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    baseline = np.mean(model.predict(X) == y)
+
+    rng = np.random.default_rng(random_state)
+    tasks = [(indices, rng.permutation(len(X))) for indices in groups.values() for _ in range(n_repeats)]
+
+    def permuted_score(task):
+        indices, permutation = task
+        X_permuted = X.copy()
+        X_permuted[:, indices] = X[np.ix_(permutation, indices)]
+        return np.mean(model.predict(X_permuted) == y)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        scores = np.array(list(executor.map(permuted_score, tasks))).reshape(len(groups), n_repeats)
+
+    drops = baseline - scores
+    return pd.DataFrame({
+        'Permutation': drops.mean(axis=1),
+        'Permutation (écart-type)': drops.std(axis=1)
+    }, index=list(groups))
+
+def compute_feature_importance(name, model, X_test, y_test, params=None):
+    """Calcule et sauvegarde l'importance des variables cliniques d'un modèle"""
+    params = {**PERMUTATION_PARAMS, **(params or {})}
+    groups = raw_feature_groups(list(X_test.columns))
+    importance = grouped_permutation_importance(model, X_test, y_test, groups, **params)
+    if hasattr(model, 'feature_importances_'):
+        importance.insert(0, 'Impureté', impurity_importance(model, groups))
+    importance = importance.sort_values('Permutation', ascending=False)
+    importance.index.name = 'Variable'
+    importance.to_csv(importance_path(name))
+    return importance
+
+def importance_node(name, X_test, y_test):
+    """Nœud du pipeline : importance calculée sur le modèle sauvegardé et le jeu de test"""
+    print(f"\nImportance des variables: {name}")
+    return compute_feature_importance(name, load_model(name, dtype=np.float32), X_test, y_test)
+
+def load_feature_importance(name):
+    """Importance des variables d'un modèle (None si elle n'a pas été calculée)"""
+    path = importance_path(name)
+    if not os.path.exists(path):
+        return None
+    return pd.read_csv(path, index_col=0)
+
+if __name__ == "__main__":
+    for name in MODEL_NAMES:
+        importance = load_feature_importance(name)
+        if importance is not None:
+            print(f"\n{name}")
+            print(importance.round(4).to_string())
@@ -1,9 +1,31 @@
+import os
+import argparse
 import pandas as pd
 import numpy as np
 from sklearn.preprocessing import StandardScaler
+from src.manifest import DATA_PATH, hash_file, stamp_artifacts
+
+# Fichier source (jamais modifié) et fichier généré par défaut, distinct de data/data.csv
+SOURCE_PATH = 'Base de donnée ML.csv'
+OUTPUT_PATH = 'data/synthetic.csv'
+
+parser = argparse.ArgumentParser(description="Génère un jeu de données synthétique à partir du fichier source")
+parser.add_argument('--output', default=OUTPUT_PATH, help="fichier généré (défaut : %(default)s)")
+parser.add_argument('--overwrite', action='store_true',
+                    help=f"autorise l'écriture sur un fichier existant, y compris {DATA_PATH}")
+args = parser.parse_args()
+OUTPUT_PATH = args.output
+if os.path.abspath(OUTPUT_PATH) == os.path.abspath(SOURCE_PATH):
+    raise SystemExit(f"Le fichier source {SOURCE_PATH} n'est jamais écrasé")
+if os.path.exists(OUTPUT_PATH) and not args.overwrite:
+    raise SystemExit(f"{OUTPUT_PATH} existe déjà : relancez avec --overwrite pour le remplacer")
+
+# Graine fixe pour que la génération soit reproductible
+RANDOM_STATE = 42
+np.random.seed(RANDOM_STATE)
 
 # Charger les données existantes
-df_existing = pd.read_csv('Base de donnée ML.csv')
+df_existing = pd.read_csv(SOURCE_PATH)
 
 # Calculer les statistiques pour chaque colonne
 stats = df_existing.describe()
@@ -33,7 +55,12 @@ for column in df_existing.columns:
 # Combiner les données existantes avec les nouvelles
 combined_df = pd.concat([df_existing, new_data], ignore_index=True)
 
-# Sauvegarder le nouveau fichier
-combined_df.to_csv('Base de donnée ML.csv', index=False)
+# Sauvegarder le nouveau fichier, sans écraser la source
+os.makedirs(os.path.dirname(OUTPUT_PATH) or '.', exist_ok=True)
+combined_df.to_csv(OUTPUT_PATH, index=False)
+
+# Enregistrer la source et les paramètres qui ont produit ce jeu de données
+stamp_artifacts([OUTPUT_PATH], inputs=(SOURCE_PATH,), params={'n_new_rows': n_new_rows, 'random_state': RANDOM_STATE})
 
-print(f"Données générées avec succès. Nouveau nombre total d'observations : {len(combined_df)}") 
\ No newline at end of file
+print(f"Données générées avec succès. Nouveau nombre total d'observations : {len(combined_df)}")
+print(f"Version des données ({OUTPUT_PATH}) : {hash_file(OUTPUT_PATH)}") 
\ No newline at end of file
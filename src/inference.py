@@ -0,0 +1,148 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+import joblib
+from src.data_preprocessing import (load_data, preprocess_data, preprocess_to_array,
+                                    load_preprocessing_params)
+
+# Modèles entraînés par train_and_evaluate_models
+MODEL_NAMES = ['Régression Logistique', 'KNN', 'Arbre de Décision', 'Random Forest', 'KMeans', 'XGBoost']
+
+# Modèles sauvegardés dans leur format natif plutôt qu'avec joblib (extension du fichier)
+NATIVE_MODELS = {'XGBoost': 'ubj'}
+
+# Modèles qui calculent en float64 (points d'entraînement du KNN) : des entrées
+# float32 y passent par un chemin sklearn plus lent (types mixtes), ils reçoivent
+# donc des tableaux float64
+FLOAT64_MODELS = ['KNN']
+
+def model_slug(name):
+    """Nom de fichier d'un modèle (même convention que l'entraînement)"""
+    return name.lower().replace(" ", "_")
+
+def model_path(name):
+    """Chemin du fichier d'un modèle (joblib, ou format natif)"""
+    return f'models/{model_slug(name)}_model.{NATIVE_MODELS.get(name, "joblib")}'
+
+def save_model(name, model):
+    """Sauvegarde un modèle entraîné dans models/"""
+    if name in NATIVE_MODELS:
+        model.save_model(model_path(name))
+    else:
+        joblib.dump(model, model_path(name))
+
+def input_dtype(name, dtype=np.float32):
+    """Type des tableaux d'entrée d'un modèle en mode tableau"""
+    return np.float64 if name in FLOAT64_MODELS else dtype
+
+def load_model(name, dtype=None):
+    """Charge un modèle sauvegardé
+
+    Avec dtype=np.float32, le modèle est préparé pour recevoir directement les
+    tableaux produits par preprocess_to_array : l'ordre des colonnes est vérifié
+    une fois au chargement et les centroïdes KMeans sont convertis en float32.
+    Les modèles de FLOAT64_MODELS gardent leurs données en float64 et reçoivent
+    des tableaux de type input_dtype(name).
+    """
+    if name in NATIVE_MODELS:
+        from src.boosting import BoostedClassifier
+        model = BoostedClassifier.load_model(model_path(name))
+    else:
+        model = joblib.load(model_path(name))
+    if dtype is None:
+        return model
+
+    _, expected_columns = load_preprocessing_params()
+    feature_names = getattr(model, 'feature_names_in_', None)
+    if feature_names is not None:
+        if list(feature_names) != expected_columns:
+            raise ValueError(f"Les colonnes du modèle {name} ne correspondent pas à reports/feature_columns.csv")
+        # Les noms sont vérifiés ici, inutile de les revalider à chaque prédiction
+        del model.feature_names_in_
+
+    if hasattr(model, 'cluster_centers_'):
+        model.cluster_centers_ = np.ascontiguousarray(model.cluster_centers_, dtype=input_dtype(name, dtype))
+    return model
+
+def predict_scores(model, X):
+    """Retourne les prédictions et les probabilités de la classe positive
+
+    Les modèles sans predict_proba retournent None comme probabilité.
+    """
+    y_pred = model.predict(X)
+    if hasattr(model, 'predict_proba'):
+        y_prob = model.predict_proba(X)[:, 1]
+    else:
+        y_prob = None
+    return y_pred, y_prob
+
+def best_time(func, repeats=3):
+    """Meilleur temps d'exécution de func sur plusieurs essais (s) et son dernier résultat"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def check_float32_parity(data_path='data/data.csv', model_names=None, atol=1e-5, max_slowdown=1.1):
+    """Compare les prédictions float32 (tableaux) et float64 (DataFrames) sur tout le jeu de données
+
+    Le mode tableau doit donner les mêmes prédictions et ne pas être plus lent
+    que max_slowdown fois le chemin DataFrame (meilleur temps sur 3 essais).
+    """
+    if model_names is None:
+        model_names = MODEL_NAMES
+
+    df = load_data(data_path).drop(columns='target', errors='ignore')
+
+    start = time.perf_counter()
+    X64 = preprocess_data(df, is_training=False)
+    preprocess_time_64 = time.perf_counter() - start
+
+    start = time.perf_counter()
+    X32 = preprocess_to_array(df, dtype=np.float32)
+    preprocess_time_32 = time.perf_counter() - start
+    arrays = {np.float32: X32, np.float64: preprocess_to_array(df, dtype=np.float64)}
+
+    results = []
+    for name in model_names:
+        if not os.path.exists(model_path(name)):
+            print(f"Modèle {name} introuvable, ignoré")
+            continue
+
+        model64 = load_model(name)
+        model32 = load_model(name, dtype=np.float32)
+
+        time64, (pred64, prob64) = best_time(lambda: predict_scores(model64, X64))
+        time32, (pred32, prob32) = best_time(lambda: predict_scores(model32, arrays[input_dtype(name)]))
+
+        max_diff = np.abs(prob64 - prob32).max() if prob64 is not None else np.nan
+        agreement = np.mean(pred64 == pred32)
+        results.append({
+            'Modèle': name,
+            'Accord des prédictions': agreement,
+            'Écart max des probabilités': max_diff,
+            'Entrée': np.dtype(input_dtype(name)).name,
+            'Temps float64 (s)': time64,
+            'Temps float32 (s)': time32,
+            'Parité': bool(agreement == 1.0 and (prob64 is None or max_diff <= atol)),
+            'Ralentissement': bool(time32 > max_slowdown * time64)
+        })
+
+    results = pd.DataFrame(results)
+    results.attrs['preprocess_time_64'] = preprocess_time_64
+    results.attrs['preprocess_time_32'] = preprocess_time_32
+    return results
+
+if __name__ == "__main__":
+    parity = check_float32_parity()
+    print(f"Prétraitement float64 : {parity.attrs['preprocess_time_64']:.4f} s")
+    print(f"Prétraitement float32 : {parity.attrs['preprocess_time_32']:.4f} s")
+    print(parity.to_string(index=False))
+    if not parity['Parité'].all():
+        raise SystemExit("Écart de parité float32 détecté")
+    if parity['Ralentissement'].any():
+        slower = ', '.join(parity.loc[parity['Ralentissement'], 'Modèle'])
+        raise SystemExit(f"Mode tableau plus lent que le chemin DataFrame : {slower}")
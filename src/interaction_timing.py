@@ -0,0 +1,45 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+import pandas as pd
+
+class InteractionTimings:
+    """Temps serveur des interactions d'une session, par section de page
+
+    Une section est une page complète (rerun du script) ou un fragment
+    (rerun limité au graphique piloté par un widget). L'objet est gardé dans
+    st.session_state : chaque session a son propre historique, borné à
+    maxlen mesures.
+    """
+
+    def __init__(self, maxlen=200):
+        self.records = deque(maxlen=maxlen)
+
+    def record(self, section, elapsed):
+        """Ajoute une mesure (en secondes)"""
+        self.records.append((section, elapsed))
+
+    @contextmanager
+    def measure(self, section):
+        """Mesure le temps passé dans le bloc"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(section, time.perf_counter() - start)
+
+    def last(self, section):
+        """Dernière mesure d'une section, en millisecondes (None si absente)"""
+        for name, elapsed in reversed(self.records):
+            if name == section:
+                return elapsed * 1000
+        return None
+
+    def summary(self):
+        """Nombre d'interactions, temps médian et dernier temps de chaque section (ms)"""
+        if not self.records:
+            return pd.DataFrame(columns=['Interactions', 'Médiane (ms)', 'Dernière (ms)'])
+        df = pd.DataFrame(list(self.records), columns=['Section', 'Temps'])
+        df['Temps'] *= 1000
+        return df.groupby('Section', sort=False)['Temps'].agg(
+            **{'Interactions': 'size', 'Médiane (ms)': 'median', 'Dernière (ms)': 'last'})
@@ -0,0 +1,314 @@
+import io
+import os
+import glob
+import json
+import time
+import shutil
+import inspect
+import argparse
+import joblib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from src.manifest import fingerprint, artifact_version
+from src.parallel_preprocessing import scan_file_shards
+from src.batch_jobs import INPUT_COLUMNS, score_chunk
+from src.inference import model_path, load_model
+from src.calibration import load_operating_point
+from src.streaming_stats import StreamingStats
+from src.data_preprocessing import NUMERIC_COLS
+from src.validation import INPUT_SCHEMA, TRAINING_SCHEMA, validate, reason_labels, as_numeric
+
+# Points de reprise des tâches longues (un dossier par tâche)
+JOBS_DIR = '.cache/jobs'
+
+def _save_json(path, data):
+    """Écrit un fichier JSON de façon atomique"""
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def _run_chunk(run_task, task, part_path):
+    """Exécute un bloc : sa sortie est écrite à côté, puis renommée d'un coup
+
+    Un bloc interrompu ne laisse qu'un fichier temporaire, jamais une sortie
+    partielle : relancer le bloc donne le même résultat.
+    """
+    tmp_path = f'{part_path}.{os.getpid()}.tmp'
+    start = time.perf_counter()
+    rows = run_task(task, tmp_path)
+    os.replace(tmp_path, part_path)
+    return rows, time.perf_counter() - start
+
+class CheckpointedJob:
+    """Tâche longue découpée en blocs idempotents, reprise après interruption
+
+    Chaque bloc est décrit par un dictionnaire (task) et traité par
+    run_task(task, chemin de sortie), une fonction de module (exécutable dans
+    un autre processus). Le manifeste de la tâche (manifest.json) liste les
+    blocs terminés. Il n'est écrit que par le processus principal, après
+    chaque bloc et de façon atomique.
+
+    L'identifiant de la tâche est l'empreinte de son nom, de ses paramètres
+    et de ses blocs. Relancer la même tâche reprend aux blocs manquants. Si
+    l'entrée ou le modèle change, c'est une nouvelle tâche.
+    """
+
+    def __init__(self, name, tasks, run_task, params=None, jobs_dir=JOBS_DIR):
+        self.name = name
+        self.tasks = list(tasks)
+        self.run_task = run_task
+        self.params = params or {}
+        self.job_id = fingerprint({'name': name, 'params': self.params, 'tasks': self.tasks})[:16]
+        self.job_dir = os.path.join(jobs_dir, f'{name}-{self.job_id}')
+        self.manifest_path = os.path.join(self.job_dir, 'manifest.json')
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as f:
+                return json.load(f)
+        return {'name': self.name, 'params': self.params, 'chunks_total': len(self.tasks),
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'chunks': {}, 'failures': {}, 'output': None}
+
+    def _save_manifest(self):
+        os.makedirs(self.job_dir, exist_ok=True)
+        _save_json(self.manifest_path, self.manifest)
+
+    def part_path(self, index):
+        """Sortie d'un bloc"""
+        return os.path.join(self.job_dir, f'part-{index:06d}')
+
+    def pending(self):
+        """Indices des blocs à exécuter (absents du manifeste ou dont la sortie a disparu)"""
+        return [index for index in range(len(self.tasks))
+                if str(index) not in self.manifest['chunks'] or not os.path.exists(self.part_path(index))]
+
+    def status(self):
+        """Avancement : blocs terminés, restants, en échec, lignes traitées"""
+        chunks = self.manifest['chunks']
+        return {
+            'Tâche': f'{self.name}-{self.job_id}',
+            'Blocs terminés': len(self.tasks) - len(self.pending()),
+            'Blocs restants': len(self.pending()),
+            'Blocs en échec': len(self.manifest['failures']),
+            'Lignes traitées': sum(chunk['rows'] for chunk in chunks.values()),
+            'Sortie': self.manifest['output']
+        }
+
+    def _record(self, index, rows, duration):
+        self.manifest['chunks'][str(index)] = {'rows': rows, 'duration': duration}
+        self.manifest['failures'].pop(str(index), None)
+        self._save_manifest()
+
+    def run(self, workers=1, max_chunks=None, verbose=True):
+        """Exécute les blocs restants (au plus max_chunks), dans workers processus
+
+        Un bloc en échec est noté dans le manifeste sans arrêter les autres.
+        Une erreur est levée à la fin : relancer la tâche reprend les blocs
+        en échec et les blocs non exécutés.
+        """
+        pending = self.pending()[:max_chunks]
+        self._save_manifest()
+        # Fichiers temporaires laissés par une exécution interrompue (un seul exécutant par tâche)
+        for path in glob.glob(os.path.join(self.job_dir, 'part-*.tmp')):
+            os.remove(path)
+        done = 0
+
+        def report(index, result=None, error=None):
+            nonlocal done
+            if error is not None:
+                self.manifest['failures'][str(index)] = error
+                self._save_manifest()
+                return
+            self._record(index, *result)
+            done += 1
+            if verbose:
+                print(f"[{self.name}] bloc {index} terminé ({done}/{len(pending)}, "
+                      f"{result[0]} lignes en {result[1]:.2f} s)")
+
+        if workers == 1:
+            for index in pending:
+                try:
+                    report(index, _run_chunk(self.run_task, self.tasks[index], self.part_path(index)))
+                except Exception as e:
+                    report(index, error=repr(e))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_run_chunk, self.run_task, self.tasks[index], self.part_path(index)): index
+                           for index in pending}
+                for future in as_completed(futures):
+                    try:
+                        report(futures[future], future.result())
+                    except Exception as e:
+                        report(futures[future], error=repr(e))
+
+        failures = [int(index) for index in self.manifest['failures']]
+        if failures:
+            raise RuntimeError(f"{len(failures)} bloc(s) en échec ({self.manifest_path}) : "
+                               "relancer la tâche pour les reprendre")
+        return self.status()
+
+    def merge(self, output_path, merge_parts):
+        """Assemble les sorties des blocs, dans l'ordre, puis remplace output_path d'un coup
+
+        merge_parts(chemins des blocs, chemin temporaire) écrit le résultat.
+        Le fichier final n'apparaît qu'une fois complet (os.replace).
+        """
+        if self.pending():
+            raise RuntimeError(f"Tâche incomplète : {len(self.pending())} bloc(s) restant(s)")
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        tmp_path = f'{output_path}.tmp'
+        merge_parts([self.part_path(index) for index in range(len(self.tasks))], tmp_path)
+        os.replace(tmp_path, output_path)
+        self.manifest['output'] = output_path
+        self._save_manifest()
+        return output_path
+
+    def cleanup(self):
+        """Supprime les sorties des blocs et le manifeste"""
+        shutil.rmtree(self.job_dir, ignore_errors=True)
+
+def file_tasks(input_path, chunk_rows, **fields):
+    """Un bloc par tranche de chunk_rows lignes du fichier CSV (plages d'octets)"""
+    header, n_rows, shards = scan_file_shards(input_path, chunk_rows)
+    return [{'path': input_path, 'header': header.decode('utf-8'), 'start': start, 'end': end,
+             'first_row': first_row, **fields}
+            for start, end, first_row in shards]
+
+def file_identity(path):
+    """Taille et date de modification d'un fichier (changement d'entrée = nouvelle tâche)"""
+    stat = os.stat(path)
+    return {'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def code_version(*functions):
+    """Empreinte du code d'un bloc : une correction invalide les points de reprise existants"""
+    return fingerprint([inspect.getsource(f) for f in functions])[:16]
+
+def read_chunk(task):
+    """Lit les lignes d'un bloc (plage d'octets du fichier, avec l'en-tête)"""
+    with open(task['path'], 'rb') as f:
+        f.seek(task['start'])
+        data = f.read(task['end'] - task['start'])
+    return pd.read_csv(io.BytesIO(task['header'].encode('utf-8') + data))
+
+# Modèles chargés une fois par processus de travail
+_scoring_models = {}
+
+def score_file_chunk(task, part_path):
+    """Bloc de score : prédictions des lignes valides, motif de rejet des autres (CSV sans en-tête)"""
+    name = task['model']
+    if name not in _scoring_models:
+        _scoring_models[name] = (load_model(name), load_operating_point(name))
+    model, operating_point = _scoring_models[name]
+
+    df = read_chunk(task).drop(columns='target', errors='ignore')
+    codes = validate(df, INPUT_SCHEMA)
+    valid = codes == 0
+    predictions = np.zeros(len(df), dtype=int)
+    probabilities = np.full(len(df), np.nan)
+    if valid.any():
+        # Types rétablis sur les lignes valides : les types du bloc sont déduits de ce seul bloc
+        y_pred, y_prob = score_chunk(as_numeric(df.loc[valid, INPUT_COLUMNS], INPUT_SCHEMA), model, operating_point)
+        predictions[valid] = y_pred
+        probabilities[valid] = y_prob if y_prob is not None else np.nan
+    df['prediction'] = pd.arrays.IntegerArray(predictions, ~valid)
+    df['probabilite'] = probabilities
+    df['motif de rejet'] = reason_labels(INPUT_SCHEMA)[codes]
+    df.to_csv(part_path, index=False, header=False)
+    return len(df)
+
+def concatenate_csv_parts(header):
+    """Fusion des blocs CSV : en-tête puis contenu des blocs, copié sans être parsé"""
+    def merge_parts(part_paths, output_path):
+        with open(output_path, 'wb') as output:
+            output.write(header.encode('utf-8'))
+            for part_path in part_paths:
+                with open(part_path, 'rb') as part:
+                    shutil.copyfileobj(part, output, 1 << 24)
+    return merge_parts
+
+def run_job(job, output_path, merge_parts, workers=1, max_chunks=None):
+    """Exécute les blocs restants, puis écrit la sortie si tous sont terminés"""
+    job.run(workers, max_chunks)
+    if not job.pending():
+        job.merge(output_path, merge_parts)
+    return job.status()
+
+def scoring_job(input_path, model_name, chunk_rows=100_000, jobs_dir=JOBS_DIR):
+    """Tâche de score d'un fichier CSV de patients par un modèle"""
+    params = {'input': file_identity(input_path), 'model': model_name,
+              'model_version': artifact_version(model_path(model_name)), 'chunk_rows': chunk_rows,
+              'code': code_version(score_file_chunk, score_chunk, validate, as_numeric)}
+    tasks = file_tasks(input_path, chunk_rows, model=model_name)
+    return CheckpointedJob('score', tasks, score_file_chunk, params, jobs_dir)
+
+def scoring_header(input_path):
+    """En-tête du fichier de prédictions : colonnes d'entrée (sans la cible) et résultats"""
+    columns = [col for col in pd.read_csv(input_path, nrows=0).columns if col != 'target']
+    return ','.join(columns + ['prediction', 'probabilite', 'motif de rejet']) + '\n'
+
+def score_file(input_path, output_path, model_name='Random Forest', chunk_rows=100_000, workers=1,
+               max_chunks=None, jobs_dir=JOBS_DIR):
+    """Score un fichier CSV par blocs, avec reprise ; écrit output_path quand tous les blocs sont faits"""
+    job = scoring_job(input_path, model_name, chunk_rows, jobs_dir)
+    return run_job(job, output_path, concatenate_csv_parts(scoring_header(input_path)), workers, max_chunks)
+
+def stats_file_chunk(task, part_path):
+    """Bloc de statistiques : moments et quantiles des lignes valides (fusionnables)"""
+    df = read_chunk(task)
+    schema = TRAINING_SCHEMA if 'target' in df.columns else INPUT_SCHEMA
+    valid = validate(df, schema) == 0
+    stats = StreamingStats(task['columns']).update(as_numeric(df.loc[valid, task['columns']], schema))
+    joblib.dump(stats, part_path)
+    return int(valid.sum())
+
+def merge_scaler_params(part_paths, output_path):
+    """Fusion des statistiques des blocs : paramètres du scaler (moyenne, écart type)"""
+    stats = joblib.load(part_paths[0])
+    for part_path in part_paths[1:]:
+        stats.merge(joblib.load(part_path))
+    stats.scaler_params().to_csv(output_path)
+
+def scaler_job(input_path, chunk_rows=1_000_000, columns=NUMERIC_COLS, jobs_dir=JOBS_DIR):
+    """Tâche de calcul des paramètres du scaler sur un fichier d'entraînement volumineux"""
+    params = {'input': file_identity(input_path), 'columns': list(columns), 'chunk_rows': chunk_rows,
+              'code': code_version(stats_file_chunk, validate, as_numeric)}
+    tasks = file_tasks(input_path, chunk_rows, columns=list(columns))
+    return CheckpointedJob('scaler', tasks, stats_file_chunk, params, jobs_dir)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tâches longues par blocs, avec reprise après interruption")
+    parser.add_argument('kind', choices=['score', 'scaler'],
+                        help="score : prédictions d'un fichier ; scaler : paramètres du scaler d'un fichier d'entraînement")
+    parser.add_argument('input', help="fichier CSV d'entrée")
+    parser.add_argument('output', nargs='?', default=None,
+                        help="fichier de sortie (par défaut : <entrée>_predictions.csv ou reports/scaler_params.csv)")
+    parser.add_argument('--model', default='Random Forest', help="modèle de score")
+    parser.add_argument('--chunk-rows', type=int, default=None, help="lignes par bloc")
+    parser.add_argument('--workers', type=int, default=1, help="processus en parallèle")
+    parser.add_argument('--max-chunks', type=int, default=None,
+                        help="exécute au plus ce nombre de blocs (la tâche reprendra au suivant)")
+    parser.add_argument('--status', action='store_true', help="affiche l'avancement sans rien exécuter")
+    parser.add_argument('--clean', action='store_true', help="supprime les points de reprise une fois la sortie écrite")
+    args = parser.parse_args()
+
+    if args.kind == 'score':
+        output = args.output or f'{os.path.splitext(args.input)[0]}_predictions.csv'
+        job = scoring_job(args.input, args.model, args.chunk_rows or 100_000)
+        merge_parts = concatenate_csv_parts(scoring_header(args.input))
+    else:
+        output = args.output or 'reports/scaler_params.csv'
+        job = scaler_job(args.input, args.chunk_rows or 1_000_000)
+        merge_parts = merge_scaler_params
+
+    if not args.status:
+        start = time.perf_counter()
+        run_job(job, output, merge_parts, args.workers, args.max_chunks)
+        print(f"Durée : {time.perf_counter() - start:.1f} s")
+    print(pd.Series(job.status()).to_string())
+    if args.clean and job.manifest['output']:
+        job.cleanup()
@@ -0,0 +1,267 @@
+import os
+import json
+import time
+import argparse
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+import pandas as pd
+from src.batch_jobs import INPUT_COLUMNS
+from src.manifest import DATA_PATH
+from src.memory_profiling import rss_mb
+
+# Résultats des tirs de charge, un fichier JSON par exécution
+LOAD_TEST_DIR = 'reports/load_tests'
+
+# Répartition par défaut des requêtes entre les choix de la page de prédiction
+DEFAULT_MIX = {'Random Forest': 0.6, 'XGBoost': 0.3, 'Ensemble': 0.1}
+
+def synthetic_patients(n, data_path=DATA_PATH, random_state=42):
+    """Patients synthétiques : chaque variable est tirée de sa distribution dans data/data.csv
+
+    Les variables sont tirées indépendamment, ce qui crée des combinaisons
+    absentes du jeu de données, comme les saisies libres de la page de
+    prédiction.
+    """
+    df = pd.read_csv(data_path)[INPUT_COLUMNS]
+    rng = np.random.default_rng(random_state)
+    return pd.DataFrame({col: df[col].to_numpy()[rng.integers(0, len(df), n)] for col in INPUT_COLUMNS})
+
+def parse_mix(text):
+    """'Random Forest=0.6,Ensemble=0.4' -> {'Random Forest': 0.6, 'Ensemble': 0.4} (normalisé)"""
+    mix = {}
+    for item in text.split(','):
+        name, weight = item.rsplit('=', 1)
+        mix[name.strip()] = float(weight)
+    total = sum(mix.values())
+    return {name: weight / total for name, weight in mix.items()}
+
+class LocalTarget:
+    """Chemin de prédiction de app.py, exécuté dans le processus courant
+
+    Les modèles et les points de fonctionnement sont chargés une fois, comme
+    les ressources mises en cache par Streamlit. Chaque requête refait le
+    prétraitement puis la prédiction, comme un clic sur « Obtenir la
+    Prédiction ».
+    """
+
+    def __init__(self, model_names):
+        from src.model_host import load_served_models
+        from src.calibration import load_operating_point
+        self.models = load_served_models()
+        self.operating_points = {name: load_operating_point(name) for name in model_names if name != 'Ensemble'}
+        missing = [name for name in model_names if name != 'Ensemble' and name not in self.models]
+        if missing:
+            raise ValueError(f"Modèles introuvables : {', '.join(missing)}")
+
+    def __call__(self, model_name, patients):
+        from src.data_preprocessing import preprocess_to_array
+        from src.inference import input_dtype
+        from src.calibration import apply_operating_point
+        from src.ensemble import score_ensemble
+
+        if model_name == 'Ensemble':
+            return score_ensemble(patients, self.models)['probabilities']['Ensemble'].to_numpy()
+        X = preprocess_to_array(patients, dtype=input_dtype(model_name))
+        probability = self.models[model_name].predict_proba(X)[:, 1]
+        operating_point = self.operating_points[model_name]
+        if operating_point is not None:
+            probability, _ = apply_operating_point(operating_point, probability)
+        return probability
+
+class HttpTarget:
+    """Service de score HTTP : POST JSON {"model": ..., "patients": [...]}"""
+
+    def __init__(self, url, timeout=30):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, model_name, patients):
+        body = json.dumps({'model': model_name, 'patients': patients.to_dict('records')}).encode('utf-8')
+        request = urllib.request.Request(self.url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return response.read()
+
+def _run_worker(config, worker_index):
+    """Un processus de service : clients concurrents (threads) pendant la durée du tir
+
+    Sans taux d'arrivée, chaque client enchaîne ses requêtes (boucle fermée).
+    Avec un taux, les arrivées suivent un processus de Poisson (boucle
+    ouverte) et la latence est comptée depuis l'instant d'arrivée prévu :
+    l'attente dans la file est incluse.
+    """
+    rng = np.random.default_rng([config['random_state'], worker_index])
+    mix = config['mix']
+    names = list(mix)
+    patients = synthetic_patients(config['pool_size'], random_state=config['random_state'] + worker_index)
+    rss_before, _ = rss_mb()
+    target = HttpTarget(config['url']) if config['url'] else LocalTarget(names)
+    rss_loaded, _ = rss_mb()
+
+    lock = threading.Lock()
+    records = []
+
+    def request(scheduled, choice, start_row):
+        batch = patients.iloc[start_row:start_row + config['batch_size']]
+        started = time.perf_counter()
+        try:
+            target(names[choice], batch)
+            ok = True
+        except Exception:
+            ok = False
+        finished = time.perf_counter()
+        with lock:
+            records.append((choice, finished - scheduled, finished - started, ok))
+
+    def next_request():
+        return int(rng.choice(len(names), p=list(mix.values()))), int(rng.integers(0, config['pool_size'] - config['batch_size'] + 1))
+
+    n_clients = config['clients_per_worker']
+    start = time.perf_counter()
+    deadline = start + config['duration']
+    if config['rate'] is None:
+        def client(seed):
+            client_rng = np.random.default_rng(seed)
+            while time.perf_counter() < deadline:
+                choice = int(client_rng.choice(len(names), p=list(mix.values())))
+                row = int(client_rng.integers(0, config['pool_size'] - config['batch_size'] + 1))
+                request(time.perf_counter(), choice, row)
+        seeds = np.random.SeedSequence([config['random_state'], worker_index]).spawn(n_clients)
+        threads = [threading.Thread(target=client, args=(seed,)) for seed in seeds]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        rate = config['rate'] / config['workers']
+        with ThreadPoolExecutor(max_workers=n_clients) as executor:
+            scheduled = start
+            while True:
+                scheduled += rng.exponential(1 / rate)
+                if scheduled >= deadline:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(request, scheduled, *next_request())
+    elapsed = time.perf_counter() - start
+
+    rss_after, rss_peak = rss_mb()
+    records = np.array(records, dtype=[('choice', 'i4'), ('latency', 'f8'), ('service', 'f8'), ('ok', '?')])
+    return {
+        'worker': worker_index,
+        'pid': os.getpid(),
+        'elapsed': elapsed,
+        'records': records,
+        'memory': {
+            'RSS au démarrage (Mo)': rss_before,
+            'RSS après chargement (Mo)': rss_loaded,
+            'RSS final (Mo)': rss_after,
+            'Pic de RSS (Mo)': rss_peak
+        }
+    }
+
+def latency_summary(latencies):
+    """Percentiles de latence en millisecondes"""
+    if len(latencies) == 0:
+        return {'p50 (ms)': None, 'p95 (ms)': None, 'p99 (ms)': None, 'max (ms)': None}
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {'p50 (ms)': p50, 'p95 (ms)': p95, 'p99 (ms)': p99, 'max (ms)': float(latencies.max() * 1000)}
+
+def run_load_test(concurrency=4, workers=1, duration=10.0, rate=None, mix=None, batch_size=1,
+                  url=None, pool_size=10_000, random_state=42):
+    """Tir de charge sur le chemin de prédiction (local) ou sur un service HTTP
+
+    concurrency clients sont répartis entre workers processus de service
+    (chacun charge ses modèles une fois). rate est le taux d'arrivée total
+    en requêtes par seconde (None : boucle fermée, chaque client enchaîne
+    ses requêtes). Chaque requête score batch_size patients synthétiques.
+    """
+    mix = mix or DEFAULT_MIX
+    config = {
+        'concurrency': concurrency, 'workers': workers, 'clients_per_worker': max(1, concurrency // workers),
+        'duration': duration, 'rate': rate, 'mix': mix, 'batch_size': batch_size, 'url': url,
+        'pool_size': pool_size, 'random_state': random_state
+    }
+    if workers == 1:
+        outputs = [_run_worker(config, 0)]
+    else:
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            outputs = list(executor.map(_run_worker, [config] * workers, range(workers)))
+
+    records = np.concatenate([output['records'] for output in outputs])
+    elapsed = max(output['elapsed'] for output in outputs)
+    ok = records[records['ok']]
+    names = list(mix)
+    per_model = {}
+    for choice, name in enumerate(names):
+        model_records = ok[ok['choice'] == choice]
+        per_model[name] = {'Requêtes': int(len(model_records)), **latency_summary(model_records['latency'])}
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'config': {key: value for key, value in config.items() if key != 'clients_per_worker'},
+        'summary': {
+            'Requêtes': int(len(records)),
+            'Erreurs': int((~records['ok']).sum()),
+            'Débit (requêtes/s)': len(ok) / elapsed,
+            'Patients/s': len(ok) * batch_size / elapsed,
+            **latency_summary(ok['latency']),
+            'Temps de service p50 (ms)': float(np.median(ok['service']) * 1000) if len(ok) else None
+        },
+        'models': per_model,
+        'workers': [{'Processus': output['pid'], **output['memory']} for output in outputs]
+    }
+
+def save_results(results, label=None, directory=LOAD_TEST_DIR):
+    """Enregistre un tir dans reports/load_tests/ et retourne le chemin"""
+    os.makedirs(directory, exist_ok=True)
+    stamp = results['timestamp'].replace(':', '').replace('-', '')
+    path = os.path.join(directory, f"{stamp}_{label or 'local'}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    return path
+
+def compare_results(baseline, current):
+    """Écarts entre deux tirs (résumés), en valeur et en pourcentage"""
+    rows = []
+    for key, value in current['summary'].items():
+        reference = baseline['summary'].get(key)
+        if isinstance(value, (int, float)) and isinstance(reference, (int, float)):
+            rows.append({
+                'Mesure': key, 'Référence': reference, 'Actuel': value,
+                'Écart (%)': (value - reference) / reference * 100 if reference else np.nan
+            })
+    return pd.DataFrame(rows).set_index('Mesure')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tir de charge du chemin de prédiction")
+    parser.add_argument('--concurrency', type=int, default=4, help="clients simultanés")
+    parser.add_argument('--workers', type=int, default=1, help="processus de service")
+    parser.add_argument('--duration', type=float, default=10.0, help="durée du tir (s)")
+    parser.add_argument('--rate', type=float, default=None,
+                        help="taux d'arrivée total (requêtes/s) ; par défaut, boucle fermée")
+    parser.add_argument('--mix', type=parse_mix, default=None,
+                        help="répartition des requêtes, ex. 'Random Forest=0.6,XGBoost=0.3,Ensemble=0.1'")
+    parser.add_argument('--batch-size', type=int, default=1, help="patients par requête")
+    parser.add_argument('--url', default=None, help="service de score HTTP à tester à la place du chemin local")
+    parser.add_argument('--label', default=None, help="suffixe du fichier de résultats")
+    parser.add_argument('--baseline', default=None, help="tir de référence (JSON) pour comparaison")
+    args = parser.parse_args()
+
+    results = run_load_test(args.concurrency, args.workers, args.duration, args.rate, args.mix,
+                            args.batch_size, args.url)
+    path = save_results(results, args.label)
+
+    print(pd.Series(results['summary']).round(2).to_string())
+    print()
+    print(pd.DataFrame(results['models']).T.round(2).to_string())
+    print()
+    print(pd.DataFrame(results['workers']).round(1).to_string(index=False))
+    print(f"\nRésultats : {path}")
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            print(compare_results(json.load(f), results).round(2).to_string())
@@ -0,0 +1,129 @@
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+
+# Manifeste des artefacts dérivés et des données qui les ont produits
+MANIFEST_PATH = 'reports/manifest.json'
+
+# Jeu de données de référence du pipeline
+DATA_PATH = 'data/data.csv'
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """Charge le manifeste (vide s'il n'existe pas encore)"""
+    if not os.path.exists(manifest_path):
+        return {'files': {}, 'artifacts': {}}
+    with open(manifest_path, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_manifest(manifest, manifest_path=MANIFEST_PATH):
+    """Écrit le manifeste de façon atomique"""
+    os.makedirs(os.path.dirname(manifest_path) or '.', exist_ok=True)
+    tmp_path = f'{manifest_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+def hash_file(path, chunk_size=1 << 20, manifest=None):
+    """Empreinte BLAKE2b du contenu d'un fichier, lu par blocs
+
+    Si un manifeste est fourni, l'empreinte est réutilisée tant que la taille et
+    la date de modification du fichier n'ont pas changé.
+    """
+    stat = os.stat(path)
+    if manifest is not None:
+        cached = manifest['files'].get(path)
+        if cached and cached['size'] == stat.st_size and cached['mtime_ns'] == stat.st_mtime_ns:
+            return cached['hash']
+
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    file_hash = digest.hexdigest()
+
+    if manifest is not None:
+        manifest['files'][path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': file_hash}
+    return file_hash
+
+def fingerprint(params):
+    """Empreinte stable d'un ensemble de paramètres sérialisables"""
+    payload = json.dumps(params, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def dataset_hash(data_path=DATA_PATH):
+    """Version du jeu de données (empreinte de son contenu)"""
+    manifest = load_manifest()
+    data_hash = hash_file(data_path, manifest=manifest)
+    save_manifest(manifest)
+    return data_hash
+
+def artifact_version(path):
+    """Version courte d'un artefact (modèle, rapport) pour l'affichage et la traçabilité"""
+    return hash_file(path)[:12]
+
+def stamp_artifacts(artifacts, inputs=(DATA_PATH,), params=None):
+    """Enregistre les entrées et paramètres qui ont produit des artefacts"""
+    manifest = load_manifest()
+    input_hashes = {path: hash_file(path, manifest=manifest) for path in inputs}
+    created = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    for artifact in artifacts:
+        manifest['artifacts'][artifact] = {
+            'inputs': input_hashes,
+            'params': fingerprint(params),
+            'hash': hash_file(artifact, manifest=manifest),
+            'created': created
+        }
+    save_manifest(manifest)
+
+def stale_reason(artifact, inputs=(DATA_PATH,), params=None, manifest=None):
+    """Raison pour laquelle un artefact doit être recalculé (None s'il est à jour)"""
+    if manifest is None:
+        manifest = load_manifest()
+    if not os.path.exists(artifact):
+        return 'absent'
+    record = manifest['artifacts'].get(artifact)
+    if record is None:
+        return 'non enregistré'
+    if set(record['inputs']) != set(inputs):
+        return 'entrées modifiées'
+    for path in inputs:
+        if not os.path.exists(path) or hash_file(path, manifest=manifest) != record['inputs'][path]:
+            return f'{path} modifié'
+    if record['params'] != fingerprint(params):
+        return 'paramètres modifiés'
+    if hash_file(artifact, manifest=manifest) != record['hash']:
+        return 'artefact modifié'
+    return None
+
+def is_stale(artifact, inputs=(DATA_PATH,), params=None):
+    """Indique si un artefact doit être recalculé"""
+    return stale_reason(artifact, inputs, params) is not None
+
+def stale_artifacts(manifest_path=MANIFEST_PATH):
+    """Liste les artefacts enregistrés dont les entrées ont changé depuis leur création"""
+    manifest = load_manifest(manifest_path)
+    stale = {}
+    for artifact, record in manifest['artifacts'].items():
+        if not os.path.exists(artifact):
+            stale[artifact] = 'absent'
+            continue
+        for path, recorded_hash in record['inputs'].items():
+            if not os.path.exists(path) or hash_file(path, manifest=manifest) != recorded_hash:
+                stale[artifact] = f'{path} modifié'
+                break
+        else:
+            if hash_file(artifact, manifest=manifest) != record['hash']:
+                stale[artifact] = 'artefact modifié'
+    save_manifest(manifest, manifest_path)
+    return stale
+
+if __name__ == "__main__":
+    print(f"Version des données ({DATA_PATH}) : {dataset_hash()}")
+    stale = stale_artifacts()
+    if stale:
+        print("Artefacts à recalculer :")
+        for artifact, reason in stale.items():
+            print(f"  {artifact} ({reason})")
+    else:
+        print("Tous les artefacts enregistrés sont à jour.")
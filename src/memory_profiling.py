@@ -0,0 +1,256 @@
+import os
+import glob
+import json
+import time
+import argparse
+import threading
+import tracemalloc
+from contextlib import contextmanager
+import pandas as pd
+from src.batch_jobs import INPUT_COLUMNS, DONE, FAILED, BatchJobManager
+from src.data_preprocessing import load_data
+from src.inference import MODEL_NAMES, model_path
+
+# Rapports de mémoire (un fichier JSON par exécution profilée)
+MEMORY_DIR = 'reports/memory'
+
+# Niveaux de pile des profils en ligne de commande : assez pour remonter des
+# bibliothèques (numpy, scikit-learn) jusqu'aux lignes du projet
+PROFILE_FRAMES = 10
+
+def _status_mb(pid='self'):
+    """VmRSS et VmHWM (pic) d'un processus, en Mo (Linux)"""
+    with open(f'/proc/{pid}/status') as f:
+        fields = dict(line.split(':', 1) for line in f if ':' in line)
+    return int(fields['VmRSS'].split()[0]) / 1024, int(fields['VmHWM'].split()[0]) / 1024
+
+def rss_mb():
+    """Mémoire résidente (RSS) et pic de RSS du processus courant, en Mo (Linux)"""
+    return _status_mb()
+
+def children_rss_mb(pid=None):
+    """RSS cumulée des processus descendants (workers joblib, pools de processus), en Mo"""
+    pid = pid or os.getpid()
+    total = 0.0
+    stack = [pid]
+    while stack:
+        parent = stack.pop()
+        for path in glob.glob(f'/proc/{parent}/task/*/children'):
+            try:
+                with open(path) as f:
+                    children = [int(child) for child in f.read().split()]
+            except OSError:
+                continue
+            for child in children:
+                try:
+                    total += _status_mb(child)[0]
+                except (OSError, KeyError):
+                    continue
+                stack.append(child)
+    return total
+
+def reset_peak_rss():
+    """Remet à zéro le pic de RSS du processus (VmHWM), si le noyau le permet"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+class MemoryProfiler:
+    """Mémoire de chaque étape : pic de RSS et principaux allocateurs Python
+
+    Pour chaque étape (stage), le profileur relève :
+    - la RSS au début et à la fin et le pic de RSS du processus ;
+    - le pic de RSS en comptant les processus enfants (learning_curve avec
+      n_jobs=-1, pools de processus), échantillonné toutes les
+      sample_interval secondes par un thread ;
+    - le pic et le solde des allocations Python suivies par tracemalloc ;
+    - les top_n lignes de code qui ont le plus alloué pendant l'étape
+      (mémoire encore allouée à la fin de l'étape).
+
+    tracemalloc garde frames niveaux de pile par allocation. Avec frames > 1,
+    les allocations faites dans les bibliothèques (pandas, scikit-learn) sont
+    attribuées à la ligne du projet qui les appelle, mais chaque allocation
+    coûte plus cher : un Random Forest s'entraîne environ 1,5 fois plus
+    lentement avec frames=1 et 8 fois plus lentement avec frames=25. Le mode
+    profilage n'est activé qu'à la demande.
+    """
+
+    def __init__(self, top_n=10, sample_interval=0.05, frames=1):
+        self.top_n = top_n
+        self.sample_interval = sample_interval
+        self.frames = frames
+        self.stages = []
+        self.allocators = []
+        self._peak_with_children = 0.0
+        self._sampling = threading.Event()
+        self._sampler = None
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        self._sampling.set()
+        self._sampler = threading.Thread(target=self._sample_loop, name='memory-sampler', daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self):
+        self._sampling.clear()
+        if self._sampler is not None:
+            self._sampler.join()
+        tracemalloc.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _sample_loop(self):
+        while self._sampling.is_set():
+            try:
+                total = rss_mb()[0] + children_rss_mb()
+            except OSError:
+                total = 0.0
+            self._peak_with_children = max(self._peak_with_children, total)
+            time.sleep(self.sample_interval)
+
+    @contextmanager
+    def stage(self, name):
+        """Mesure la mémoire d'une étape"""
+        reset_peak_rss()
+        tracemalloc.reset_peak()
+        rss_start, _ = rss_mb()
+        self._peak_with_children = rss_start + children_rss_mb()
+        traced_start, _ = tracemalloc.get_traced_memory()
+        snapshot_start = tracemalloc.take_snapshot()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            traced_end, traced_peak = tracemalloc.get_traced_memory()
+            rss_end, rss_peak = rss_mb()
+            snapshot_end = tracemalloc.take_snapshot()
+            self.stages.append({
+                'Étape': name,
+                'Durée (s)': duration,
+                'RSS début (Mo)': rss_start,
+                'RSS fin (Mo)': rss_end,
+                'Pic RSS (Mo)': max(rss_peak, rss_end),
+                'Pic RSS avec enfants (Mo)': max(self._peak_with_children, rss_peak),
+                'Pic Python (Mo)': (traced_peak - traced_start) / 2**20,
+                'Solde Python (Mo)': (traced_end - traced_start) / 2**20
+            })
+            self._record_allocators(name, snapshot_start, snapshot_end)
+
+    def _project_lines(self, snapshot):
+        """Mémoire allouée par ligne du projet : chaque allocation est attribuée
+        à la ligne de src/, app.py ou pages/ la plus proche dans sa pile d'appels
+        (sinon à la ligne qui a alloué)"""
+        root = os.getcwd()
+        in_project = {}
+        lines = {}
+        # Regroupement des allocations de même pile d'appels (en C), puis attribution par pile
+        for stat in snapshot.statistics('traceback'):
+            frame = stat.traceback[0]
+            for candidate in stat.traceback:
+                filename = candidate.filename
+                if filename not in in_project:
+                    in_project[filename] = filename.startswith(root) and 'site-packages' not in filename
+                if in_project[filename]:
+                    frame = candidate
+                    break
+            if frame.filename == tracemalloc.__file__ or frame.filename.startswith('<frozen importlib'):
+                continue
+            key = (frame.filename, frame.lineno)
+            size, count = lines.get(key, (0, 0))
+            lines[key] = (size + stat.size, count + stat.count)
+        return lines
+
+    def _record_allocators(self, name, snapshot_start, snapshot_end):
+        before = self._project_lines(snapshot_start)
+        after = self._project_lines(snapshot_end)
+        growth = {key: (size - before.get(key, (0, 0))[0], count - before.get(key, (0, 0))[1])
+                  for key, (size, count) in after.items()}
+        growing = sorted((item for item in growth.items() if item[1][0] > 0),
+                         key=lambda item: item[1][0], reverse=True)[:self.top_n]
+        for rank, ((filename, lineno), (size, count)) in enumerate(growing, 1):
+            self.allocators.append({
+                'Étape': name,
+                'Rang': rank,
+                'Ligne': f'{os.path.relpath(filename)}:{lineno}',
+                'Taille (Mo)': size / 2**20,
+                'Blocs': count
+            })
+
+    def report(self):
+        """Tableaux des étapes et des allocateurs"""
+        return pd.DataFrame(self.stages), pd.DataFrame(self.allocators)
+
+    def save(self, label, context=None, directory=MEMORY_DIR):
+        """Enregistre le rapport dans reports/memory/ et retourne le chemin"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{time.strftime('%Y%m%dT%H%M%S')}_{label}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'context': context or {}, 'stages': self.stages, 'allocators': self.allocators},
+                      f, indent=2, ensure_ascii=False)
+        return path
+
+def print_report(profiler):
+    """Affiche les étapes puis les trois principaux allocateurs de chaque étape"""
+    stages, allocators = profiler.report()
+    print(stages.round(1).to_string(index=False))
+    if len(allocators):
+        print("\nPrincipaux allocateurs :")
+        top = allocators[allocators['Rang'] <= 3]
+        print(top.round(2).to_string(index=False))
+
+def profile_batch(n_rows, model_names=None, chunk_size=5000, profiler=None, random_state=42):
+    """Profil mémoire des prédictions par lot pour n_rows patients
+
+    Les patients sont tirés (avec remise) de data/data.csv. Chaque modèle
+    traite le lot par un travail BatchJobManager, comme la page de prédiction
+    par lot : une étape par modèle, chargement du modèle compris.
+    """
+    profiler = profiler or MemoryProfiler()
+    model_names = [name for name in (model_names or MODEL_NAMES) if os.path.exists(model_path(name))]
+    manager = BatchJobManager(max_workers=1)
+    with profiler.stage(f'lecture ({n_rows} lignes)'):
+        df = load_data('data/data.csv')[INPUT_COLUMNS]
+        df = df.sample(n_rows, replace=True, random_state=random_state).reset_index(drop=True)
+    for name in model_names:
+        with profiler.stage(f'lot:{name}'):
+            job_id = manager.submit(df, name, chunk_size)
+            while manager.status(job_id)['state'] not in (DONE, FAILED):
+                time.sleep(0.01)
+        job = manager.status(job_id)
+        if job['state'] == FAILED:
+            raise RuntimeError(f"Lot {name} en échec : {job['error']}")
+    return profiler
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profil mémoire des prédictions par lot")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000],
+                        help="tailles de lot à profiler")
+    parser.add_argument('--chunk-size', type=int, default=5000, help="lignes par bloc")
+    parser.add_argument('--top', type=int, default=10, help="allocateurs gardés par étape")
+    parser.add_argument('--frames', type=int, default=PROFILE_FRAMES,
+                        help="niveaux de pile gardés par tracemalloc (attribution aux lignes du projet)")
+    args = parser.parse_args()
+
+    budget = []
+    for n_rows in args.rows:
+        with MemoryProfiler(top_n=args.top, frames=args.frames) as profiler:
+            profile_batch(n_rows, chunk_size=args.chunk_size, profiler=profiler)
+        print(f"\n=== {n_rows} lignes ===")
+        print_report(profiler)
+        path = profiler.save(f'lot_{n_rows}', context={'rows': n_rows, 'chunk_size': args.chunk_size})
+        print(f"Rapport : {path}")
+        stages, _ = profiler.report()
+        budget.append({'Lignes': n_rows, 'Pic RSS (Mo)': stages['Pic RSS (Mo)'].max(),
+                       'Étape la plus coûteuse': stages.loc[stages['Pic RSS (Mo)'].idxmax(), 'Étape']})
+    print("\nBudget mémoire par taille de lot :")
+    print(pd.DataFrame(budget).round(1).to_string(index=False))
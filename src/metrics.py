@@ -0,0 +1,215 @@
+import time
+import numpy as np
+import pandas as pd
+
+def threshold_counts(y_true, y_score, sample_weight=None):
+    """Vrais et faux positifs à chaque seuil distinct, en un seul tri des scores
+
+    Les seuils sont décroissants. Le premier seuil (+inf) correspond à ne
+    prédire aucun positif. La classe positive est 1. Avec sample_weight, les
+    effectifs sont des sommes de poids.
+    """
+    y_true = np.asarray(y_true) == 1
+    y_score = np.asarray(y_score)
+    order = np.argsort(y_score, kind='mergesort')[::-1]
+    y_score = y_score[order]
+    y_true = y_true[order]
+
+    # Dernière position de chaque valeur de score distincte
+    distinct = np.flatnonzero(np.diff(y_score)) if len(y_score) else np.empty(0, dtype=int)
+    ends = np.r_[distinct, len(y_score) - 1] if len(y_score) else distinct
+    if sample_weight is None:
+        tps = np.cumsum(y_true)[ends]
+        fps = ends + 1 - tps
+    else:
+        weight = np.asarray(sample_weight, dtype=np.float64)[order]
+        tps = np.cumsum(weight * y_true)[ends]
+        fps = np.cumsum(weight * ~y_true)[ends]
+    return np.r_[np.inf, y_score[ends]], np.r_[0, tps], np.r_[0, fps]
+
+def confusion_counts(y_true, y_pred, sample_weight=None):
+    """Matrice de confusion 2x2 [[tn, fp], [fn, tp]] en un seul bincount"""
+    cells = 2 * (np.asarray(y_true) == 1) + (np.asarray(y_pred) == 1)
+    return np.bincount(cells, weights=sample_weight, minlength=4).reshape(2, 2)
+
+def scalar_metrics(cm):
+    """Accuracy, précision, rappel et F1 à partir de la matrice de confusion
+
+    Comme sklearn (zero_division=0), une précision ou un rappel indéfini vaut 0.
+    """
+    (tn, fp), (fn, tp) = cm
+    total = tn + fp + fn + tp
+    return {
+        'Accuracy': (tp + tn) / total if total else 0.0,
+        'Precision': tp / (tp + fp) if tp + fp else 0.0,
+        'Recall': tp / (tp + fn) if tp + fn else 0.0,
+        'F1-Score': 2 * tp / (2 * tp + fp + fn) if tp else 0.0
+    }
+
+def roc_from_counts(thresholds, tps, fps, drop_intermediate=True):
+    """Courbe ROC (fpr, tpr, seuils), identique à sklearn.metrics.roc_curve
+
+    Avec drop_intermediate, les points alignés avec leurs voisins sont
+    retirés, ce qui ne change pas l'aire sous la courbe.
+    """
+    # Comme sklearn : la sélection porte sur les seuils réels, le point (0, 0) est ajouté ensuite
+    thresholds, tps, fps = thresholds[1:], tps[1:], fps[1:]
+    if drop_intermediate and len(fps) > 2:
+        keep = np.flatnonzero(np.r_[True, np.logical_or(np.diff(fps, 2), np.diff(tps, 2)), True])
+        thresholds, tps, fps = thresholds[keep], tps[keep], fps[keep]
+    tps, fps = np.r_[0, tps], np.r_[0, fps]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fpr = fps / fps[-1]
+        tpr = tps / tps[-1]
+    return fpr, tpr, np.r_[np.inf, thresholds]
+
+def pr_from_counts(thresholds, tps, fps):
+    """Courbe précision-rappel, identique à sklearn.metrics.precision_recall_curve
+
+    Les seuils sont croissants et le dernier point (précision 1, rappel 0)
+    n'a pas de seuil.
+    """
+    thresholds, tps, fps = thresholds[1:], tps[1:], fps[1:]
+    predicted = tps + fps
+    precision = np.zeros(len(tps))
+    np.divide(tps, predicted, out=precision, where=predicted != 0)
+    recall = tps / tps[-1] if len(tps) and tps[-1] else np.ones(len(tps))
+    return np.r_[precision[::-1], 1], np.r_[recall[::-1], 0], thresholds[::-1]
+
+def area_under_curve(x, y):
+    """Aire sous une courbe par la méthode des trapèzes (x monotone)"""
+    area = np.sum(np.diff(x) * (y[1:] + y[:-1]) / 2)
+    return float(-area if len(x) > 1 and x[-1] < x[0] else area)
+
+def curve_metrics(thresholds, tps, fps):
+    """Courbes ROC et précision-rappel, AUC et précision moyenne à partir des effectifs"""
+    roc = roc_from_counts(thresholds, tps, fps)
+    pr = pr_from_counts(thresholds, tps, fps)
+    precision, recall, _ = pr
+    return {
+        'AUC': area_under_curve(roc[0], roc[1]),
+        # Précision moyenne, comme sklearn.metrics.average_precision_score
+        'Average Precision': float(-np.sum(np.diff(recall) * precision[:-1])),
+        'roc': roc,
+        'pr': pr
+    }
+
+def evaluate_predictions(y_true, y_pred, y_score=None, sample_weight=None):
+    """Toutes les métriques d'évaluation d'un modèle, en un seul tri des scores
+
+    Retourne un dictionnaire : matrice de confusion ('confusion_matrix'),
+    métriques scalaires (Accuracy, Precision, Recall, F1-Score) et, si les
+    scores sont fournis, 'AUC', 'Average Precision', 'roc' (fpr, tpr, seuils)
+    et 'pr' (précision, rappel, seuils).
+    """
+    cm = confusion_counts(y_true, y_pred, sample_weight)
+    results = {'confusion_matrix': cm, **scalar_metrics(cm)}
+    if y_score is not None:
+        results.update(curve_metrics(*threshold_counts(y_true, y_score, sample_weight)))
+    return results
+
+class StreamingMetrics:
+    """Métriques calculées par blocs, sans garder toutes les prédictions en mémoire
+
+    Chaque bloc est réduit à ses scores distincts avec leurs effectifs de
+    positifs et de négatifs. Les résultats sont exactement ceux d'un calcul
+    sur toutes les lignes à la fois. La mémoire dépend du nombre de scores
+    distincts. Avec decimals, les scores sont arrondis pour la borner, au
+    prix d'une courbe un peu moins fine.
+    """
+
+    def __init__(self, decimals=None, compact_every=1_000_000):
+        self.decimals = decimals
+        self.compact_every = compact_every
+        self.cm = np.zeros((2, 2))
+        self._scores, self._positives, self._negatives = [], [], []
+        self._pending = 0
+
+    def update(self, y_true, y_pred, y_score=None, sample_weight=None):
+        """Ajoute un bloc de prédictions"""
+        self.cm += confusion_counts(y_true, y_pred, sample_weight)
+        if y_score is None:
+            return
+        y_score = np.asarray(y_score, dtype=np.float64)
+        if self.decimals is not None:
+            y_score = np.round(y_score, self.decimals)
+        weight = np.ones(len(y_score)) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+        positive = np.asarray(y_true) == 1
+        scores, inverse = np.unique(y_score, return_inverse=True)
+        self._scores.append(scores)
+        self._positives.append(np.bincount(inverse, weights=weight * positive, minlength=len(scores)))
+        self._negatives.append(np.bincount(inverse, weights=weight * ~positive, minlength=len(scores)))
+        self._pending += len(scores)
+        if self._pending > self.compact_every:
+            self._compact()
+
+    def _compact(self):
+        # Fusion des blocs : un seul triplet (score, positifs, négatifs) par score distinct
+        scores, inverse = np.unique(np.concatenate(self._scores), return_inverse=True)
+        self._positives = [np.bincount(inverse, weights=np.concatenate(self._positives), minlength=len(scores))]
+        self._negatives = [np.bincount(inverse, weights=np.concatenate(self._negatives), minlength=len(scores))]
+        self._scores = [scores]
+        self._pending = len(scores)
+
+    def threshold_counts(self):
+        """Seuils décroissants et effectifs cumulés, comme threshold_counts"""
+        if not self._scores:
+            return np.array([np.inf]), np.zeros(1), np.zeros(1)
+        self._compact()
+        scores = self._scores[0][::-1]
+        return (np.r_[np.inf, scores], np.r_[0, np.cumsum(self._positives[0][::-1])],
+                np.r_[0, np.cumsum(self._negatives[0][::-1])])
+
+    def result(self):
+        """Métriques de tous les blocs reçus (même format que evaluate_predictions)"""
+        results = {'confusion_matrix': self.cm, **scalar_metrics(self.cm)}
+        if self._scores:
+            results.update(curve_metrics(*self.threshold_counts()))
+        return results
+
+def benchmark_metrics(n_rows=(10_000, 1_000_000), random_state=42):
+    """Compare le calcul des métriques : appels sklearn séparés contre un seul tri"""
+    from sklearn.metrics import (accuracy_score, precision_score, recall_score, f1_score, roc_auc_score,
+                                 confusion_matrix, roc_curve, precision_recall_curve, average_precision_score)
+
+    rng = np.random.default_rng(random_state)
+    results = []
+    for n in n_rows:
+        y_true = rng.integers(0, 2, n)
+        y_score = np.round(np.clip(0.3 * y_true + rng.normal(0.35, 0.25, n), 0, 1), 4)
+        y_pred = (y_score > 0.5).astype(int)
+
+        start = time.perf_counter()
+        reference = {
+            'Accuracy': accuracy_score(y_true, y_pred), 'Precision': precision_score(y_true, y_pred),
+            'Recall': recall_score(y_true, y_pred), 'F1-Score': f1_score(y_true, y_pred),
+            'AUC': roc_auc_score(y_true, y_score), 'Average Precision': average_precision_score(y_true, y_score)
+        }
+        cm, roc, pr = confusion_matrix(y_true, y_pred), roc_curve(y_true, y_score), precision_recall_curve(y_true, y_score)
+        sklearn_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        metrics = evaluate_predictions(y_true, y_pred, y_score)
+        single_sort_time = time.perf_counter() - start
+
+        stream = StreamingMetrics()
+        for chunk in np.array_split(np.arange(n), 10):
+            stream.update(y_true[chunk], y_pred[chunk], y_score[chunk])
+        streamed = stream.result()
+
+        identical = (np.array_equal(cm, metrics['confusion_matrix'])
+                     and all(np.allclose(a, b) for a, b in zip(roc, metrics['roc']))
+                     and all(np.allclose(a, b) for a, b in zip(pr, metrics['pr']))
+                     and all(np.allclose(a, b) for a, b in zip(roc, streamed['roc'])))
+        results.append({
+            'Lignes': n,
+            'sklearn (s)': sklearn_time,
+            'Un seul tri (s)': single_sort_time,
+            'Écart max': max(abs(metrics[key] - value) for key, value in reference.items()),
+            'Écart max par blocs': max(abs(streamed[key] - value) for key, value in reference.items()),
+            'Courbes identiques': identical
+        })
+    return pd.DataFrame(results)
+
+if __name__ == "__main__":
+    print(benchmark_metrics().to_string(index=False))
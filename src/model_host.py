@@ -0,0 +1,405 @@
+import os
+import sys
+import json
+import time
+import pickle
+import signal
+import argparse
+import threading
+import multiprocessing
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+from src.inference import MODEL_NAMES, model_path, load_model
+
+# Registre des segments publiés, lu par les processus de service
+REGISTRY_PATH = 'models/shared_models.json'
+
+# Alignement des tableaux dans les segments
+ALIGNMENT = 64
+
+# Taille des blocs d'échantillons parcourus ensemble dans les arbres aplatis
+APPLY_BLOCK = 256
+
+class FlatTreeEnsemble:
+    """Arbre de décision ou forêt aléatoire sous forme de tableaux NumPy plats
+
+    Les nœuds de tous les arbres sont concaténés (enfants, variable, seuil,
+    probabilités des feuilles). Contrairement à l'objet Tree de sklearn, qui
+    recopie ses nœuds à la désérialisation, ces tableaux peuvent être
+    référencés directement dans une mémoire partagée.
+    """
+
+    def __init__(self, model):
+        trees = getattr(model, 'estimators_', [model])
+        offsets = np.cumsum([0] + [tree.tree_.node_count for tree in trees])
+
+        children_left, children_right, feature, threshold, value = [], [], [], [], []
+        for offset, tree in zip(offsets, trees):
+            t = tree.tree_
+            is_leaf = t.children_left == -1
+            children_left.append(np.where(is_leaf, -1, t.children_left + offset))
+            children_right.append(np.where(is_leaf, -1, t.children_right + offset))
+            feature.append(np.where(is_leaf, 0, t.feature))
+            threshold.append(t.threshold)
+            leaf_value = t.value[:, 0, :]
+            value.append(leaf_value / leaf_value.sum(axis=1, keepdims=True))
+
+        self.roots = offsets[:-1].astype(np.int64)
+        self.children_left = np.concatenate(children_left).astype(np.int64)
+        self.children_right = np.concatenate(children_right).astype(np.int64)
+        self.feature = np.concatenate(feature).astype(np.int64)
+        self.threshold = np.concatenate(threshold)
+        self.value = np.concatenate(value)
+        self.classes_ = model.classes_
+        self.n_features_in_ = model.n_features_in_
+
+    def encode(self, X):
+        """Entrées dans l'espace des seuils (comparées par X[:, variable] <= seuil)"""
+        # Même comparaison que sklearn : entrées en float32, seuils en float64
+        return np.asarray(X, dtype=np.float32)
+
+    def apply(self, X):
+        """Feuille atteinte par chaque échantillon dans chaque arbre (n_samples, n_trees)
+
+        Les gros lots sont parcourus par blocs de APPLY_BLOCK échantillons, pour
+        que les tableaux de travail restent en cache.
+        """
+        X = self.encode(X)
+        leaves = np.empty((len(X), len(self.roots)), dtype=self.children_left.dtype)
+        for start in range(0, len(X), APPLY_BLOCK):
+            leaves[start:start + APPLY_BLOCK] = self._apply_block(X[start:start + APPLY_BLOCK])
+        return leaves
+
+    def _apply_block(self, X):
+        n_samples, n_features = X.shape
+        n_trees = len(self.roots)
+        left, right = self.children_left, self.children_right
+        node = np.tile(self.roots, n_samples)
+        # Position de la ligne de chaque couple (échantillon, arbre) dans X aplati
+        row = np.repeat(np.arange(n_samples, dtype=np.intp) * n_features, n_trees)
+        X = X.ravel()
+
+        # Descente niveau par niveau, en ne gardant que les couples encore sur un nœud interne
+        # (take sur des tableaux 1D : bien plus rapide que l'indexation X[lignes, colonnes])
+        active = np.flatnonzero(left.take(node) != -1)
+        while len(active):
+            current = node.take(active)
+            go_left = X.take(row.take(active) + self.feature.take(current)) <= self.threshold.take(current)
+            node[active] = np.where(go_left, left.take(current), right.take(current))
+            active = active[left.take(node.take(active)) != -1]
+        return node.reshape(n_samples, n_trees)
+
+    def predict_proba(self, X):
+        return self.value[self.apply(X)].mean(axis=1)
+
+    def predict(self, X):
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+def feature_grid(X):
+    """Valeurs distinctes prises par chaque colonne encodée (grille des entrées)"""
+    return [np.unique(X[:, j]) for j in range(X.shape[1])]
+
+class CompactTreeEnsemble(FlatTreeEnsemble):
+    """Forêt aplatie élaguée et quantifiée, pour un service à faible empreinte
+
+    Les arbres sont coupés à max_depth (un nœud coupé devient une feuille avec
+    sa distribution de classes), la probabilité de chaque nœud est arrondie à
+    value_decimals décimales, puis les nœuds dont les deux feuilles ont la
+    même probabilité sont fusionnés, de bas en haut. Les seuils sont remplacés
+    par leur rang dans la grille des valeurs observées de chaque variable
+    (int16) : une entrée de la grille suit exactement le même chemin qu'avec
+    le seuil d'origine, une entrée hors grille est ramenée à la valeur de la
+    grille la plus proche. Les probabilités sont stockées une seule fois dans
+    une petite table indexée par nœud. Modèles binaires seulement.
+    """
+
+    def __init__(self, flat, grid, max_depth=None, value_decimals=3):
+        if len(flat.classes_) != 2:
+            raise ValueError("La compaction ne gère que les modèles binaires")
+        left, right = flat.children_left.copy(), flat.children_right.copy()
+        value = np.round(flat.value[:, 1], value_decimals)
+
+        # Profondeur de chaque nœud, niveau par niveau depuis les racines
+        depth = np.zeros(len(left), dtype=np.int64)
+        levels = []
+        level = flat.roots
+        while len(level):
+            depth[level] = len(levels)
+            levels.append(level)
+            internal = level[left[level] != -1]
+            level = np.concatenate([left[internal], right[internal]])
+
+        if max_depth is not None:
+            cut = depth >= max_depth
+            left[cut] = right[cut] = -1
+
+        # Fusion des feuilles sœurs identiques, du niveau le plus profond vers les racines
+        for level in reversed(levels[:max_depth]):
+            internal = level[left[level] != -1]
+            l, r = left[internal], right[internal]
+            merge = (left[l] == -1) & (left[r] == -1) & (value[l] == value[r])
+            merged = internal[merge]
+            value[merged] = value[l[merge]]
+            left[merged] = right[merged] = -1
+
+        # Nœuds encore atteignables, renumérotés dans leur ordre d'origine
+        reachable = np.zeros(len(left), dtype=bool)
+        level = flat.roots
+        while len(level):
+            reachable[level] = True
+            internal = level[left[level] != -1]
+            level = np.concatenate([left[internal], right[internal]])
+        keep = np.flatnonzero(reachable)
+        new_index = np.full(len(left), -1, dtype=np.int64)
+        new_index[keep] = np.arange(len(keep))
+        is_leaf = left[keep] == -1
+
+        # Seuil -> rang de la dernière valeur de la grille qui va à gauche
+        feature = flat.feature[keep]
+        threshold = flat.threshold[keep]
+        codes = np.zeros(len(keep), dtype=np.int16)
+        for j, values in enumerate(grid):
+            if len(values) > np.iinfo(np.int16).max:
+                raise ValueError(f"Grille trop fine pour la colonne {j}")
+            on_feature = (feature == j) & ~is_leaf
+            codes[on_feature] = np.searchsorted(values, threshold[on_feature], side='right') - 1
+
+        self.roots = new_index[flat.roots].astype(np.int32)
+        self.children_left = np.where(is_leaf, -1, new_index[left[keep]]).astype(np.int32)
+        self.children_right = np.where(is_leaf, -1, new_index[right[keep]]).astype(np.int32)
+        self.feature = np.where(is_leaf, 0, feature).astype(np.uint8 if len(grid) <= 256 else np.int32)
+        self.threshold = codes
+        # Milieux entre valeurs consécutives de la grille : frontières d'arrondi des entrées
+        self.edges = [((values[1:] + values[:-1]) / 2).astype(np.float32) for values in grid]
+        self.leaf_values, index = np.unique(value[keep], return_inverse=True)
+        self.leaf_values = self.leaf_values.astype(np.float32)
+        self.value_index = index.astype(np.uint8 if len(self.leaf_values) <= 256 else np.uint16)
+        self.classes_ = flat.classes_
+        self.n_features_in_ = flat.n_features_in_
+        self.params = {'max_depth': max_depth, 'value_decimals': value_decimals}
+
+    @property
+    def value(self):
+        """Probabilités des classes de chaque nœud (n_nodes, 2), reconstruites depuis la table"""
+        p = self.leaf_values.astype(np.float64)[self.value_index]
+        return np.column_stack([1 - p, p])
+
+    def encode(self, X):
+        """Rang de chaque entrée dans la grille de sa variable (valeur la plus proche)"""
+        X = np.asarray(X, dtype=np.float32)
+        codes = np.empty(X.shape, dtype=np.int16)
+        for j, edges in enumerate(self.edges):
+            codes[:, j] = np.searchsorted(edges, X[:, j])
+        return codes
+
+    def predict_proba(self, X):
+        p = self.leaf_values[self.value_index[self.apply(X)]].mean(axis=1, dtype=np.float64)
+        return np.column_stack([1 - p, p])
+
+    @property
+    def node_count(self):
+        return len(self.children_left)
+
+def prepare_for_hosting(model):
+    """Remplace les modèles à base d'arbres par leur forme plate"""
+    if hasattr(model, 'tree_') or hasattr(model, 'estimators_'):
+        return FlatTreeEnsemble(model)
+    return model
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def attach_shared_memory(name, host_pid=None):
+    """S'attache à un segment existant sans en confier la suppression à ce processus
+
+    Avant Python 3.13, l'attachement enregistre le segment auprès du
+    resource_tracker, qui le supprimerait à la sortie du processus de service
+    alors que l'hôte le sert encore : l'enregistrement est retiré juste après.
+    Un processus enfant de l'hôte (host_pid) partage le tracker de celui-ci :
+    l'enregistrement est alors celui de l'hôte et il est laissé en place.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    parent = multiprocessing.parent_process()
+    if parent is None or parent.pid != host_pid:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+class ModelHost:
+    """Publie les modèles une seule fois en mémoire partagée POSIX
+
+    Chaque modèle est sérialisé avec le protocole pickle 5 : les tableaux NumPy
+    (nœuds des arbres, données d'entraînement KNN, centroïdes, coefficients)
+    sont sortis hors bande et copiés dans un segment partagé. Le reste de
+    l'objet, quelques kilo-octets, est placé en tête du même segment.
+    """
+
+    def __init__(self, registry_path=REGISTRY_PATH):
+        self.registry_path = registry_path
+        self.segments = {}
+        self.registry = {}
+
+    def publish(self, name, model):
+        buffers = []
+        payload = pickle.dumps(prepare_for_hosting(model), protocol=5, buffer_callback=buffers.append)
+        raw_buffers = [buffer.raw() for buffer in buffers]
+
+        layout = []
+        offset = _aligned(len(payload))
+        for raw in raw_buffers:
+            layout.append([offset, raw.nbytes])
+            offset = _aligned(offset + raw.nbytes)
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        shm.buf[:len(payload)] = payload
+        for (start, nbytes), raw in zip(layout, raw_buffers):
+            shm.buf[start:start + nbytes] = raw.cast('B')
+
+        self.segments[name] = shm
+        self.registry[name] = {
+            'segment': shm.name,
+            'payload_size': len(payload),
+            'buffers': layout,
+            'size': shm.size
+        }
+        return self.registry[name]
+
+    def publish_models(self, model_names=None, dtype=np.float32):
+        """Publie les modèles de models/ et écrit le registre"""
+        for name in model_names or MODEL_NAMES:
+            if os.path.exists(model_path(name)):
+                self.publish(name, load_model(name, dtype=dtype))
+        tmp_path = f'{self.registry_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'pid': os.getpid(), 'models': self.registry}, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.registry_path)
+        return self.registry
+
+    def close(self):
+        """Supprime le registre et libère les segments"""
+        if os.path.exists(self.registry_path):
+            os.remove(self.registry_path)
+        for shm in self.segments.values():
+            _attached.pop(shm.name, None)
+            shm.close()
+            shm.unlink()
+        self.segments = {}
+
+# Segments attachés par ce processus (gardés ouverts tant que les modèles vivent),
+# un seul attachement par segment même si plusieurs sessions chargent les modèles
+_attached = {}
+_attach_lock = threading.Lock()
+
+def attach_models(registry_path=REGISTRY_PATH):
+    """Reconstruit les modèles publiés par l'hôte, sans copie de leurs tableaux"""
+    with open(registry_path, encoding='utf-8') as f:
+        registry = json.load(f)
+    host_pid, registry = registry['pid'], registry['models']
+
+    models = {}
+    for name, entry in registry.items():
+        with _attach_lock:
+            shm = _attached.get(entry['segment'])
+            if shm is None:
+                shm = _attached[entry['segment']] = attach_shared_memory(entry['segment'], host_pid)
+        view = shm.buf.toreadonly()
+        buffers = [view[start:start + nbytes] for start, nbytes in entry['buffers']]
+        models[name] = pickle.loads(view[:entry['payload_size']], buffers=buffers)
+    return models
+
+def load_served_models(model_names=None, registry_path=REGISTRY_PATH):
+    """Modèles de l'hôte en mémoire partagée s'il est lancé, sinon chargés depuis models/
+
+    Dans les deux cas les modèles à base d'arbres sont servis sous leur forme
+    plate : l'explicateur peut s'appuyer sur le même objet sans le recopier.
+    """
+    if os.path.exists(registry_path):
+        try:
+            models = attach_models(registry_path)
+            return {name: models[name] for name in model_names or models if name in models}
+        except FileNotFoundError:
+            # Registre laissé par un hôte arrêté : les segments n'existent plus
+            pass
+    from src.ensemble import load_models
+    return {name: prepare_for_hosting(model) for name, model in load_models(model_names).items()}
+
+def private_memory_mb():
+    """Mémoire privée (USS) du processus courant, en Mo (Linux)"""
+    with open('/proc/self/smaps_rollup') as f:
+        fields = dict(line.split(':', 1) for line in f if ':' in line)
+    private_kb = sum(int(fields[key].split()[0]) for key in ('Private_Clean', 'Private_Dirty'))
+    return private_kb / 1024
+
+def _worker_memory(mode, registry_path, queue):
+    """Processus de service : mémoire privée ajoutée par le chargement des modèles"""
+    import pandas as pd
+    from src.data_preprocessing import preprocess_to_array
+    from src.ensemble import load_models
+
+    X = preprocess_to_array(pd.read_csv('data/data.csv').head(100))
+    before = private_memory_mb()
+    models = attach_models(registry_path) if mode == 'partagé' else load_models()
+    for model in models.values():
+        model.predict(X)
+    queue.put(private_memory_mb() - before)
+
+def benchmark_memory(n_workers=4):
+    """Compare la mémoire privée par processus : joblib.load contre hôte partagé"""
+    import multiprocessing
+    import pandas as pd
+
+    context = multiprocessing.get_context('spawn')
+    host = ModelHost()
+    host.publish_models()
+    results = []
+    try:
+        for mode in ('joblib.load', 'partagé'):
+            queue = context.Queue()
+            workers = [context.Process(target=_worker_memory, args=(mode, host.registry_path, queue))
+                       for _ in range(n_workers)]
+            for worker in workers:
+                worker.start()
+            memory = [queue.get() for _ in workers]
+            for worker in workers:
+                worker.join()
+            results.append({
+                'Mode': mode,
+                'Processus': n_workers,
+                'Mémoire privée par processus (Mo)': np.mean(memory),
+                'Total (Mo)': np.sum(memory)
+            })
+    finally:
+        host.close()
+    shared_mb = sum(entry['size'] for entry in host.registry.values()) / 2**20
+    return pd.DataFrame(results), shared_mb
+
+if __name__ == "__main__":
+    # Classes du module importé : les modèles publiés doivent être désérialisables
+    # par les processus de service (et non rattachés à __main__)
+    from src.model_host import ModelHost, benchmark_memory
+
+    parser = argparse.ArgumentParser(description="Hôte de modèles en mémoire partagée")
+    parser.add_argument('command', choices=['serve', 'benchmark'])
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        # Arrêt propre (suppression des segments) aussi sur SIGTERM
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        host = ModelHost()
+        registry = host.publish_models()
+        for name, entry in registry.items():
+            print(f"{name} : segment {entry['segment']} ({entry['size'] / 2**20:.2f} Mo)")
+        print(f"Registre : {host.registry_path} (Ctrl+C pour arrêter)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            host.close()
+    else:
+        results, shared_mb = benchmark_memory(args.workers)
+        print(f"Segments partagés (une seule fois) : {shared_mb:.2f} Mo")
+        print(results.to_string(index=False))
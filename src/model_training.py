@@ -4,18 +4,36 @@ from sklearn.linear_model import LogisticRegression, LinearRegression
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.cluster import KMeans
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
-from sklearn.metrics import confusion_matrix, roc_curve, precision_recall_curve
 from sklearn.model_selection import cross_val_score, learning_curve
 import matplotlib.pyplot as plt
 import seaborn as sns
-import joblib
+import sys
+import time
+import src
 from src.data_preprocessing import load_data, preprocess_data, split_data
+from src.inference import model_path, save_model
+from src.clustering import ClusterClassifier
+from src.boosting import COMPARISON_PATH, BoostedClassifier, compare_boosting_forest
+from src.calibration import CALIBRATION_PARAMS, calibrate_model, operating_point_path, single_threaded
+from src.metrics import evaluate_predictions
+from src.feature_importance import PERMUTATION_PARAMS, importance_path, importance_node
+from src.diagnostics import DIAGNOSTICS_PATH, DIAGNOSTICS_PARAMS, diagnostics_node
+from src.bootstrap import BOOTSTRAP_PARAMS, predictions_path, save_test_predictions, uncertainty_node
+from src.monitoring import REFERENCE_PATH, reference_node
+from src.manifest import DATA_PATH, dataset_hash, stamp_artifacts
+from src.pipeline import Node, run_pipeline
+from src.validation import REJECTED_PATH, TRAINING_SCHEMA, validate_training_data
+from src.memory_profiling import PROFILE_FRAMES, MemoryProfiler, print_report
+from src.evaluation_export import EVALUATION_DIR, evaluation_node, model_evaluation_table, latest_evaluation_path
 
-def plot_confusion_matrix(y_true, y_pred, model_name):
+# Paramètres de la division train/test
+SPLIT_PARAMS = {'test_size': 0.2, 'random_state': 42}
+
+# Rapports dérivés des données d'entraînement
+TRAINING_REPORTS = ['reports/scaler_params.csv', 'reports/feature_columns.csv', 'reports/model_results.csv']
+
+def plot_confusion_matrix(cm, model_name):
     """Visualise la matrice de confusion"""
-    cm = confusion_matrix(y_true, y_pred)
     plt.figure(figsize=(8, 6))
     sns.heatmap(cm, annot=True, fmt='d', cmap='Blues')
     plt.title(f'Matrice de Confusion - {model_name}')
@@ -24,11 +42,8 @@ def plot_confusion_matrix(y_true, y_pred, model_name):
     plt.savefig(f'confusion_matrix_{model_name.lower().replace(" ", "_")}.png')
     plt.close()
 
-def plot_roc_curve(y_true, y_prob, model_name):
+def plot_roc_curve(fpr, tpr, auc_score, model_name):
     """Visualise la courbe ROC"""
-    fpr, tpr, _ = roc_curve(y_true, y_prob)
-    auc_score = roc_auc_score(y_true, y_prob)
-    
     plt.figure(figsize=(8, 6))
     plt.plot(fpr, tpr, label=f'AUC = {auc_score:.2f}')
     plt.plot([0, 1], [0, 1], 'k--')
@@ -39,10 +54,8 @@ def plot_roc_curve(y_true, y_prob, model_name):
     plt.savefig(f'roc_curve_{model_name.lower().replace(" ", "_")}.png')
     plt.close()
 
-def plot_precision_recall_curve(y_true, y_prob, model_name):
+def plot_precision_recall_curve(precision, recall, model_name):
     """Visualise la courbe Précision-Rappel"""
-    precision, recall, _ = precision_recall_curve(y_true, y_prob)
-    
     plt.figure(figsize=(8, 6))
     plt.plot(recall, precision)
     plt.xlabel('Rappel')
@@ -51,16 +64,25 @@ def plot_precision_recall_curve(y_true, y_prob, model_name):
     plt.savefig(f'precision_recall_{model_name.lower().replace(" ", "_")}.png')
     plt.close()
 
-def plot_learning_curve(model, X, y, model_name):
-    """Visualise la courbe d'apprentissage"""
+def compute_learning_curve(model, X, y):
+    """Scores d'entraînement et de validation croisée selon la taille de l'ensemble d'entraînement"""
     train_sizes, train_scores, test_scores = learning_curve(
-        model, X, y, cv=5, n_jobs=-1, 
+        single_threaded(model), X, y, cv=5, n_jobs=-1, 
         train_sizes=np.linspace(0.1, 1.0, 10))
     
-    train_mean = np.mean(train_scores, axis=1)
-    train_std = np.std(train_scores, axis=1)
-    test_mean = np.mean(test_scores, axis=1)
-    test_std = np.std(test_scores, axis=1)
+    return pd.DataFrame({
+        'Taille': train_sizes,
+        'Score entraînement': np.mean(train_scores, axis=1),
+        'Écart entraînement': np.std(train_scores, axis=1),
+        'Score validation': np.mean(test_scores, axis=1),
+        'Écart validation': np.std(test_scores, axis=1)
+    })
+
+def plot_learning_curve(curve, model_name):
+    """Visualise la courbe d'apprentissage"""
+    train_sizes = curve['Taille']
+    train_mean, train_std = curve['Score entraînement'], curve['Écart entraînement']
+    test_mean, test_std = curve['Score validation'], curve['Écart validation']
     
     plt.figure(figsize=(10, 6))
     plt.plot(train_sizes, train_mean, label='Score d\'entraînement')
@@ -75,77 +97,95 @@ def plot_learning_curve(model, X, y, model_name):
     plt.savefig(f'learning_curve_{model_name.lower().replace(" ", "_")}.png')
     plt.close()
 
-def train_and_evaluate_models(X_train, X_test, y_train, y_test):
-    """Entraîne et évalue différents modèles de machine learning"""
-    models = {
+def get_models():
+    """Modèles entraînés par le pipeline, avec leurs hyperparamètres"""
+    return {
         'Régression Logistique': LogisticRegression(max_iter=1000),
         'KNN': KNeighborsClassifier(n_neighbors=5),
         'Arbre de Décision': DecisionTreeClassifier(random_state=42),
         'Random Forest': RandomForestClassifier(random_state=42),
-        'KMeans': KMeans(n_clusters=2, random_state=42)
+        'KMeans': ClusterClassifier(n_clusters=2, random_state=42),
+        'XGBoost': BoostedClassifier(random_state=42)
+    }
+
+def training_params(models):
+    """Paramètres qui déterminent les artefacts d'entraînement"""
+    return {
+        'split': SPLIT_PARAMS,
+        'models': {name: model.get_params() for name, model in models.items()}
     }
+
+def train_and_evaluate_model(name, model, X_train, X_test, y_train, y_test):
+    """Entraîne, évalue et sauvegarde un modèle, retourne sa ligne de résultats"""
+    print(f"\nEntraînement du modèle: {name}")
     
-    results = []
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+    y_pred = model.predict(X_test)
+    if hasattr(model, "predict_proba"):
+        y_prob = model.predict_proba(X_test)[:, 1]
+    else:
+        y_prob = None
     
-    for name, model in models.items():
-        print(f"\nEntraînement du modèle: {name}")
-        
-        if name == 'KMeans':
-            # Pour KMeans, nous utilisons une approche différente
-            model.fit(X_train)
-            y_pred = model.predict(X_test)
-            # Convertir les labels pour correspondre aux classes originales
-            y_pred = np.where(y_pred == 0, 0, 1)
-            y_prob = None
-        else:
-            model.fit(X_train, y_train)
-            y_pred = model.predict(X_test)
-            if hasattr(model, "predict_proba"):
-                y_prob = model.predict_proba(X_test)[:, 1]
-            else:
-                y_prob = None
-        
-        # Calcul des métriques
-        accuracy = accuracy_score(y_test, y_pred)
-        precision = precision_score(y_test, y_pred)
-        recall = recall_score(y_test, y_pred)
-        f1 = f1_score(y_test, y_pred)
-        
-        # Validation croisée
-        if name != 'KMeans':
-            cv_scores = cross_val_score(model, X_train, y_train, cv=5)
-            cv_mean = cv_scores.mean()
-            cv_std = cv_scores.std()
-        else:
-            cv_mean = np.nan
-            cv_std = np.nan
-        
-        # Visualisations
-        plot_confusion_matrix(y_test, y_pred, name)
-        if y_prob is not None:
-            plot_roc_curve(y_test, y_prob, name)
-            plot_precision_recall_curve(y_test, y_prob, name)
-        if name != 'KMeans':
-            plot_learning_curve(model, X_train, y_train, name)
-        
-        results.append({
-            'Modèle': name,
-            'Accuracy': accuracy,
-            'Precision': precision,
-            'Recall': recall,
-            'F1-Score': f1,
-            'CV Mean': cv_mean,
-            'CV Std': cv_std
-        })
-        
-        # Sauvegarde du modèle
-        joblib.dump(model, f'models/{name.lower().replace(" ", "_")}_model.joblib')
-        
-        # Visualisation des résultats pour les modèles appropriés
-        if name in ['Arbre de Décision', 'Random Forest']:
-            plot_feature_importance(model, X_train.columns, name)
+    # Calcul des métriques : matrice de confusion et courbes en un seul tri des scores
+    metrics = evaluate_predictions(y_test, y_pred, y_prob)
+    # Prédictions conservées pour les intervalles de confiance (bootstrap)
+    save_test_predictions(name, y_test, y_pred, y_prob)
+    
+    # Validation croisée
+    cv_scores = cross_val_score(model, X_train, y_train, cv=5)
+    cv_mean = cv_scores.mean()
+    cv_std = cv_scores.std()
+    
+    # Visualisations
+    plot_confusion_matrix(metrics['confusion_matrix'], name)
+    if y_prob is not None:
+        fpr, tpr, _ = metrics['roc']
+        plot_roc_curve(fpr, tpr, metrics['AUC'], name)
+        precision, recall, _ = metrics['pr']
+        plot_precision_recall_curve(precision, recall, name)
+    learning = compute_learning_curve(model, X_train, y_train)
+    plot_learning_curve(learning, name)
     
-    return pd.DataFrame(results)
+    # Sauvegarde du modèle
+    save_model(name, model)
+    
+    # Visualisation des résultats pour les modèles appropriés
+    if name in ['Arbre de Décision', 'Random Forest']:
+        plot_feature_importance(model, X_train.columns, name)
+    
+    row = {
+        'Modèle': name,
+        'Accuracy': metrics['Accuracy'],
+        'Precision': metrics['Precision'],
+        'Recall': metrics['Recall'],
+        'F1-Score': metrics['F1-Score'],
+        'AUC': metrics.get('AUC', np.nan),
+        'CV Mean': cv_mean,
+        'CV Std': cv_std,
+        'Temps d\'entraînement (s)': fit_time
+    }
+    # Données brutes des figures, exportées avec celles des autres modèles (evaluation_node)
+    row['Évaluation'] = model_evaluation_table(name, row, metrics, learning)
+    return row
+
+def model_figures(name):
+    """Figures produites par train_and_evaluate_model pour un modèle"""
+    slug = name.lower().replace(" ", "_")
+    figures = [f'confusion_matrix_{slug}.png', f'roc_curve_{slug}.png',
+               f'precision_recall_{slug}.png', f'learning_curve_{slug}.png']
+    if name in ['Arbre de Décision', 'Random Forest']:
+        figures.append(f'feature_importance_{slug}.png')
+    return figures
+
+def train_and_evaluate_models(X_train, X_test, y_train, y_test):
+    """Entraîne et évalue différents modèles de machine learning"""
+    results = [
+        train_and_evaluate_model(name, model, X_train, X_test, y_train, y_test)
+        for name, model in get_models().items()
+    ]
+    return pd.DataFrame(results).drop(columns='Évaluation')
 
 def plot_feature_importance(model, feature_names, model_name):
     """Visualise l'importance des caractéristiques pour les modèles d'arbre"""
@@ -175,24 +215,162 @@ def plot_results(results_df):
     plt.savefig('model_comparison.png')
     plt.close()
 
-if __name__ == "__main__":
-    # Chargement et prétraitement des données
-    df = load_data('data/data.csv')
-    df_processed = preprocess_data(df, is_training=True)
-    X_train, X_test, y_train, y_test = split_data(df_processed)
-    
-    # Sauvegarder la liste des colonnes
+def load_training_data():
+    """Nœud de chargement des données d'entraînement (lignes valides seulement)"""
+    return validate_training_data(load_data(DATA_PATH))
+
+def preprocess_training_data(df):
+    """Nœud de prétraitement (ajuste et sauvegarde le scaler)"""
+    return preprocess_data(df, is_training=True)
+
+def split_training_data(df_processed):
+    """Nœud de division train/test (sauvegarde la liste des colonnes)"""
+    X_train, X_test, y_train, y_test = split_data(df_processed, **SPLIT_PARAMS)
     pd.Series(X_train.columns).to_csv('reports/feature_columns.csv', index=False)
-    
-    # Entraînement et évaluation des modèles
-    results = train_and_evaluate_models(X_train, X_test, y_train, y_test)
-    
-    # Affichage des résultats
+    return X_train, X_test, y_train, y_test
+
+def build_results(intervals, *rows):
+    """Nœud final : tableau des résultats (avec intervalles de confiance) et figure de comparaison"""
+    results = pd.DataFrame(list(rows)).drop(columns='Évaluation').merge(intervals, on='Modèle', how='left')
     print("\nRésultats détaillés:")
     print(results)
-    
-    # Visualisation des résultats
     plot_results(results)
+    results.to_csv('reports/model_results.csv', index=False)
+    return results
+
+def custom_model_code(model):
+    """Module des modèles définis dans src/ (inclus dans l'empreinte de leur nœud)"""
+    module = type(model).__module__
+    return [sys.modules[module]] if module.startswith('src.') else []
+
+def build_training_pipeline(models=None):
+    """Graphe du pipeline : chargement → prétraitement → division → modèles → résultats"""
+    if models is None:
+        models = get_models()
+    
+    nodes = [
+        Node('chargement', load_training_data, params={'data': dataset_hash(), 'schema': TRAINING_SCHEMA},
+             code=[src.validation, src.data_preprocessing], outputs=[REJECTED_PATH]),
+        Node('référence de dérive', reference_node, deps=['chargement'],
+             code=[src.monitoring], outputs=[REFERENCE_PATH]),
+        Node('prétraitement', preprocess_training_data, deps=['chargement'],
+             code=[src.data_preprocessing], outputs=['reports/scaler_params.csv']),
+        Node('division', split_training_data, deps=['prétraitement'],
+             params=SPLIT_PARAMS, code=[src.data_preprocessing],
+             outputs=['reports/feature_columns.csv'])
+    ]
+    
+    for name, model in models.items():
+        def fit_node(split, name=name, model=model):
+            X_train, X_test, y_train, y_test = split
+            return train_and_evaluate_model(name, model, X_train, X_test, y_train, y_test)
+        
+        nodes.append(Node(
+            f'modèle:{name}', fit_node, deps=['division'],
+            params={'name': name, 'model': model.get_params()},
+            code=[train_and_evaluate_model, plot_confusion_matrix, plot_roc_curve,
+                  plot_precision_recall_curve, compute_learning_curve, plot_learning_curve,
+                  plot_feature_importance, src.metrics, src.calibration, src.bootstrap, src.evaluation_export,
+                  src.inference]
+                 + custom_model_code(model),
+            outputs=[model_path(name), predictions_path(name)] + model_figures(name)
+        ))
+        
+        # Calibration et seuil de décision : indépendants du modèle ajusté sur
+        # tout l'ensemble d'entraînement, ils n'obligent pas à le réentraîner
+        if hasattr(model, 'predict_proba'):
+            def calibration_node(split, name=name, model=model):
+                X_train, X_test, y_train, y_test = split
+                return calibrate_model(name, model, X_train, y_train)
+            
+            nodes.append(Node(
+                f'calibration:{name}', calibration_node, deps=['division'],
+                params={'name': name, 'model': model.get_params(), 'calibration': CALIBRATION_PARAMS},
+                code=[src.calibration] + custom_model_code(model),
+                outputs=[operating_point_path(name)]
+            ))
+        
+        # Importance des variables, recalculée quand le modèle sauvegardé change
+        def feature_importance_node(model_row, split, name=name):
+            X_train, X_test, y_train, y_test = split
+            return importance_node(name, X_test, y_test)
+        
+        nodes.append(Node(
+            f'importance:{name}', feature_importance_node, deps=[f'modèle:{name}', 'division'],
+            params={'name': name, 'permutation': PERMUTATION_PARAMS},
+            code=[src.feature_importance],
+            outputs=[importance_path(name)]
+        ))
+    
+    # Comparaison boosting / forêt aléatoire (temps, latence, taille)
+    if 'XGBoost' in models and 'Random Forest' in models:
+        def comparison_node(forest_row, boosting_row, split):
+            X_train, X_test, y_train, y_test = split
+            print("\nComparaison XGBoost / Random Forest")
+            comparison = compare_boosting_forest([forest_row, boosting_row], X_test, y_test)
+            print(comparison.round(4).to_string(index=False))
+            return comparison
+        
+        nodes.append(Node(
+            'comparaison boosting', comparison_node,
+            deps=['modèle:Random Forest', 'modèle:XGBoost', 'division'],
+            code=[src.boosting], outputs=[COMPARISON_PATH]
+        ))
+    
+    # Diagnostics de robustesse de tous les modèles (permutations, sous-groupes)
+    nodes.append(Node(
+        'diagnostics', diagnostics_node, deps=['chargement', 'division'] + [f'modèle:{name}' for name in models],
+        params=DIAGNOSTICS_PARAMS,
+        code=[src.diagnostics],
+        outputs=[DIAGNOSTICS_PATH]
+    ))
+    
+    # Intervalles de confiance des métriques, sans refaire de prédiction
+    nodes.append(Node(
+        'incertitude', uncertainty_node, deps=[f'modèle:{name}' for name in models],
+        params=BOOTSTRAP_PARAMS, code=[src.bootstrap]
+    ))
+    
+    # Données brutes de l'évaluation de tous les modèles, un fichier Parquet par exécution
+    nodes.append(Node(
+        'export évaluation', evaluation_node,
+        deps=[dep for name in models for dep in (f'modèle:{name}', f'importance:{name}')],
+        code=[src.evaluation_export], outputs=[EVALUATION_DIR]
+    ))
+    
+    nodes.append(Node(
+        'résultats', build_results, deps=['incertitude'] + [f'modèle:{name}' for name in models],
+        code=[plot_results], outputs=['reports/model_results.csv', 'model_comparison.png']
+    ))
+    return nodes
+
+if __name__ == "__main__":
+    models = get_models()
+    
+    # Profil mémoire (--profile-memory) : pic de RSS et allocateurs de chaque étape exécutée
+    profiler = MemoryProfiler(frames=PROFILE_FRAMES).start() if '--profile-memory' in sys.argv else None
+    
+    # Exécution des seules étapes dont les entrées ou les paramètres ont changé
+    summary = run_pipeline(build_training_pipeline(models), force='--force' in sys.argv, profiler=profiler)
+    print(f"\nÉtapes exécutées : {len(summary['executed'])}, "
+          f"étapes à jour : {len(summary['skipped'])}, "
+          f"temps économisé : {summary['time_saved']:.1f} s")
+    
+    # Enregistrement de la version des données ayant produit les artefacts
+    artifacts = TRAINING_REPORTS + [DIAGNOSTICS_PATH, REFERENCE_PATH, REJECTED_PATH] + [model_path(name) for name in models]
+    artifacts += [operating_point_path(name) for name, model in models.items() if hasattr(model, 'predict_proba')]
+    artifacts += [importance_path(name) for name in models]
+    artifacts += [predictions_path(name) for name in models]
+    if 'XGBoost' in models and 'Random Forest' in models:
+        artifacts.append(COMPARISON_PATH)
+    if latest_evaluation_path() is not None:
+        artifacts.append(latest_evaluation_path())
+    stamp_artifacts(artifacts, params=training_params(models))
     
-    # Sauvegarde des résultats
-    results.to_csv('reports/model_results.csv', index=False)
\ No newline at end of file
+    if profiler is not None:
+        profiler.stop()
+        print("\nProfil mémoire du pipeline")
+        print_report(profiler)
+        path = profiler.save('entrainement', context={'data': DATA_PATH, 'rows': len(load_data(DATA_PATH)),
+                                                       'executed': summary['executed']})
+        print(f"Rapport mémoire : {path}")
@@ -0,0 +1,246 @@
+import os
+import time
+import bisect
+import threading
+import numpy as np
+import pandas as pd
+from src.batch_jobs import INPUT_COLUMNS
+from src.manifest import DATA_PATH
+
+# Distribution de référence (données d'entraînement), produite par le pipeline
+REFERENCE_PATH = 'reports/drift_reference.npz'
+
+# Effectifs observés en production, sauvegardés périodiquement
+COUNTS_PATH = 'reports/monitoring/drift_counts.npz'
+
+# Seuils usuels du PSI
+PSI_WARNING = 0.1
+PSI_ALERT = 0.25
+
+def feature_edges(values, n_bins=20):
+    """Bornes des intervalles d'une variable
+
+    Variables à peu de modalités (sexe, type de douleur...) : une case par
+    modalité. Variables continues : n_bins cases de même effectif sur les
+    données de référence.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    values = values[~np.isnan(values)]
+    distinct = np.unique(values)
+    if len(distinct) <= n_bins:
+        return (distinct[:-1] + distinct[1:]) / 2
+    return np.unique(np.quantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]))
+
+def build_reference(df, columns=INPUT_COLUMNS, n_bins=20):
+    """Bornes et effectifs de référence de chaque variable d'entrée"""
+    edges = [feature_edges(df[col], n_bins) for col in columns]
+    counts = [np.bincount(np.searchsorted(e, df[col].to_numpy(dtype=np.float64), side='right'),
+                          minlength=len(e) + 1)
+              for col, e in zip(columns, edges)]
+    # Stockage compact : bornes et effectifs concaténés, avec leurs positions
+    return {
+        'columns': np.array(columns),
+        'edges': np.concatenate(edges),
+        'edge_offsets': np.cumsum([0] + [len(e) for e in edges]),
+        'counts': np.concatenate(counts),
+        'count_offsets': np.cumsum([0] + [len(c) for c in counts])
+    }
+
+def save_reference(df, path=REFERENCE_PATH, **kwargs):
+    """Calcule et sauvegarde la distribution de référence"""
+    reference = build_reference(df, **kwargs)
+    np.savez(path, **reference)
+    return reference
+
+def load_reference(path=REFERENCE_PATH):
+    """Distribution de référence (None si elle n'a pas été calculée)"""
+    if not os.path.exists(path):
+        return None
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+def population_stability_index(observed, expected, eps=1e-4):
+    """PSI entre deux histogrammes définis sur les mêmes cases"""
+    p = np.maximum(observed / max(observed.sum(), 1), eps)
+    q = np.maximum(expected / max(expected.sum(), 1), eps)
+    return float(np.sum((p - q) * np.log(p / q)))
+
+def ks_statistic(observed, expected):
+    """Statistique de Kolmogorov-Smirnov sur les fonctions de répartition par cases"""
+    p = np.cumsum(observed) / max(observed.sum(), 1)
+    q = np.cumsum(expected) / max(expected.sum(), 1)
+    return float(np.max(np.abs(p - q)))
+
+class DriftMonitor:
+    """Histogrammes des entrées soumises, comparés à la distribution d'entraînement
+
+    Une requête isolée (observe) coûte une recherche dichotomique par
+    variable dans des listes Python et un incrément : quelques microsecondes,
+    sans NumPy ni pandas. Un lot (observe_batch) est compté en une fois avec
+    searchsorted et bincount. Les effectifs sont écrits sur disque au plus
+    toutes les flush_interval secondes, et rechargés au démarrage.
+    """
+
+    def __init__(self, reference, counts_path=COUNTS_PATH, flush_interval=60):
+        self.reference = reference
+        self.columns = reference['columns'].tolist()
+        self.counts_path = counts_path
+        self.flush_interval = flush_interval
+
+        edges, offsets = reference['edges'], reference['edge_offsets']
+        self._edges = [edges[offsets[j]:offsets[j + 1]].tolist() for j in range(len(self.columns))]
+        self._offsets = reference['count_offsets'][:-1].tolist()
+        self._features = list(zip(self.columns, self._edges, self._offsets))
+        self._lock = threading.Lock()
+        # Un seul vidage à la fois : tous écrivent le même fichier temporaire
+        self._flush_lock = threading.Lock()
+        self._counts = [0] * int(reference['count_offsets'][-1])
+        self._bulk_counts = np.zeros(len(self._counts), dtype=np.int64)
+        self._last_flush = time.monotonic()
+        self._load_counts()
+
+    def observe(self, patient):
+        """Compte une requête (dictionnaire colonne -> valeur)"""
+        bisect_right = bisect.bisect_right
+        with self._lock:
+            counts = self._counts
+            for column, edges, offset in self._features:
+                counts[offset + bisect_right(edges, patient[column])] += 1
+        self._maybe_flush()
+
+    def observe_batch(self, df):
+        """Compte un lot de patients (DataFrame) en une seule opération vectorisée"""
+        bins = np.concatenate([
+            offset + np.searchsorted(np.asarray(edges), df[column].to_numpy(dtype=np.float64), side='right')
+            for column, edges, offset in self._features
+        ])
+        batch_counts = np.bincount(bins, minlength=len(self._bulk_counts))
+        with self._lock:
+            self._bulk_counts += batch_counts
+        self._maybe_flush()
+
+    def counts(self):
+        """Effectifs observés (concaténés comme ceux de la référence)"""
+        with self._lock:
+            return np.array(self._counts, dtype=np.int64) + self._bulk_counts
+
+    @property
+    def n_observed(self):
+        return int(self.counts()[:self._offsets[1]].sum())
+
+    def _maybe_flush(self):
+        """Vide les effectifs si l'intervalle est écoulé, sans attendre un vidage déjà en cours"""
+        if time.monotonic() - self._last_flush <= self.flush_interval:
+            return
+        if not self._flush_lock.acquire(blocking=False):
+            return
+        try:
+            if time.monotonic() - self._last_flush > self.flush_interval:
+                self._write_counts()
+        finally:
+            self._flush_lock.release()
+
+    def flush(self):
+        """Écrit les effectifs de façon atomique (quelques centaines d'octets)"""
+        with self._flush_lock:
+            self._write_counts()
+
+    def _write_counts(self):
+        self._last_flush = time.monotonic()
+        os.makedirs(os.path.dirname(self.counts_path), exist_ok=True)
+        tmp_path = f'{self.counts_path}.tmp.npz'
+        np.savez(tmp_path, counts=self.counts(), edges=self.reference['edges'])
+        os.replace(tmp_path, self.counts_path)
+
+    def _load_counts(self):
+        # Effectifs d'une exécution précédente, s'ils portent sur les mêmes cases
+        if not os.path.exists(self.counts_path):
+            return
+        with np.load(self.counts_path) as data:
+            if np.array_equal(data['edges'], self.reference['edges']):
+                self._bulk_counts += data['counts']
+
+    def reset(self):
+        """Remet les effectifs à zéro (par exemple après un réentraînement)"""
+        with self._lock:
+            self._counts = [0] * len(self._counts)
+            self._bulk_counts[:] = 0
+        self.flush()
+
+    def report(self):
+        """PSI et KS de chaque variable par rapport à la référence"""
+        observed = self.counts()
+        expected = self.reference['counts']
+        offsets = self.reference['count_offsets']
+        rows = []
+        for j, column in enumerate(self.columns):
+            obs = observed[offsets[j]:offsets[j + 1]]
+            exp = expected[offsets[j]:offsets[j + 1]]
+            psi = population_stability_index(obs, exp)
+            rows.append({
+                'Variable': column,
+                'Observations': int(obs.sum()),
+                'PSI': psi,
+                'KS': ks_statistic(obs, exp),
+                'État': 'dérive' if psi >= PSI_ALERT else 'à surveiller' if psi >= PSI_WARNING else 'stable'
+            })
+        return pd.DataFrame(rows).set_index('Variable')
+
+    def histograms(self, column):
+        """Proportions observées et de référence par case, pour une variable"""
+        j = self.columns.index(column)
+        start, end = self.reference['count_offsets'][j], self.reference['count_offsets'][j + 1]
+        edges = self._edges[j]
+        labels = [f'< {edges[0]:g}'] if edges else ['toutes']
+        labels += [f'{low:g} – {high:g}' for low, high in zip(edges[:-1], edges[1:])]
+        labels += [f'≥ {edges[-1]:g}'] if edges else []
+        observed = self.counts()[start:end]
+        expected = self.reference['counts'][start:end]
+        return pd.DataFrame({
+            'Production': observed / max(observed.sum(), 1),
+            'Entraînement': expected / max(expected.sum(), 1)
+        }, index=labels)
+
+def load_monitor(**kwargs):
+    """Moniteur de dérive (None si la référence n'a pas été calculée)"""
+    reference = load_reference()
+    if reference is None:
+        return None
+    return DriftMonitor(reference, **kwargs)
+
+def reference_node(df):
+    """Nœud du pipeline : référence calculée sur les données d'entraînement"""
+    return save_reference(df)
+
+if __name__ == "__main__":
+    import tempfile
+
+    df = pd.read_csv(DATA_PATH)
+    reference = build_reference(df)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        monitor = DriftMonitor(reference, counts_path=os.path.join(tmp_dir, 'counts.npz'))
+
+        # Coût d'une requête isolée
+        patients = df[INPUT_COLUMNS].sample(100_000, replace=True, random_state=42).to_dict('records')
+        start = time.perf_counter()
+        for patient in patients:
+            monitor.observe(patient)
+        per_request = (time.perf_counter() - start) / len(patients)
+        print(f"observe : {per_request * 1e6:.2f} µs par requête")
+
+        # Débit en mode lot
+        batch = df[INPUT_COLUMNS].sample(1_000_000, replace=True, random_state=0)
+        start = time.perf_counter()
+        monitor.observe_batch(batch)
+        elapsed = time.perf_counter() - start
+        print(f"observe_batch : {len(batch) / elapsed:,.0f} patients/s")
+        print(monitor.report().round(4))
+
+        # Population décalée : patients plus âgés, cholestérol plus élevé
+        monitor.reset()
+        shifted = df[INPUT_COLUMNS].copy()
+        shifted['age'] += 8
+        shifted['cholesterol'] *= 1.15
+        monitor.observe_batch(shifted)
+        print("\nPopulation décalée :")
+        print(monitor.report().round(4))
@@ -0,0 +1,175 @@
+import io
+import os
+import time
+import tempfile
+import weakref
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+import numpy as np
+import pandas as pd
+from src.data_preprocessing import preprocess_to_array, load_preprocessing_params
+
+def scan_file_shards(file_path, shard_rows, chunk_size=1 << 24):
+    """Découpe un fichier CSV en blocs de shard_rows lignes sans le parser
+
+    Retourne l'en-tête, le nombre de lignes de données et la liste des blocs
+    (octet de début, octet de fin, ligne de départ). Seuls les retours à la
+    ligne sont comptés, bloc par bloc, avec NumPy.
+    """
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        boundaries = [len(header)]
+        offset = len(header)
+        n_rows = 0
+        last = b'\n'
+        for block in iter(lambda: f.read(chunk_size), b''):
+            newlines = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord('\n'))
+            completed = n_rows + np.arange(1, len(newlines) + 1)
+            boundaries.extend((newlines[completed % shard_rows == 0] + offset + 1).tolist())
+            n_rows += len(newlines)
+            offset += len(block)
+            last = block[-1:]
+
+    # Dernière ligne sans retour à la ligne final
+    if last != b'\n':
+        n_rows += 1
+    if boundaries[-1] != offset:
+        boundaries.append(offset)
+
+    shards = [(boundaries[i], boundaries[i + 1], i * shard_rows) for i in range(len(boundaries) - 1)]
+    return header, n_rows, shards
+
+# Répertoire des tableaux partagés : /dev/shm (mémoire vive) sous Linux
+SHARED_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+# Taille à partir de laquelle preprocess_rows passe au prétraitement parallèle
+PARALLEL_MIN_ROWS = 200_000
+
+# Résultats du banc d'essai de montée en charge
+SCALING_REPORT = 'reports/parallel_scaling.csv'
+
+def _write_shard(path, shape, dtype, start, shard, params):
+    """Prétraite un bloc et écrit le résultat à sa place dans le tableau partagé"""
+    X = np.memmap(path, dtype=dtype, mode='r+', shape=shape)
+    X[start:start + len(shard)] = preprocess_to_array(shard, dtype=dtype, params=params)
+    del X
+    return len(shard)
+
+def _preprocess_file_shard(path, shape, dtype, file_path, header, byte_range, start, params):
+    """Tâche d'un processus pour un bloc de fichier : le processus lit lui-même ses octets"""
+    with open(file_path, 'rb') as f:
+        f.seek(byte_range[0])
+        data = f.read(byte_range[1] - byte_range[0])
+    shard = pd.read_csv(io.BytesIO(header + data))
+    return _write_shard(path, shape, dtype, start, shard, params)
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def parallel_preprocess(source, n_workers=None, shard_rows=50_000, dtype=np.float32):
+    """Prétraite un DataFrame ou un fichier CSV en parallèle dans un pool de processus
+
+    Le tableau final est alloué une seule fois dans un fichier projeté en
+    mémoire partagée : chaque processus y écrit directement ses lignes, à leur
+    position d'origine, au lieu de renvoyer (et donc de sérialiser) son
+    résultat. Pour un fichier, chaque processus lit et parse lui-même sa plage
+    d'octets.
+
+    Le tableau retourné est cette projection, sans copie. Il possède sa mémoire
+    comme un tableau ordinaire : elle est libérée avec lui et ses vues.
+    """
+    n_workers = n_workers or os.cpu_count()
+    params = load_preprocessing_params()
+    if isinstance(source, pd.DataFrame):
+        n_rows = len(source)
+    else:
+        header, n_rows, file_shards = scan_file_shards(source, shard_rows)
+    shape = (n_rows, len(params[1]))
+    dtype = np.dtype(dtype)
+    if n_rows == 0:
+        return np.zeros(shape, dtype=dtype)
+
+    fd, path = tempfile.mkstemp(prefix='preprocess_', suffix='.bin', dir=SHARED_DIR)
+    os.close(fd)
+    try:
+        X = np.memmap(path, dtype=dtype, mode='w+', shape=shape)
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            if isinstance(source, pd.DataFrame):
+                # Les blocs du DataFrame sont envoyés aux processus, en nombre limité
+                pending = set()
+                for start in range(0, n_rows, shard_rows):
+                    if len(pending) >= 2 * n_workers:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    shard = source.iloc[start:start + shard_rows]
+                    pending.add(executor.submit(_write_shard, path, shape, dtype, start, shard, params))
+            else:
+                # Pour un fichier, seules les positions des blocs sont envoyées
+                pending = [
+                    executor.submit(_preprocess_file_shard, path, shape, dtype, source,
+                                    header, (start_byte, end_byte), start, params)
+                    for start_byte, end_byte, start in file_shards
+                ]
+            for future in pending:
+                future.result()
+    except BaseException:
+        _remove_quietly(path)
+        raise
+
+    # La projection reste valide une fois le nom supprimé (POSIX) ; sous Windows
+    # le fichier est supprimé à la libération de la projection
+    try:
+        os.remove(path)
+    except PermissionError:
+        weakref.finalize(X.base, _remove_quietly, path)
+    return np.asarray(X)
+
+def preprocess_rows(df, dtype=np.float32, min_rows=PARALLEL_MIN_ROWS):
+    """preprocess_to_array, en parallèle pour les gros lots quand plusieurs cœurs sont disponibles"""
+    if len(df) >= min_rows and (os.cpu_count() or 1) > 1:
+        return parallel_preprocess(df, dtype=dtype)
+    return preprocess_to_array(df, dtype=dtype)
+
+def benchmark_scaling(n_rows=1_000_000, worker_counts=None, shard_rows=50_000):
+    """Mesure l'accélération du prétraitement parallèle d'un fichier selon le nombre de processus
+
+    La référence séquentielle est pd.read_csv suivi de preprocess_to_array.
+    """
+    if worker_counts is None:
+        worker_counts = sorted({1, 2, 4, os.cpu_count()} & set(range(1, os.cpu_count() + 1)))
+
+    # Fichier synthétique de n_rows patients tirés de data/data.csv
+    df = pd.read_csv('data/data.csv').drop(columns='target')
+    df = df.sample(n_rows, replace=True, random_state=42).reset_index(drop=True)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, 'patients.csv')
+        df.to_csv(file_path, index=False)
+
+        start = time.perf_counter()
+        X_ref = preprocess_to_array(pd.read_csv(file_path))
+        serial_time = time.perf_counter() - start
+
+        results = [{'Processus': 0, 'Temps (s)': serial_time, 'Accélération': 1.0, 'Efficacité': 1.0}]
+        for n_workers in worker_counts:
+            start = time.perf_counter()
+            X = parallel_preprocess(file_path, n_workers=n_workers, shard_rows=shard_rows)
+            elapsed = time.perf_counter() - start
+            if not np.array_equal(X, X_ref):
+                raise AssertionError(f"Résultat parallèle différent du résultat séquentiel ({n_workers} processus)")
+            results.append({'Processus': n_workers, 'Temps (s)': elapsed, 'Accélération': serial_time / elapsed,
+                            'Efficacité': serial_time / elapsed / n_workers})
+            del X
+    return pd.DataFrame(results)
+
+if __name__ == "__main__":
+    print(f"Cœurs disponibles : {os.cpu_count()}")
+    if os.cpu_count() == 1:
+        print("Un seul cœur : la montée en charge ne peut pas être mesurée sur cette machine.")
+    print("(0 processus = lecture et prétraitement séquentiels de référence)")
+    results = benchmark_scaling()
+    results.to_csv(SCALING_REPORT, index=False)
+    print(results.to_string(index=False))
+    print(f"Rapport : {SCALING_REPORT}")
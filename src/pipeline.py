@@ -0,0 +1,143 @@
+import os
+import sys
+import json
+import time
+import inspect
+import joblib
+from src.manifest import fingerprint
+
+# Cache des sorties des nœuds et état de la dernière exécution
+CACHE_DIR = '.cache/pipeline'
+STATE_PATH = os.path.join(CACHE_DIR, 'state.json')
+
+def project_imports(module):
+    """Modules du projet (src.*) importés par un module, directement ou via from ... import"""
+    names = set()
+    for obj in vars(module).values():
+        name = obj.__name__ if inspect.ismodule(obj) else getattr(obj, '__module__', None)
+        if isinstance(name, str) and name.startswith('src.') and name != module.__name__:
+            names.add(name)
+    return [sys.modules[name] for name in sorted(names) if name in sys.modules]
+
+def code_objects(code):
+    """Fonctions, classes et modules dont le source entre dans une empreinte
+
+    Un module y entre en entier, avec les modules du projet qu'il importe
+    (récursivement) : une modification de l'un d'eux rend le nœud périmé sans
+    avoir à lister chaque fonction utilisée.
+    """
+    objects, seen = [], set()
+    pending = list(code)
+    while pending:
+        obj = pending.pop(0)
+        key = obj.__name__ if inspect.ismodule(obj) else id(obj)
+        if key in seen:
+            continue
+        seen.add(key)
+        objects.append(obj)
+        if inspect.ismodule(obj):
+            pending.extend(project_imports(obj))
+    return objects
+
+class Node:
+    """Étape du pipeline
+
+    Un nœud est recalculé seulement si son empreinte change : paramètres,
+    code source des fonctions et des modules qui le composent (voir
+    code_objects) ou empreintes de ses dépendances. Il l'est aussi si sa
+    sortie en cache ou l'un des fichiers qu'il produit a disparu.
+    """
+
+    def __init__(self, name, func, deps=(), params=None, code=(), outputs=()):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.params = params or {}
+        self.code = [func] + list(code)
+        self.outputs = list(outputs)
+
+    def fingerprint(self, dep_fingerprints):
+        return fingerprint({
+            'params': self.params,
+            'code': [inspect.getsource(obj) for obj in code_objects(self.code)],
+            'deps': dep_fingerprints
+        })
+
+def _cache_path(name):
+    return os.path.join(CACHE_DIR, f'{fingerprint(name)}.joblib')
+
+def load_state():
+    """État de la dernière exécution (empreinte et durée de chaque nœud)"""
+    if not os.path.exists(STATE_PATH):
+        return {}
+    with open(STATE_PATH, encoding='utf-8') as f:
+        return json.load(f)
+
+def save_state(state):
+    """Écrit l'état de façon atomique"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f'{STATE_PATH}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, STATE_PATH)
+
+def run_pipeline(nodes, force=False, profiler=None):
+    """Exécute les nœuds modifiés (dans l'ordre donné) et réutilise les autres
+
+    Les sorties des nœuds à jour ne sont chargées depuis le cache que si un nœud
+    modifié en dépend. Retourne un résumé : nœuds exécutés, nœuds ignorés et
+    temps économisé (durée enregistrée des nœuds ignorés).
+
+    Avec un profileur mémoire (src.memory_profiling.MemoryProfiler), chaque
+    nœud exécuté est mesuré comme une étape.
+    """
+    nodes = {node.name: node for node in nodes}
+    state = load_state()
+    fingerprints = {}
+    dirty = set()
+
+    for name, node in nodes.items():
+        fingerprints[name] = node.fingerprint([fingerprints[dep] for dep in node.deps])
+        record = state.get(name)
+        if (force or record is None
+                or record['fingerprint'] != fingerprints[name]
+                or not os.path.exists(_cache_path(name))
+                or not all(os.path.exists(path) for path in node.outputs)):
+            dirty.add(name)
+
+    outputs = {}
+
+    def get_output(name):
+        if name not in outputs:
+            if name in dirty:
+                node = nodes[name]
+                args = [get_output(dep) for dep in node.deps]
+                print(f"[pipeline] Exécution : {name}")
+                start = time.perf_counter()
+                if profiler is None:
+                    outputs[name] = node.func(*args)
+                else:
+                    with profiler.stage(name):
+                        outputs[name] = node.func(*args)
+                duration = time.perf_counter() - start
+                joblib.dump(outputs[name], _cache_path(name))
+                state[name] = {'fingerprint': fingerprints[name], 'duration': duration}
+                save_state(state)
+            else:
+                outputs[name] = joblib.load(_cache_path(name))
+        return outputs[name]
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    for name in nodes:
+        if name in dirty:
+            get_output(name)
+        else:
+            print(f"[pipeline] À jour : {name}")
+
+    skipped = [name for name in nodes if name not in dirty]
+    return {
+        'executed': [name for name in nodes if name in dirty],
+        'skipped': skipped,
+        'time_saved': sum(state[name]['duration'] for name in skipped),
+        'outputs': outputs
+    }
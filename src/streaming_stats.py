@@ -0,0 +1,244 @@
+import numpy as np
+import pandas as pd
+
+class RunningMoments:
+    """Moyenne, variance, min et max par colonne, mis à jour par blocs
+
+    Les blocs sont combinés avec la formule de Chan et al. (généralisation de
+    Welford), ce qui permet aussi de fusionner des états calculés séparément.
+    """
+
+    def __init__(self, n_features):
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+        self.min = np.full(n_features, np.inf)
+        self.max = np.full(n_features, -np.inf)
+
+    def update(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) == 0:
+            return self
+        other = RunningMoments(X.shape[1])
+        other.count = len(X)
+        other.mean = X.mean(axis=0)
+        other.m2 = ((X - other.mean) ** 2).sum(axis=0)
+        other.min = X.min(axis=0)
+        other.max = X.max(axis=0)
+        return self.merge(other)
+
+    def merge(self, other):
+        count = self.count + other.count
+        if count == 0:
+            return self
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * other.count / count
+        self.m2 = self.m2 + other.m2 + delta ** 2 * self.count * other.count / count
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        self.count = count
+        return self
+
+    def variance(self, ddof=0):
+        return self.m2 / (self.count - ddof)
+
+class RunningCovariance:
+    """Matrice des co-moments, fusionnable comme RunningMoments"""
+
+    def __init__(self, n_features):
+        self.count = 0
+        self.mean = np.zeros(n_features)
+        self.comoment = np.zeros((n_features, n_features))
+
+    def update(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if len(X) == 0:
+            return self
+        other = RunningCovariance(X.shape[1])
+        other.count = len(X)
+        other.mean = X.mean(axis=0)
+        centered = X - other.mean
+        other.comoment = centered.T @ centered
+        return self.merge(other)
+
+    def merge(self, other):
+        count = self.count + other.count
+        if count == 0:
+            return self
+        delta = other.mean - self.mean
+        self.comoment = (self.comoment + other.comoment
+                         + np.outer(delta, delta) * self.count * other.count / count)
+        self.mean = self.mean + delta * other.count / count
+        self.count = count
+        return self
+
+    def covariance(self, ddof=1):
+        return self.comoment / (self.count - ddof)
+
+    def correlation(self):
+        std = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.comoment / np.outer(std, std)
+
+# Valeurs distinctes gardées par colonne : les quantiles sont exacts en dessous
+# (toutes les colonnes de data/data.csv, y compris oldpeak), approchés au-delà
+MAX_BINS = 65_536
+
+class QuantileSketch:
+    """Résumé fusionnable d'une distribution pour estimer ses quantiles
+
+    Le résumé garde les valeurs distinctes et leurs effectifs. Il est exact tant
+    que le nombre de valeurs distinctes reste sous max_bins. Au-delà, les
+    valeurs voisines les plus proches sont fusionnées (moyenne pondérée) pour
+    rester de taille bornée, et les quantiles deviennent approchés.
+    """
+
+    def __init__(self, max_bins=MAX_BINS):
+        self.max_bins = max_bins
+        self.values = np.empty(0)
+        self.counts = np.empty(0)
+
+    def update(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        values, counts = np.unique(x[~np.isnan(x)], return_counts=True)
+        return self._combine(values, counts.astype(np.float64))
+
+    def merge(self, other):
+        return self._combine(other.values, other.counts)
+
+    def _combine(self, values, counts):
+        values, inverse = np.unique(np.concatenate([self.values, values]), return_inverse=True)
+        self.counts = np.bincount(inverse, weights=np.concatenate([self.counts, counts]))
+        self.values = values
+        while len(self.values) > self.max_bins:
+            self._compress(len(self.values) - self.max_bins)
+        return self
+
+    def _compress(self, n_merges):
+        # Paires disjointes (2i, 2i+1) de valeurs voisines : on fusionne celles
+        # dont l'écart est le plus faible (moyenne pondérée par les effectifs)
+        n_pairs = len(self.values) // 2
+        gaps = self.values[1:2 * n_pairs:2] - self.values[0:2 * n_pairs:2]
+        n_merges = min(n_merges, n_pairs)
+        pairs = np.argpartition(gaps, n_merges - 1)[:n_merges] if n_merges < n_pairs else np.arange(n_pairs)
+
+        left, right = 2 * pairs, 2 * pairs + 1
+        merged_counts = self.counts[left] + self.counts[right]
+        self.values[left] = (self.values[left] * self.counts[left]
+                             + self.values[right] * self.counts[right]) / merged_counts
+        self.counts[left] = merged_counts
+        keep = np.ones(len(self.values), dtype=bool)
+        keep[right] = False
+        self.values = self.values[keep]
+        self.counts = self.counts[keep]
+
+    def quantile(self, q):
+        """Quantile avec interpolation linéaire (même convention que pandas)"""
+        total = self.counts.sum()
+        if total == 0:
+            return np.nan
+        # Position (0-indexée) dans les données triées, comme numpy 'linear'
+        position = q * (total - 1)
+        cumulative = np.cumsum(self.counts)
+        lower = self.values[np.searchsorted(cumulative, np.floor(position), side='right')]
+        upper = self.values[np.searchsorted(cumulative, np.ceil(position), side='right')]
+        return lower + (upper - lower) * (position - np.floor(position))
+
+class StreamingStats:
+    """Statistiques descriptives et corrélations calculées en une seule passe
+
+    Chaque bloc met à jour les moments, les co-moments et les résumés de
+    quantiles. Deux instances (calculées sur des fichiers ou des processus
+    différents, ou avant/après l'ajout de données) se combinent avec merge().
+    """
+
+    def __init__(self, columns, max_bins=MAX_BINS):
+        self.columns = list(columns)
+        self.moments = RunningMoments(len(self.columns))
+        self.covariance = RunningCovariance(len(self.columns))
+        self.sketches = [QuantileSketch(max_bins) for _ in self.columns]
+
+    def update(self, df):
+        X = df[self.columns].to_numpy(dtype=np.float64)
+        self.moments.update(X)
+        self.covariance.update(X)
+        for j, sketch in enumerate(self.sketches):
+            sketch.update(X[:, j])
+        return self
+
+    def merge(self, other):
+        if other.columns != self.columns:
+            raise ValueError("Les statistiques à fusionner portent sur des colonnes différentes")
+        self.moments.merge(other.moments)
+        self.covariance.merge(other.covariance)
+        for sketch, other_sketch in zip(self.sketches, other.sketches):
+            sketch.merge(other_sketch)
+        return self
+
+    @property
+    def count(self):
+        return self.moments.count
+
+    @property
+    def exact_quantiles(self):
+        """Vrai si aucun résumé de quantiles n'a eu à fusionner de valeurs"""
+        return all(len(sketch.values) < sketch.max_bins for sketch in self.sketches)
+
+    def describe(self):
+        """Équivalent de DataFrame.describe() (quantiles approchés si exact_quantiles est faux)"""
+        rows = {
+            'count': np.full(len(self.columns), float(self.count)),
+            'mean': self.moments.mean,
+            'std': np.sqrt(self.moments.variance(ddof=1)),
+            'min': self.moments.min
+        }
+        for q in (0.25, 0.5, 0.75):
+            rows[f'{q:.0%}'] = [sketch.quantile(q) for sketch in self.sketches]
+        rows['max'] = self.moments.max
+        return pd.DataFrame(rows, index=self.columns).T
+
+    def corr(self):
+        """Équivalent de DataFrame.corr() (Pearson)"""
+        return pd.DataFrame(self.covariance.correlation(), index=self.columns, columns=self.columns)
+
+    def scaler_params(self, columns=None):
+        """Paramètres d'un StandardScaler ajusté sur les mêmes données"""
+        columns = columns or self.columns
+        idx = [self.columns.index(col) for col in columns]
+        scale = np.sqrt(self.moments.variance(ddof=0)[idx])
+        # Même convention que StandardScaler pour les variances nulles
+        scale[scale == 0] = 1.0
+        return pd.DataFrame({'mean': self.moments.mean[idx], 'scale': scale}, index=columns)
+
+def compute_stats(file_path, columns=None, chunksize=100_000):
+    """Calcule les statistiques d'un fichier CSV en une passe, par blocs"""
+    stats = None
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        if stats is None:
+            stats = StreamingStats(columns or chunk.columns)
+        stats.update(chunk)
+    return stats
+
+def compute_grouped_stats(file_path, by='target', columns=None, chunksize=100_000):
+    """Calcule les statistiques par groupe (ex. par classe) en une passe, par blocs"""
+    stats = {}
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        group_columns = columns or [col for col in chunk.columns if col != by]
+        for key, group in chunk.groupby(by):
+            stats.setdefault(key, StreamingStats(group_columns)).update(group)
+    return dict(sorted(stats.items()))
+
+def grouped_describe(grouped_stats, column):
+    """Équivalent de df.groupby(by)[column].describe()"""
+    return pd.DataFrame({key: stats.describe()[column] for key, stats in grouped_stats.items()}).T
+
+if __name__ == "__main__":
+    from src.data_preprocessing import NUMERIC_COLS
+
+    df = pd.read_csv('data/data.csv')
+    stats = compute_stats('data/data.csv', chunksize=1000)
+
+    print("Écart max describe():", np.nanmax(np.abs(stats.describe().to_numpy() - df.describe().to_numpy())),
+          "(quantiles exacts)" if stats.exact_quantiles else "(quantiles approchés)")
+    print("Écart max corr():", np.nanmax(np.abs(stats.corr().to_numpy() - df.corr().to_numpy())))
+    print(stats.scaler_params(NUMERIC_COLS))
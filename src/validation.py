@@ -0,0 +1,218 @@
+import os
+import time
+import numpy as np
+import pandas as pd
+from src.data_preprocessing import CATEGORIES
+
+# Lignes rejetées du jeu d'entraînement, avec leur motif
+REJECTED_PATH = 'reports/rejected_rows.csv'
+
+# Schéma des variables d'un patient : plage de valeurs plausibles ou catégories connues
+INPUT_SCHEMA = {
+    'age': {'range': (1, 120), 'integer': True},
+    'sex': {'categories': [0, 1]},
+    'chest pain type': {'categories': CATEGORIES['chest pain type']},
+    'resting bp s': {'range': (50, 250), 'integer': True},
+    # 0 code l'absence de mesure dans les données sources
+    'cholesterol': {'range': (0, 700), 'integer': True},
+    'fasting blood sugar': {'categories': [0, 1]},
+    'resting ecg': {'categories': CATEGORIES['resting ecg']},
+    'max heart rate': {'range': (50, 250), 'integer': True},
+    'exercise angina': {'categories': [0, 1]},
+    # Un sous-décalage du segment ST (valeur négative) existe dans les données sources
+    'oldpeak': {'range': (-3.0, 7.0)},
+    'ST slope': {'categories': CATEGORIES['ST slope']}
+}
+
+# Données d'entraînement : la cible est aussi validée
+TRAINING_SCHEMA = {**INPUT_SCHEMA, 'target': {'categories': [0, 1]}}
+
+# Motifs de rejet, dans l'ordre où ils sont vérifiés pour chaque colonne
+REASONS = ['valeur manquante', 'valeur non numérique', 'valeur non entière', 'hors plage', 'catégorie inconnue']
+
+def reason_labels(schema=INPUT_SCHEMA):
+    """Libellé de chaque code de rejet (le code 0 correspond à une ligne valide)"""
+    return np.array([''] + [f'{col} : {reason}' for col in schema for reason in REASONS], dtype=object)
+
+def _numeric_values(series):
+    """Valeurs d'une colonne en tableau NumPy, et masque des valeurs non numériques"""
+    if series.dtype.kind in 'biuf':
+        return series.to_numpy(), None
+    values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64)
+    return values, np.isnan(values) & series.notna().to_numpy()
+
+def validate(df, schema=INPUT_SCHEMA):
+    """Code de rejet de chaque ligne (0 : ligne valide)
+
+    Chaque règle est un masque calculé sur une colonne entière : aucune
+    boucle par ligne. Une ligne invalide reçoit le code du premier problème
+    rencontré, dans l'ordre des colonnes du schéma puis des motifs (REASONS).
+    Les colonnes entières (int) sautent les vérifications de valeur manquante
+    et de valeur entière. Une colonne absente rend tout le bloc invalide.
+    """
+    missing = [col for col in schema if col not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes dans le fichier : {', '.join(missing)}")
+
+    codes = np.zeros(len(df), dtype=np.int16)
+    # Colonnes et motifs parcourus à l'envers : le premier problème écrit son code en dernier
+    for index, (col, rule) in reversed(list(enumerate(schema.items()))):
+        base = 1 + index * len(REASONS)
+        values, non_numeric = _numeric_values(df[col])
+
+        if 'categories' in rule:
+            categories = np.sort(rule['categories'])
+            if values.dtype.kind in 'biu' and np.array_equal(categories, np.arange(categories[0], categories[-1] + 1)):
+                # Catégories entières consécutives : deux comparaisons suffisent
+                unknown = (values < categories[0]) | (values > categories[-1])
+            else:
+                unknown = ~np.isin(values, categories)
+            codes[unknown] = base + REASONS.index('catégorie inconnue')
+        if 'range' in rule:
+            low, high = rule['range']
+            codes[(values < low) | (values > high)] = base + REASONS.index('hors plage')
+        if values.dtype.kind == 'f':
+            if rule.get('integer'):
+                codes[values != np.floor(values)] = base + REASONS.index('valeur non entière')
+            missing_values = np.isnan(values)
+            if non_numeric is not None:
+                codes[non_numeric] = base + REASONS.index('valeur non numérique')
+                missing_values &= ~non_numeric
+            codes[missing_values] = base + REASONS.index('valeur manquante')
+    return codes
+
+def split_valid(df, schema=INPUT_SCHEMA):
+    """Sépare un bloc en lignes valides et lignes rejetées (avec leur motif)
+
+    Retourne (lignes valides, lignes rejetées, codes de rejet de toutes les lignes).
+    """
+    codes = validate(df, schema)
+    valid = codes == 0
+    rejected = df[~valid].copy()
+    rejected['motif de rejet'] = reason_labels(schema)[codes[~valid]]
+    return df[valid], rejected, codes
+
+def as_numeric(df, schema=INPUT_SCHEMA):
+    """Rétablit le type des colonnes après le rejet des lignes invalides
+
+    Une seule valeur manquante ou non numérique fait lire toute sa colonne en
+    float ou en texte. Les colonnes à catégories ou entières du schéma
+    repassent en int64 : en float, get_dummies produirait « ST slope_1.0 » et
+    la réindexation sur « ST slope_1 » remplirait de zéros toutes les lignes
+    valides du bloc. Les autres colonnes lues comme texte passent en float64.
+    À appeler sur les lignes valides : leurs valeurs sont toutes numériques.
+    """
+    converted = {}
+    for col in df.columns:
+        rule = schema.get(col, {})
+        if 'categories' in rule or rule.get('integer'):
+            if df[col].dtype.kind not in 'iu':
+                converted[col] = pd.to_numeric(df[col]).astype(np.int64)
+        elif df[col].dtype.kind not in 'biuf':
+            converted[col] = pd.to_numeric(df[col]).astype(np.float64)
+    return df.assign(**converted) if converted else df
+
+def rejection_summary(codes, schema=INPUT_SCHEMA):
+    """Nombre de lignes rejetées par motif, du plus fréquent au moins fréquent"""
+    counts = np.bincount(codes, minlength=1 + len(schema) * len(REASONS))
+    labels = reason_labels(schema)
+    present = np.flatnonzero(counts[1:]) + 1
+    summary = pd.Series(counts[present], index=labels[present], name='Lignes', dtype=int)
+    return summary.rename_axis('Motif de rejet').sort_values(ascending=False)
+
+def validate_training_data(df):
+    """Garde les lignes valides du jeu d'entraînement et enregistre les lignes rejetées"""
+    valid, rejected, codes = split_valid(df, TRAINING_SCHEMA)
+    os.makedirs(os.path.dirname(REJECTED_PATH), exist_ok=True)
+    rejected.to_csv(REJECTED_PATH)
+    if len(rejected):
+        print(f"Validation : {len(rejected)} lignes rejetées sur {len(df)}")
+        print(rejection_summary(codes, TRAINING_SCHEMA).to_string())
+    return valid
+
+def benchmark_validation(n_rows=(100_000, 1_000_000, 10_000_000), random_state=42):
+    """Débit de la validation, comparé à une simple copie des colonnes (borne mémoire)
+
+    Les lignes sont tirées parmi les lignes valides de data/data.csv, puis
+    1 % d'entre elles reçoivent une valeur invalide.
+    """
+    from src.data_preprocessing import load_data
+
+    source, _, _ = split_valid(load_data('data/data.csv')[list(INPUT_SCHEMA)])
+    rng = np.random.default_rng(random_state)
+    results = []
+    for n in n_rows:
+        df = source.iloc[rng.integers(0, len(source), n)].reset_index(drop=True)
+        corrupted = rng.random(n) < 0.01
+        df.loc[corrupted, 'cholesterol'] = 900
+
+        start = time.perf_counter()
+        codes = validate(df)
+        validation_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for col in INPUT_SCHEMA:
+            df[col].to_numpy().copy()
+        copy_time = time.perf_counter() - start
+
+        size = sum(df[col].to_numpy().nbytes for col in INPUT_SCHEMA)
+        results.append({
+            'Lignes': n,
+            'Validation (s)': validation_time,
+            'Lignes/s (M)': n / validation_time / 1e6,
+            'Débit (Go/s)': size / validation_time / 1e9,
+            'Copie des colonnes (Go/s)': size / copy_time / 1e9,
+            'Rejets': int((codes != 0).sum()),
+            'Rejets attendus': int(corrupted.sum())
+        })
+    return pd.DataFrame(results)
+
+def check_chunk_parity(model_name='Random Forest', n_rows=200, data_path='data/data.csv'):
+    """Vérifie que le score des lignes valides ne dépend pas d'une ligne invalide dans leur bloc
+
+    Pour chaque variable, une ligne avec une valeur manquante puis une ligne
+    avec une valeur non numérique est ajoutée au bloc. Le bloc passe par un
+    fichier CSV, comme dans les prédictions par lot : les types des colonnes
+    sont déduits du bloc. Les lignes valides doivent recevoir exactement les
+    mêmes prédictions et probabilités que sans la ligne invalide.
+    """
+    import io
+    from src.batch_jobs import score_chunk
+    from src.data_preprocessing import load_data
+    from src.inference import load_model
+
+    source, _, _ = split_valid(load_data(data_path)[list(INPUT_SCHEMA)])
+    source = source.head(n_rows).reset_index(drop=True)
+    model = load_model(model_name)
+    reference_pred, reference_prob = score_chunk(source, model)
+
+    results = []
+    for col in INPUT_SCHEMA:
+        for invalid in (np.nan, 'inconnu'):
+            bad_row = source.head(1).astype(object)
+            bad_row[col] = invalid
+            chunk = pd.read_csv(io.StringIO(pd.concat([source, bad_row]).to_csv(index=False)))
+            valid, _, _ = split_valid(chunk)
+            y_pred, y_prob = score_chunk(as_numeric(valid), model)
+            results.append({
+                'Variable': col,
+                'Valeur invalide': 'manquante' if pd.isna(invalid) else 'non numérique',
+                'Lignes valides': len(valid),
+                'Parité': bool(np.array_equal(y_pred, reference_pred) and np.array_equal(y_prob, reference_prob))
+            })
+    return pd.DataFrame(results)
+
+if __name__ == "__main__":
+    from src.data_preprocessing import load_data
+
+    df = load_data('data/data.csv')
+    valid, rejected, codes = split_valid(df, TRAINING_SCHEMA)
+    print(f"data/data.csv : {len(valid)} lignes valides, {len(rejected)} rejetées")
+    print(rejection_summary(codes, TRAINING_SCHEMA).to_string())
+    print()
+    print(benchmark_validation().round(3).to_string(index=False))
+    print()
+    parity = check_chunk_parity()
+    print(parity.to_string(index=False))
+    if not parity['Parité'].all():
+        raise SystemExit("Le score des lignes valides dépend des lignes invalides de leur bloc")